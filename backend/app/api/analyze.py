@@ -1,96 +1,229 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import APIRouter, HTTPException
 import pandas as pd
 
+from app.core.cache import LRUCache, canonical_hash
+from app.core.config import (
+    ANALYZE_CACHE_SIZE,
+    ANALYZE_CACHE_TTL,
+    ANALYZE_STAGE_TIMEOUT,
+    ANALYZE_STAGE_WORKERS,
+)
+from app.core.scheduler import Stage, StageTimeoutError, run_stages
 from app.services.scoring import calculate_health_score, health_status
 from app.services.risk_engine import identify_risks
-from app.services.benchmarking import compare_with_benchmark
+from app.services.benchmarking import INDUSTRY_BENCHMARKS, compare_with_benchmark
 from app.services.forecasting import generate_forecast
 from app.services.working_capital import compute_working_capital_metrics
 from app.services.bookkeeping import automated_bookkeeping
 from app.services.gst import analyze_gst
-from app.services.bank_adapter import fetch_bank_transactions
-from app.services.cashflow_enrichment import enrich_with_bank_data
+from app.services.bank_adapter import (
+    BankAPIError,
+    mark_transactions_changed,
+    on_transactions_changed,
+)
+from app.services.bank_store import bank_rollups, on_rollups_changed, synced_bank_rollups
+from app.services.cashflow_enrichment import enrich_with_bank_totals
+from app.services.metrics import build_aggregates
+from app.services.financial_store import load_history
 
 router = APIRouter()
 
+# Shared across requests so stage threads are reused
+stage_executor = ThreadPoolExecutor(
+    max_workers=ANALYZE_STAGE_WORKERS, thread_name_prefix="analyze-stage"
+)
+
+# Finished analyses keyed by a hash of the normalized request; entries are
+# tagged with their bank account and dropped when its transactions change,
+# whether signalled or found by a sync.
+analysis_cache = LRUCache(maxsize=ANALYZE_CACHE_SIZE, ttl=ANALYZE_CACHE_TTL)
+on_transactions_changed(analysis_cache.invalidate_tag)
+on_rollups_changed(analysis_cache.invalidate_tag)
+
+
+def analysis_cache_key(monthly_data, industry, gst_payload, bank_account_ids):
+    return canonical_hash({
+        "monthly_data": monthly_data,
+        "industry": industry,
+        "gst_data": gst_payload or None,
+        "bank_account_ids": bank_account_ids,
+    })
+
+
+def run_gst_analysis(gst_payload, df, aggregates):
+    if gst_payload:
+        return analyze_gst(gst_payload, df)
+
+    # FIX: Safe column access to prevent AttributeError
+    gst_paid = aggregates.sum("gst_paid") if aggregates.has("gst_paid") else 0.0
+    gst_due = aggregates.sum("gst_due") if aggregates.has("gst_due") else 0.0
+
+    if gst_paid > 0 or gst_due > 0:
+        return analyze_gst(
+            {
+                "gst_paid": float(gst_paid),
+                "gst_due": float(gst_due),
+            },
+            df
+        )
+
+    return None
+
+
+def build_analysis_stages(df, bank_account_ids, industry, gst_payload):
+    """
+    Stage graph for /analyze. Everything after enrichment only reads the
+    enriched dataframe and its aggregates, so those stages run concurrently.
+    """
+    return [
+        # Stored monthly rollups, after fetching only what each account
+        # added since its last sync (accounts sync concurrently). A sync
+        # over budget stops holding its stage thread and falls back to the
+        # rollups stored by the last one; it finishes on the bank adapter's
+        # event loop and stores its rollups for next time.
+        Stage(
+            "bank",
+            lambda: synced_bank_rollups(bank_account_ids, timeout=ANALYZE_STAGE_TIMEOUT),
+            optional=True,
+            fallback=lambda: bank_rollups(bank_account_ids),
+        ),
+        # FIX: Enrich data first so Score and Risks use the same dataset
+        Stage(
+            "enrich",
+            lambda bank: enrich_with_bank_totals(df, bank["monthly"]),
+            deps=["bank"],
+        ),
+        # Shared sums / means / cash-flow vectors for every service below
+        Stage("aggregates", build_aggregates, deps=["enrich"]),
+        Stage("bookkeeping", automated_bookkeeping, deps=["enrich"]),
+        Stage(
+            "gst",
+            lambda enriched, agg: run_gst_analysis(gst_payload, enriched, agg),
+            deps=["enrich", "aggregates"],
+        ),
+        Stage("score", calculate_health_score, deps=["enrich", "aggregates"]),
+        Stage("risks", identify_risks, deps=["enrich", "aggregates"]),
+        Stage(
+            "benchmarks",
+            lambda enriched, agg: compare_with_benchmark(enriched, industry, agg),
+            deps=["enrich", "aggregates"],
+        ),
+        Stage("forecast", generate_forecast, deps=["enrich", "aggregates"]),
+        Stage(
+            "working_capital",
+            compute_working_capital_metrics,
+            deps=["enrich", "aggregates"],
+        ),
+    ]
+
+
 @router.post("/analyze")
 def analyze_financials(payload: dict):
     # -----------------------------
     # 1. Validate input contract
     # -----------------------------
-    if "monthly_data" not in payload:
+    if "monthly_data" in payload:
+        monthly_data = payload["monthly_data"]
+    elif payload.get("business_id"):
+        # Stored history instead of resending it with every request
+        monthly_data = load_history(payload["business_id"])
+        if not monthly_data:
+            raise HTTPException(status_code=404, detail="No stored history for this business")
+    else:
         raise HTTPException(status_code=400, detail="monthly_data missing in request")
 
-    df = pd.DataFrame(payload["monthly_data"])
+    bank_account_ids = payload.get("bank_account_ids") or [
+        payload.get("bank_account_id", "demo-account")
+    ]
+    if not isinstance(bank_account_ids, list) or not all(
+        isinstance(account_id, str) for account_id in bank_account_ids
+    ):
+        raise HTTPException(status_code=400, detail="bank_account_ids must be a list of strings")
+    # Each account once, in the order given
+    bank_account_ids = list(dict.fromkeys(bank_account_ids))
+    industry = payload.get("industry", "Retail")
+    if not isinstance(industry, str) or industry not in INDUSTRY_BENCHMARKS:
+        raise HTTPException(status_code=400, detail=f"Unsupported industry: {industry}")
+    gst_payload = payload.get("gst_data")
+
+    cache_key = analysis_cache_key(
+        monthly_data, industry, gst_payload, bank_account_ids
+    )
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        if payload.get("debug"):
+            return {**cached, "timings": {"cache": "hit"}}
+        return cached
+
+    df = pd.DataFrame(monthly_data)
 
     # FIX: Check for empty DF before processing
     if df.empty:
         raise HTTPException(status_code=400, detail="monthly_data is empty")
 
     # -----------------------------
-    # 2. Data Enrichment (Do this FIRST)
-    # -----------------------------
-    bank_account_id = payload.get("bank_account_id", "demo-account")
-    transactions = fetch_bank_transactions(bank_account_id)
-    
-    # FIX: Enrich data first so Score and Risks use the same dataset
-    df = enrich_with_bank_data(df, transactions) 
-    
-    # -----------------------------
-    # 3. Sub-Services (Bookkeeping, GST)
+    # 2. Run enrichment, bookkeeping, GST and core analysis stages
     # -----------------------------
-    bookkeeping = automated_bookkeeping(df)
-
-    industry = payload.get("industry", "Retail")
-    gst_payload = payload.get("gst_data")
-    gst_analysis = None
-
-    if gst_payload:
-        gst_analysis = analyze_gst(gst_payload, df)
-    else:
-        # FIX: Safe column access to prevent AttributeError
-        gst_paid = df["gst_paid"].sum() if "gst_paid" in df.columns else 0.0
-        gst_due = df["gst_due"].sum() if "gst_due" in df.columns else 0.0
-        
-        if gst_paid > 0 or gst_due > 0:
-            gst_analysis = analyze_gst(
-                {
-                    "gst_paid": float(gst_paid),
-                    "gst_due": float(gst_due),
-                },
-                df
-            )
+    stages = build_analysis_stages(df, bank_account_ids, industry, gst_payload)
+    try:
+        results, timings = run_stages(
+            stages, stage_executor, default_timeout=ANALYZE_STAGE_TIMEOUT
+        )
+    except StageTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BankAPIError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
-    # -----------------------------
-    # 4. Core Analysis (Score, Risk, Forecast)
-    # -----------------------------
-    # Now calculating score on the Enriched DF
-    score_data = calculate_health_score(df) 
+    bank = results["bank"]
+    score_data = results["score"]
     status = health_status(score_data["total_score"])
-    
-    risks = identify_risks(df)
-    benchmarks = compare_with_benchmark(df, industry)
-    forecast = generate_forecast(df)
-    wc_metrics = compute_working_capital_metrics(df)
 
     # -----------------------------
-    # 5. Final response
+    # 3. Final response
     # -----------------------------
     analysis = {
         "score": score_data["total_score"],
         "status": status,
         "breakdown": score_data["breakdown"],
-        "risks": risks,
-        "benchmarks": benchmarks,
-        "forecast": forecast,
-        "working_capital": wc_metrics,
-        "bookkeeping": bookkeeping,
-        "gst": gst_analysis,
+        "risks": results["risks"],
+        "benchmarks": results["benchmarks"],
+        "forecast": results["forecast"],
+        "working_capital": results["working_capital"],
+        "bookkeeping": results["bookkeeping"],
+        "gst": results["gst"],
         "bank_summary": {
-            "inflows": sum(t["amount"] for t in transactions if t.get("type") == "credit"),
-            "outflows": sum(t["amount"] for t in transactions if t.get("type") == "debit"),
-            "transaction_count": len(transactions)
+            "inflows": bank["inflows"],
+            "outflows": bank["outflows"],
+            "transaction_count": bank["transaction_count"]
         }
     }
 
-    return analysis
\ No newline at end of file
+    # Totals from a sync that timed out are stale; the next request retries
+    if timings["bank"] != "timeout":
+        analysis_cache.set(cache_key, analysis, tags=bank_account_ids)
+
+    if payload.get("debug"):
+        return {**analysis, "timings": timings}
+
+    return analysis
+
+
+@router.get("/analyze/cache/stats")
+def analysis_cache_stats():
+    return analysis_cache.stats()
+
+
+@router.post("/analyze/cache/invalidate")
+def invalidate_analysis_cache(payload: dict):
+    """
+    Signal that a bank account's transactions changed, e.g. from a bank
+    webhook. Drops every cached analysis built on that account.
+    """
+    bank_account_id = payload.get("bank_account_id")
+    if not bank_account_id:
+        raise HTTPException(status_code=400, detail="bank_account_id missing in request")
+
+    mark_transactions_changed(bank_account_id)
+    return {"bank_account_id": bank_account_id, "invalidated": True}
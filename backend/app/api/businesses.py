@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException
+
+from app.services.benchmarking import INDUSTRY_BENCHMARKS
+from app.services.business_scores import forget_business, record_months, score_business
+from app.services.financial_store import delete_history, load_history, save_months
+
+router = APIRouter()
+
+@router.post("/businesses/{business_id}/history")
+def store_business_history(business_id: str, payload: dict):
+    """
+    Add or replace months of a business's stored history.
+
+    Payload: {"monthly_data": [...]} with the same rows /analyze takes;
+    one row per month, a month that is already stored is overwritten.
+    """
+    monthly_data = payload.get("monthly_data")
+    if not monthly_data:
+        raise HTTPException(status_code=400, detail="monthly_data missing in request")
+
+    try:
+        stored = save_months(business_id, monthly_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    record_months(business_id, stored)
+    return {"business_id": business_id, "stored_months": len(stored)}
+
+@router.get("/businesses/{business_id}/history")
+def get_business_history(business_id: str):
+    monthly_data = load_history(business_id)
+    if not monthly_data:
+        raise HTTPException(status_code=404, detail="No stored history for this business")
+
+    return {"business_id": business_id, "monthly_data": monthly_data}
+
+@router.delete("/businesses/{business_id}/history")
+def delete_business_history(business_id: str):
+    deleted = delete_history(business_id)
+    forget_business(business_id)
+    return {"business_id": business_id, "deleted_months": deleted}
+
+@router.get("/businesses/{business_id}/score")
+def get_business_score(business_id: str, industry: str = "Retail"):
+    """
+    Health score, risks, benchmarks and working capital of the stored
+    history. Stored months update the score incrementally rather than
+    recomputing it over the whole history.
+    """
+    if industry not in INDUSTRY_BENCHMARKS:
+        raise HTTPException(status_code=400, detail=f"Unsupported industry: {industry}")
+
+    result = score_business(business_id, industry)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No stored history for this business")
+
+    return result
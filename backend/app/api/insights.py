@@ -1,18 +1,55 @@
+import json
+import logging
+
 from fastapi import APIRouter
-from app.services.ai_insights import generate_ai_insights
-from app.services.translator import translate_text
+from fastapi.responses import StreamingResponse
+from app.services.ai_insights import generate_ai_insights, stream_ai_insights
+from app.services.translator import (
+    stream_translate_text,
+    translate_text,
+    translation_cache_stats,
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+async def insight_events(analysis, language):
+    """
+    Server-Sent Events: one `data` event per text delta, then a `done`
+    event once the text is complete, so clients can tell a finished stream
+    from a dropped connection. A stream that fails partway ends with an
+    `error` event instead; the text sent so far is incomplete.
+    """
+    deltas = stream_translate_text(stream_ai_insights(analysis), language)
+    try:
+        async for delta in deltas:
+            yield f"data: {json.dumps({'delta': delta}, ensure_ascii=False)}\n\n"
+    except Exception as e:
+        logger.error(f"Insights stream failed: {str(e)}")
+        yield f"event: error\ndata: {json.dumps({'error': 'Insights stream interrupted'})}\n\n"
+        return
+    yield f"event: done\ndata: {json.dumps({'language': language})}\n\n"
 
 @router.post("/insights")
-def get_ai_insights(payload: dict):
+async def get_ai_insights(payload: dict):
     analysis = payload["analysis"]
     language = payload.get("language", "en")
 
-    insights = generate_ai_insights(analysis)
-    translated = translate_text(insights, language)
+    if payload.get("stream"):
+        return StreamingResponse(
+            insight_events(analysis, language),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    insights = await generate_ai_insights(analysis)
+    translated = await translate_text(insights, language)
 
     return {
         "language": language,
         "insights": translated
     }
+
+@router.get("/insights/translation/stats")
+def get_translation_cache_stats():
+    return translation_cache_stats()
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+
+from app.services.portfolio import analyze_portfolio
+
+router = APIRouter()
+
+@router.post("/analyze/batch")
+def analyze_portfolio_batch(payload: dict):
+    """
+    Score a lender portfolio in one request.
+
+    Payload: {"businesses": [{"business_id", "monthly_data", "industry"}],
+              "industry": default industry for entries without one}
+    """
+    businesses = payload.get("businesses")
+    if not businesses:
+        raise HTTPException(status_code=400, detail="businesses missing in request")
+
+    results = analyze_portfolio(businesses, payload.get("industry", "Retail"))
+
+    return {
+        "count": len(results),
+        "results": results
+    }
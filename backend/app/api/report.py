@@ -1,16 +1,77 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from app.services.pdf_report import generate_pdf_report
-from app.services.ai_insights import generate_ai_insights
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse, JSONResponse
+from starlette.background import BackgroundTask
+from app.core.config import REPORT_INSIGHTS_BUDGET
+from app.services.pdf_report import (
+    finish_report,
+    render_report_body,
+    render_reports,
+    stream_portfolio_report,
+)
+from app.services.ai_insights import INSIGHTS_ERROR_MESSAGE, generate_ai_insights
+from app.services.report_cache import (
+    etag_matches,
+    get_cached_report,
+    get_report,
+    report_etag,
+    store_report,
+)
 from datetime import datetime
+from typing import Optional
+import asyncio
 import logging
+import os
+import re
+import tempfile
+import time
 import traceback
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+INSIGHTS_UNAVAILABLE_MESSAGE = "AI insights unavailable. Please try again later."
+
+def _pdf_response(pdf: bytes, if_none_match: Optional[str], key: Optional[str] = None):
+    """
+    The report with a strong ETag; 304 when the client already has these
+    bytes. `key` is set for cached reports, which GET /report/{key} serves.
+    """
+    etag = report_etag(pdf)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if key is not None:
+        headers["Content-Location"] = f"/report/{key}"
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Generate filename with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"financial_health_report_{timestamp}.pdf"
+    logger.info(f"Returning PDF with filename: {filename}")
+
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+async def _insights_or_fallback(analysis: dict):
+    try:
+        ai_insights = await generate_ai_insights(analysis)
+        logger.info("AI insights generated successfully")
+        return ai_insights
+    except Exception as e:
+        logger.warning(f"Failed to generate AI insights: {str(e)}")
+        return INSIGHTS_UNAVAILABLE_MESSAGE
+
 @router.post("/report")
-async def generate_report(payload: dict):
+async def generate_report(payload: dict, if_none_match: Optional[str] = Header(None)):
+    """
+    Payload: {"analysis": {...}}. A report already rendered for the same
+    analysis is served from the report cache, without the LLM or reportlab.
+    Send If-None-Match with the ETag of a previous download to get 304.
+
+    Otherwise the pages that do not depend on the AI insights are rendered
+    while the LLM call is in flight. Insights not ready within
+    REPORT_INSIGHTS_BUDGET seconds are replaced by a marked placeholder.
+    """
     try:
         logger.info("Received report generation request")
         
@@ -22,20 +83,41 @@ async def generate_report(payload: dict):
                 content={"error": "Missing analysis data"}
             )
         
+        cached = get_cached_report(analysis)
+        if cached is not None:
+            logger.info("Returning cached PDF report")
+            key, pdf_bytes = cached
+            return _pdf_response(pdf_bytes, if_none_match, key)
+
         logger.info(f"Generating PDF report for analysis with score: {analysis.get('score', 'N/A')}")
+        started = time.monotonic()
         
-        # Generate AI insights (with fallback)
+        # Generate AI insights in the background while the pages that do
+        # not depend on them are rendered
+        insights_task = asyncio.ensure_future(_insights_or_fallback(analysis))
         try:
-            ai_insights = generate_ai_insights(analysis)
-            logger.info("AI insights generated successfully")
+            body = await run_in_threadpool(render_report_body, analysis)
+            logger.info("PDF body rendered successfully")
         except Exception as e:
-            logger.warning(f"Failed to generate AI insights: {str(e)}")
-            ai_insights = "AI insights unavailable. Please try again later."
+            logger.error(f"PDF generation failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            return JSONResponse(
+                status_code=500,
+                content={"error": f"PDF generation failed: {str(e)}"}
+            )
+        
+        # Wait for insights only up to the latency budget. A late call keeps
+        # running (shielded) and caches its insights for the next download.
+        remaining = REPORT_INSIGHTS_BUDGET - (time.monotonic() - started)
+        try:
+            ai_insights = await asyncio.wait_for(asyncio.shield(insights_task), max(remaining, 0))
+            insights_pending = False
+        except asyncio.TimeoutError:
+            logger.warning(f"AI insights missed the {REPORT_INSIGHTS_BUDGET}s budget, shipping a placeholder")
+            ai_insights, insights_pending = None, True
         
-        # Generate PDF
         try:
-            pdf_buffer = generate_pdf_report(analysis, ai_insights)
-            logger.info("PDF buffer created successfully")
+            pdf_bytes = await run_in_threadpool(finish_report, body, ai_insights, insights_pending)
         except Exception as e:
             logger.error(f"PDF generation failed: {str(e)}")
             logger.error(traceback.format_exc())
@@ -44,19 +126,12 @@ async def generate_report(payload: dict):
                 content={"error": f"PDF generation failed: {str(e)}"}
             )
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"financial_health_report_{timestamp}.pdf"
-        
-        logger.info(f"Returning PDF with filename: {filename}")
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        # A report without insights is not cached, so the next request retries the LLM
+        key = None
+        if not insights_pending and ai_insights not in (INSIGHTS_ERROR_MESSAGE, INSIGHTS_UNAVAILABLE_MESSAGE):
+            key = store_report(analysis, ai_insights, pdf_bytes)
+
+        return _pdf_response(pdf_bytes, if_none_match, key)
         
     except Exception as e:
         logger.error(f"Unexpected error in report endpoint: {str(e)}")
@@ -64,4 +139,82 @@ async def generate_report(payload: dict):
         return JSONResponse(
             status_code=500,
             content={"error": f"Internal server error: {str(e)}"}
-        )
\ No newline at end of file
+        )
+
+@router.get("/report/{key}")
+def get_cached_report_pdf(key: str, if_none_match: Optional[str] = Header(None)):
+    """A cached report by the key in a previous response's Content-Location."""
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(status_code=404, detail="Report not found")
+    pdf_bytes = get_report(key)
+    if pdf_bytes is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return _pdf_response(pdf_bytes, if_none_match, key)
+
+@router.post("/report/bulk")
+async def generate_bulk_reports(payload: dict):
+    """
+    Render many reports into one zip archive, across the report worker pool.
+
+    Payload: {"reports": [{"name": ..., "analysis": {...}, "ai_insights": ...}]}.
+    AI insights are not generated here; pass them in to include them.
+    Reports that fail are listed in failed.json inside the archive.
+    """
+    reports = payload.get("reports")
+    if not reports or not isinstance(reports, list):
+        raise HTTPException(status_code=400, detail="reports missing in request")
+
+    entries = []
+    for i, report in enumerate(reports):
+        if not isinstance(report, dict) or not report.get("analysis"):
+            raise HTTPException(status_code=400, detail=f"reports[{i}] has no analysis")
+        entries.append((
+            report.get("name") or f"report_{i + 1}",
+            report["analysis"],
+            report.get("ai_insights"),
+        ))
+
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        result = await run_in_threadpool(render_reports, entries, path)
+    except Exception:
+        os.unlink(path)
+        raise
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"financial_health_reports_{timestamp}.zip",
+        headers={"X-Reports-Failed": str(len(result["failed"]))},
+        background=BackgroundTask(os.unlink, path),
+    )
+
+@router.post("/report/portfolio")
+def generate_portfolio_report(payload: dict):
+    """
+    One PDF for a whole portfolio: an overview table, then each business's
+    report, streamed section by section as it is rendered.
+
+    Payload: {"results": [...]}, the results of /analyze/batch. AI insights
+    are not generated here.
+    """
+    results = payload.get("results")
+    if not results or not isinstance(results, list):
+        raise HTTPException(status_code=400, detail="results missing in request")
+    for i, result in enumerate(results):
+        if not isinstance(result, dict):
+            raise HTTPException(status_code=400, detail=f"results[{i}] is not an object")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"portfolio_health_report_{timestamp}.pdf"
+
+    # A sync generator: Starlette renders each section in the threadpool
+    return StreamingResponse(
+        stream_portfolio_report(results),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
@@ -1,35 +1,169 @@
-from fastapi import APIRouter, UploadFile, File
-from app.services.parser import parse_file
-from app.services.normalizer import normalize_data
-from app.services.pdf_parser import parse_pdf
+import os
+import shutil
+import uuid
+
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.core.config import (
+    UPLOAD_JOB_DB,
+    UPLOAD_JOB_DIR,
+    UPLOAD_JOB_MAX_ATTEMPTS,
+    UPLOAD_JOB_QUEUE_SIZE,
+    UPLOAD_JOB_WORKERS,
+)
+from app.core.jobs import DONE, FAILED, JobQueue, JobQueueFull, JobStore
+from app.services.business_scores import forget_business
+from app.services.ingestion import (
+    SUPPORTED_EXTENSIONS,
+    parse_upload,
+    process_upload_job,
+    store_upload,
+)
+from app.services.pdf_parser import use_serial_extraction
 
 router = APIRouter()
 
+
+def _finish_upload_job(args):
+    try:
+        os.unlink(args["path"])
+    except FileNotFoundError:
+        pass
+    # Months stored by a worker process are not in this process's cached state
+    if args.get("business_id"):
+        forget_business(args["business_id"])
+
+
+# Parsing runs in worker processes so OCR never blocks the event loop;
+# main.py starts and stops the queue with the app.
+upload_jobs = JobQueue(
+    JobStore(UPLOAD_JOB_DB),
+    kind="upload",
+    fn=process_upload_job,
+    workers=UPLOAD_JOB_WORKERS,
+    queue_size=UPLOAD_JOB_QUEUE_SIZE,
+    max_attempts=UPLOAD_JOB_MAX_ATTEMPTS,
+    initializer=use_serial_extraction,
+    on_finished=_finish_upload_job,
+)
+
+
 @router.post("/upload")
-async def upload_financial_file(file: UploadFile = File(...)):
+async def upload_financial_file(
+    file: UploadFile = File(...), chunked: bool = False, business_id: str | None = None
+):
+    if not file.filename.endswith(SUPPORTED_EXTENSIONS):
+        return {"error": "Unsupported file format"}
+
     try:
-        if file.filename.endswith((".xls", ".xlsx", ".csv")):
-            df = parse_file(file)
-            monthly_df, warnings = normalize_data(df)
-        elif file.filename.endswith(".pdf"):
-            file_bytes = await file.read()
-            df, confidence = parse_pdf(file_bytes)
-            print(f"PDF DataFrame columns: {df.columns.tolist()}")  # Debug
-            print(f"PDF DataFrame:\n{df.head()}")  # Debug
-            monthly_df, warnings = normalize_data(df)
-        else:
-            return {"error": "Unsupported file format"}
-        
-        return {
-            "monthly_data": monthly_df.to_dict(orient="records"),
-            "warnings": warnings,
-            "confidence": confidence if file.filename.endswith(".pdf") else 1.0
+        response = await run_in_threadpool(
+            parse_upload, file.filename, file.file, file.size, chunked
+        )
+        # With a business_id the months are also added to its stored history
+        if business_id:
+            response = await run_in_threadpool(store_upload, business_id, response)
+        return response
 
-        }
-    
-    
     except Exception as e:
         return {
             "error": str(e),
             "type": type(e).__name__
-        }
\ No newline at end of file
+        }
+
+
+def _spool_upload(file, path):
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out)
+
+
+@router.post("/upload/jobs", status_code=202)
+async def submit_upload_job(
+    file: UploadFile = File(...), chunked: bool = False, business_id: str | None = None
+):
+    """
+    Queue a file for background parsing. Returns a job id straight away;
+    poll /upload/jobs/{job_id} and fetch /upload/jobs/{job_id}/result.
+    """
+    if not file.filename.endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+
+    if upload_jobs.pending() >= upload_jobs.queue_size:
+        return _queue_full_response(upload_jobs.queue_size)
+
+    os.makedirs(UPLOAD_JOB_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_JOB_DIR, f"{uuid.uuid4().hex}{os.path.splitext(file.filename)[1]}")
+    await run_in_threadpool(_spool_upload, file, path)
+
+    try:
+        job_id = upload_jobs.submit({
+            "filename": file.filename,
+            "path": path,
+            "chunked": chunked,
+            "business_id": business_id
+        })
+    except JobQueueFull as e:
+        os.unlink(path)
+        return _queue_full_response(e.capacity)
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/upload/jobs/{job_id}",
+        "result_url": f"/upload/jobs/{job_id}/result"
+    }
+
+
+def _queue_full_response(capacity):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Upload queue is full ({capacity} jobs waiting), retry later"},
+        headers={"Retry-After": "5"},
+    )
+
+
+# Failed-job error types that are not about the uploaded file
+SERVER_ERROR_TYPES = {
+    "BrokenProcessPool",
+    "MemoryError",
+    "OperationalError",
+    "DatabaseError",
+    "IntegrityError",
+}
+
+
+def _get_job(job_id):
+    job = upload_jobs.store.get(job_id)
+    if job is None or job["kind"] != "upload":
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
+
+
+@router.get("/upload/jobs/{job_id}")
+def upload_job_status(job_id: str):
+    job = _get_job(job_id)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "filename": job["args"]["filename"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "error": job["error"]
+    }
+
+
+@router.get("/upload/jobs/{job_id}/result")
+def upload_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job["status"] == DONE:
+        return job["result"]
+    if job["status"] == FAILED:
+        # Same body a failed synchronous /upload returns, with a status
+        # that says it failed: 500 when the server was at fault, 422 when
+        # the file could not be parsed
+        error = job["error"]
+        status_code = 500 if error.get("type") in SERVER_ERROR_TYPES else 422
+        return JSONResponse(status_code=status_code, content=error)
+
+    raise HTTPException(status_code=409, detail=f"Upload job is {job['status']}")
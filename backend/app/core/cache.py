@@ -0,0 +1,266 @@
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def canonical_hash(obj) -> str:
+    """
+    SHA-256 of a JSON document with sorted keys and no whitespace, so the
+    same payload always hashes the same regardless of key order.
+    """
+    encoded = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory cache bounded by entry count and TTL, evicting the
+    least recently used entry first.
+
+    Entries can carry tags so a group of them (e.g. everything computed for
+    one bank account) can be dropped together.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags=()):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class DiskCache:
+    """
+    Byte values stored one file per key under `directory`, so cached results
+    survive worker restarts and are shared by workers on the same host.
+    Writes go through a temp file and rename, so readers never see a
+    partial entry.
+
+    With `max_bytes`, the least recently used files (by mtime, which reads
+    refresh) are deleted once the directory grows past the limit, down to
+    90% of it so eviction does not run on every write.
+
+    With `ttl`, entries written more than `ttl` seconds ago are treated as
+    missing and deleted. Reads then leave mtime as the write time, so
+    eviction drops the oldest writes first.
+
+    The directory is created by the first write.
+    """
+
+    def __init__(self, directory, suffix="", max_bytes=None, ttl=None):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = self._scan_size() if max_bytes else 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                if self.ttl is not None and time.time() - os.fstat(f.fileno()).st_mtime > self.ttl:
+                    value = None
+                else:
+                    value = f.read()
+        except FileNotFoundError:
+            return None
+
+        if value is None:
+            self.delete(key)
+        elif self.max_bytes and self.ttl is None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass  # evicted by another worker in the meantime
+        return value
+
+    def set(self, key, value: bytes):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        except FileNotFoundError:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        if self.max_bytes:
+            with self._lock:
+                self._size += len(value)
+                if self._size > self.max_bytes:
+                    self._evict()
+
+    def delete(self, key):
+        try:
+            size = os.path.getsize(self.path(key))
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            return
+        if self.max_bytes:
+            with self._lock:
+                self._size = max(self._size - size, 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions
+            }
+
+    def _entries(self):
+        # (mtime, size, path) for every complete entry
+        entries = []
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            return entries  # nothing written yet
+        with it:
+            for entry in it:
+                if entry.name.startswith(".tmp-") or not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Other processes write to the same directory, so re-read the real
+        # contents rather than trusting the running total
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        self._size = total
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key: the first caller starts the
+    coroutine, everyone who arrives while it is in flight awaits the same
+    task and shares its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, coro_fn):
+        # Tasks belong to one event loop, so flights are tracked per loop
+        flight = (asyncio.get_running_loop(), key)
+        task = self._calls.get(flight)
+
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._calls[flight] = task
+
+            def _done(finished, flight=flight):
+                if self._calls.get(flight) is finished:
+                    del self._calls[flight]
+
+            task.add_done_callback(_done)
+
+        # A cancelled waiter must not cancel the call the others share
+        return await asyncio.shield(task)
@@ -4,5 +4,109 @@ import os
 
 load_dotenv()
 
+# Local caches, job spools and the fallback database live under CACHE_DIR,
+# backend/.cache unless set, wherever the server is started from. Their
+# directories are created on first use.
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CACHE_DIR = os.path.abspath(os.getenv("CACHE_DIR", os.path.join(BACKEND_DIR, ".cache")))
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Time-series store; without DATABASE_URL it lives in a local SQLite file
+LOCAL_DATABASE_URL = os.getenv(
+    "LOCAL_DATABASE_URL", f"sqlite:///{os.path.join(CACHE_DIR, 'financials.sqlite3')}"
+)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_INSERT_BATCH_ROWS = int(os.getenv("DB_INSERT_BATCH_ROWS", "5000"))
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+
+# /analyze stage scheduler
+ANALYZE_STAGE_WORKERS = int(os.getenv("ANALYZE_STAGE_WORKERS", "8"))
+ANALYZE_STAGE_TIMEOUT = float(os.getenv("ANALYZE_STAGE_TIMEOUT", "10"))
+
+# /analyze result cache
+ANALYZE_CACHE_SIZE = int(os.getenv("ANALYZE_CACHE_SIZE", "1024"))
+ANALYZE_CACHE_TTL = float(os.getenv("ANALYZE_CACHE_TTL", "300"))
+
+# AI insight cache; set INSIGHTS_CACHE_DIR to keep insights across restarts,
+# up to INSIGHTS_CACHE_MAX_BYTES and for INSIGHTS_CACHE_TTL seconds
+INSIGHTS_CACHE_SIZE = int(os.getenv("INSIGHTS_CACHE_SIZE", "512"))
+INSIGHTS_CACHE_TTL = float(os.getenv("INSIGHTS_CACHE_TTL", "3600"))
+INSIGHTS_CACHE_DIR = os.getenv("INSIGHTS_CACHE_DIR")
+INSIGHTS_CACHE_MAX_BYTES = int(os.getenv("INSIGHTS_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Shared async LLM client
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+
+# Bank API; without BANK_API_URL the sandbox mock adapter is used
+BANK_API_URL = os.getenv("BANK_API_URL")
+BANK_API_KEY = os.getenv("BANK_API_KEY")
+BANK_PAGE_SIZE = int(os.getenv("BANK_PAGE_SIZE", "1000"))
+BANK_TIMEOUT = float(os.getenv("BANK_TIMEOUT", "30"))
+BANK_CONNECT_TIMEOUT = float(os.getenv("BANK_CONNECT_TIMEOUT", "5"))
+BANK_MAX_CONNECTIONS = int(os.getenv("BANK_MAX_CONNECTIONS", "20"))
+BANK_MAX_CONCURRENCY = int(os.getenv("BANK_MAX_CONCURRENCY", "8"))
+BANK_MAX_RETRIES = int(os.getenv("BANK_MAX_RETRIES", "3"))
+BANK_RETRY_BACKOFF = float(os.getenv("BANK_RETRY_BACKOFF", "0.5"))
+# Stored rollups younger than this are used without asking the bank
+BANK_SYNC_INTERVAL = float(os.getenv("BANK_SYNC_INTERVAL", "60"))
+
+# Per-paragraph translation cache, persisted under TRANSLATION_CACHE_DIR up to
+# TRANSLATION_CACHE_MAX_BYTES; empty TRANSLATION_CACHE_DIR disables the disk tier
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "10000"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+TRANSLATION_CACHE_DIR = os.getenv("TRANSLATION_CACHE_DIR", os.path.join(CACHE_DIR, "translations"))
+TRANSLATION_CACHE_MAX_BYTES = int(os.getenv("TRANSLATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Chunked CSV ingestion for /upload
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "200000"))
+CSV_CHUNKED_THRESHOLD_BYTES = int(os.getenv("CSV_CHUNKED_THRESHOLD_BYTES", str(50 * 1024 * 1024)))
+
+# Per-page PDF extraction pool
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+# PDFs with at least this many pages are indexed and only statement pages extracted
+PDF_INDEX_MIN_PAGES = int(os.getenv("PDF_INDEX_MIN_PAGES", "5"))
+
+# Bulk report rendering pool; reports go to workers in chunks
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(os.cpu_count() or 1)))
+REPORT_CHUNK_SIZE = int(os.getenv("REPORT_CHUNK_SIZE", "16"))
+
+# Rendered /report PDFs, keyed by analysis + insights; empty REPORT_CACHE_DIR disables it
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", os.path.join(CACHE_DIR, "reports"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+# Analyses whose last rendered report is remembered, least recently used dropped first
+REPORT_POINTER_MAX_ENTRIES = int(os.getenv("REPORT_POINTER_MAX_ENTRIES", "20000"))
+# Seconds /report waits for AI insights before shipping a placeholder section
+REPORT_INSIGHTS_BUDGET = float(os.getenv("REPORT_INSIGHTS_BUDGET", "8"))
+
+# OCR text per rendered page, shared by every upload; empty OCR_CACHE_DIR disables it
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(CACHE_DIR, "ocr"))
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Background /upload jobs; the job table and spooled uploads are local to the host
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_QUEUE_SIZE = int(os.getenv("UPLOAD_JOB_QUEUE_SIZE", "32"))
+UPLOAD_JOB_MAX_ATTEMPTS = int(os.getenv("UPLOAD_JOB_MAX_ATTEMPTS", "3"))
+UPLOAD_JOB_DB = os.getenv("UPLOAD_JOB_DB", os.path.join(CACHE_DIR, "upload_jobs.sqlite3"))
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.join(CACHE_DIR, "upload_jobs"))
+
+# Per-business incremental aggregates behind /businesses/{id}/score; the TTL
+# bounds how long writes from other processes go unseen
+BUSINESS_STATE_CACHE_SIZE = int(os.getenv("BUSINESS_STATE_CACHE_SIZE", "10000"))
+BUSINESS_STATE_CACHE_TTL = float(os.getenv("BUSINESS_STATE_CACHE_TTL", "300"))
+
+# Monte Carlo cash-runway forecast: simulated paths and months ahead
+FORECAST_PATHS = int(os.getenv("FORECAST_PATHS", "10000"))
+FORECAST_HORIZON_MONTHS = int(os.getenv("FORECAST_HORIZON_MONTHS", "24"))
+
+# Memo of lower-cased transaction description -> (account, confidence)
+CATEGORY_MEMO_SIZE = int(os.getenv("CATEGORY_MEMO_SIZE", "100000"))
@@ -0,0 +1,81 @@
+import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    LOCAL_DATABASE_URL,
+)
+from app.models.finance import Base
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def database_url():
+    return DATABASE_URL or LOCAL_DATABASE_URL
+
+
+def _sqlite_wal(dbapi_connection, _):
+    # Readers do not block the writer, and a commit skips the fsync of the
+    # rollback journal
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _create_engine(url):
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # One shared connection, or every checkout sees an empty database
+            return create_engine(
+                url,
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+            )
+
+        path = url.split("///", 1)[-1]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        engine = create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            connect_args={"check_same_thread": False},
+        )
+        event.listen(engine, "connect", _sqlite_wal)
+        return engine
+
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+
+def get_engine(url=None):
+    """
+    Pooled engine for `url` (default DATABASE_URL, or a local SQLite file),
+    created with its tables on first use. Engines are per process: pooled
+    connections must not be shared with forked workers.
+    """
+    url = url or database_url()
+    key = (os.getpid(), url)
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _create_engine(url)
+                Base.metadata.create_all(engine)
+                _engines[key] = engine
+    return engine
@@ -0,0 +1,277 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    def __init__(self, capacity):
+        super().__init__(f"Job queue is full ({capacity} jobs waiting)")
+        self.capacity = capacity
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Job table in a local SQLite file: arguments, status, attempts, result.
+
+    Every job records the pid of the server process that owns it, so a
+    process starting up can take over the unfinished jobs of one that died.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # On first use, so importing the app creates no files
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                args TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+        return conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn.execute(sql, params)
+
+    def create(self, kind, args):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, args, owner, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(args), os.getpid(), now, now),
+        )
+        return job_id
+
+    def mark_running(self, job_id):
+        self._execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (RUNNING, time.time(), job_id),
+        )
+
+    def requeue(self, job_id):
+        self._execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+            (QUEUED, time.time(), job_id),
+        )
+
+    def finish(self, job_id, result):
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+            (DONE, json.dumps(result, default=str), time.time(), job_id),
+        )
+
+    def fail(self, job_id, error):
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+            (FAILED, json.dumps(error), time.time(), job_id),
+        )
+
+    def get(self, job_id):
+        row = self._execute(
+            "SELECT id, kind, status, args, result, error, attempts, created_at, updated_at "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "args": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] is not None else None,
+            "error": json.loads(row[5]) if row[5] is not None else None,
+            "attempts": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def adopt_orphans(self, kind):
+        """
+        Take over unfinished jobs whose owning process is gone; returns
+        their ids, oldest first.
+        """
+        rows = self._execute(
+            "SELECT id, owner FROM jobs WHERE kind = ? AND status IN (?, ?) ORDER BY created_at",
+            (kind, QUEUED, RUNNING),
+        ).fetchall()
+
+        adopted = []
+        me = os.getpid()
+        for job_id, owner in rows:
+            if owner == me or _pid_alive(owner):
+                continue
+            # Only one starting process wins each job
+            claimed = self._execute(
+                "UPDATE jobs SET owner = ?, status = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (me, QUEUED, time.time(), job_id, owner),
+            ).rowcount
+            if claimed:
+                adopted.append(job_id)
+        return adopted
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class JobQueue:
+    """
+    Runs `fn(**args)` for submitted jobs on a bounded process pool.
+
+    At most `queue_size` jobs wait at a time; submit() raises JobQueueFull
+    beyond that so callers can push back on clients. A job whose worker
+    process dies is retried on a fresh pool, up to `max_attempts` runs.
+    `on_finished(args)` is called once a job is done or has failed for good.
+    """
+
+    def __init__(self, store, kind, fn, workers=2, queue_size=32, max_attempts=3,
+                 initializer=None, on_finished=None):
+        self.store = store
+        self.kind = kind
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.initializer = initializer
+        self.on_finished = on_finished
+        self._pool = None
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._pool = self._new_pool()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+        # Recovered jobs are queued regardless of queue_size
+        for job_id in self.store.adopt_orphans(self.kind):
+            logger.info(f"Resuming {self.kind} job {job_id}")
+            self._queue.put_nowait(job_id)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def submit(self, args):
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        if self._queue.qsize() >= self.queue_size:
+            raise JobQueueFull(self.queue_size)
+
+        job_id = self.store.create(self.kind, args)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception(f"Unexpected error running {self.kind} job {job_id}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return
+
+        self.store.mark_running(job_id)
+        pool = self._pool
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(pool, _call, self.fn, job["args"])
+
+        except BrokenProcessPool:
+            # Every job in flight on the dead pool lands here; the first one
+            # replaces it
+            if self._pool is pool:
+                logger.warning(f"{self.kind} worker process died; restarting the pool")
+                pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+
+            if job["attempts"] + 1 < self.max_attempts:
+                self.store.requeue(job_id)
+                self._queue.put_nowait(job_id)
+                return
+            self.store.fail(job_id, {
+                "error": "Worker process died while processing the job",
+                "type": "BrokenProcessPool"
+            })
+
+        except Exception as e:
+            self.store.fail(job_id, {"error": str(e), "type": type(e).__name__})
+
+        else:
+            self.store.finish(job_id, result)
+
+        if self.on_finished is not None:
+            self.on_finished(job["args"])
+
+
+def _call(fn, args):
+    return fn(**args)
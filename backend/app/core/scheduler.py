@@ -0,0 +1,124 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimeoutError(Exception):
+    def __init__(self, stage, budget):
+        super().__init__(f"Stage '{stage}' exceeded its {budget}s budget")
+        self.stage = stage
+        self.budget = budget
+
+
+class Stage:
+    """
+    One node of the stage graph.
+
+    fn is called with the results of `deps`, in order, as positional args.
+    The time budget counts from when the stage starts running, not while it
+    waits for an executor thread. An optional stage that misses its budget,
+    or raises TimeoutError to give up on one it enforces itself (freeing
+    its thread), resolves to fallback(*deps results), or None without a
+    fallback, instead of failing the whole run.
+    """
+
+    def __init__(self, name, fn, deps=(), timeout=None, optional=False, fallback=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.optional = optional
+        self.fallback = fallback
+
+
+def _timed_call(fn, args, started, name):
+    started[name] = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started[name]
+
+
+def run_stages(stages, executor, default_timeout=None):
+    """
+    Run a dependency graph of stages on `executor`, starting each stage as
+    soon as everything it depends on has finished.
+
+    Returns (results, timings) keyed by stage name; timings are in ms, or
+    "timeout" for an optional stage that fell back. Exceptions raised by a
+    stage propagate unchanged, and stages not started yet are cancelled.
+    """
+    pending = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in pending:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    results = {}
+    timings = {}
+    running = {}
+    # When each stage's worker picked it up, written by the worker thread
+    started = {}
+
+    try:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    args = [results[dep] for dep in stage.deps]
+                    future = executor.submit(_timed_call, stage.fn, args, started, name)
+                    running[future] = (stage, args)
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Stage graph has a cycle: {sorted(pending)}")
+
+            # A stage still queued cannot time out before a full budget from
+            # now; wake then to look again
+            now = time.perf_counter()
+            deadlines = []
+            for stage, _ in running.values():
+                budget = stage.timeout or default_timeout
+                if budget:
+                    start = started.get(stage.name)
+                    deadlines.append(budget if start is None else start + budget - now)
+            wait_for = max(min(deadlines), 0) if deadlines else None
+
+            done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, args = running.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except TimeoutError:
+                    if not stage.optional:
+                        raise
+                    logger.warning(f"Stage '{stage.name}' gave up on its budget")
+                    results[stage.name] = stage.fallback(*args) if stage.fallback else None
+                    timings[stage.name] = "timeout"
+                    continue
+                results[stage.name] = result
+                timings[stage.name] = round(elapsed * 1000, 2)
+
+            now = time.perf_counter()
+            for future, (stage, args) in list(running.items()):
+                budget = stage.timeout or default_timeout
+                start = started.get(stage.name)
+                if budget is None or start is None or now - start < budget:
+                    continue
+
+                # The worker thread cannot be interrupted; it runs on and its
+                # result is dropped.
+                del running[future]
+                logger.warning(f"Stage '{stage.name}' timed out after {budget}s")
+
+                if not stage.optional:
+                    raise StageTimeoutError(stage.name, budget)
+
+                results[stage.name] = stage.fallback(*args) if stage.fallback else None
+                timings[stage.name] = "timeout"
+    finally:
+        # Queued stages of an abandoned run never start
+        for future in running:
+            future.cancel()
+
+    return results, timings
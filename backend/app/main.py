@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.upload import router as upload_router 
+from app.api.upload import router as upload_router, upload_jobs
 from app.api.analyze import router as analyze_router 
 from app.api.insights import router as insights_router
 from app.api.report import router as report_router
+from app.api.portfolio import router as portfolio_router
+from app.api.businesses import router as businesses_router
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await upload_jobs.start()
+    yield
+    await upload_jobs.stop()
 
 
-app = FastAPI(title="Financial Health AI")
+app = FastAPI(title="Financial Health AI", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +30,8 @@ app.include_router(upload_router)
 app.include_router(analyze_router)
 app.include_router(insights_router)
 app.include_router(report_router)
+app.include_router(portfolio_router)
+app.include_router(businesses_router)
 
 
 @app.get("/")
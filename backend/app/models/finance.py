@@ -1,12 +1,17 @@
-from sqlalchemy import Column, Integer, Float, String, Date
+from sqlalchemy import Column, Integer, Float, String, Date, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 class FinancialRecord(Base):
     __tablename__ = "financial_records"
+    __table_args__ = (
+        # One row per business and month; history reads are range scans
+        Index("ix_financial_records_business_date", "business_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
+    business_id = Column(String, nullable=False)
     date = Column(Date)
     revenue = Column(Float)
     expense_category = Column(String)
@@ -17,3 +22,28 @@ class FinancialRecord(Base):
     loan_emi = Column(Float)
     gst_paid = Column(Float)
     gst_due = Column(Float)
+
+
+class BankSyncState(Base):
+    __tablename__ = "bank_sync_state"
+
+    account_id = Column(String, primary_key=True)
+    # Where the next sync resumes; null when the adapter only gives snapshots
+    cursor = Column(String)
+    # Bumped by every sync, so two concurrent syncs cannot both apply
+    version = Column(Integer, nullable=False)
+    # Unix time of the last sync; null makes the next read sync
+    synced_at = Column(Float)
+    # Over every transaction, including undated ones
+    inflows = Column(Float, nullable=False)
+    outflows = Column(Float, nullable=False)
+    transaction_count = Column(Integer, nullable=False)
+
+
+class BankMonthlyRollup(Base):
+    __tablename__ = "bank_monthly_rollups"
+
+    account_id = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True)
+    credit = Column(Float, nullable=False)
+    debit = Column(Float, nullable=False)
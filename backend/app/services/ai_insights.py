@@ -1,14 +1,36 @@
-from app.core.config import GROQ_API_KEY
-from groq import Groq
+from app.core.config import (
+    INSIGHTS_CACHE_DIR,
+    INSIGHTS_CACHE_MAX_BYTES,
+    INSIGHTS_CACHE_SIZE,
+    INSIGHTS_CACHE_TTL,
+)
+from app.core.cache import DiskCache, LRUCache, SingleFlight, canonical_hash
+from app.services.llm_client import chat_completion, stream_chat_completion
 import logging
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY)
-logger.info("Groq client initialized successfully")
+INSIGHTS_MODEL = "llama-3.1-8b-instant"
+INSIGHTS_TEMPERATURE = 0.4
+INSIGHTS_MAX_TOKENS = 1024
+INSIGHTS_ERROR_MESSAGE = "Error generating insights. Please try again later."
+
+# /insights and /report ask for the same analysis, so completions are cached
+# by prompt + model parameters and identical in-flight requests share one call
+insights_cache = LRUCache(maxsize=INSIGHTS_CACHE_SIZE, ttl=INSIGHTS_CACHE_TTL)
+insights_disk_cache = (
+    DiskCache(
+        INSIGHTS_CACHE_DIR,
+        suffix=".txt",
+        max_bytes=INSIGHTS_CACHE_MAX_BYTES,
+        ttl=INSIGHTS_CACHE_TTL or None,
+    )
+    if INSIGHTS_CACHE_DIR
+    else None
+)
+_inflight_insights = SingleFlight()
 
 # Define helper functions OUTSIDE the main function
 def format_working_capital(wc):
@@ -77,9 +99,7 @@ def format_bank_summary(bank):
    - Transaction Count: {bank.get('transaction_count', 0)}
     """
 
-def generate_ai_insights(analysis):
-    logger.info(f"Starting AI insights generation for analysis with score: {analysis['score']}")
-    
+def build_insights_prompt(analysis):
     # Get formatted sections
     wc_section = format_working_capital(analysis.get('working_capital', {}))
     bk_section = format_bookkeeping(analysis.get('bookkeeping', {}))
@@ -130,24 +150,114 @@ TASKS:
 5. Mention any compliance risks (GST, etc.) if present.
 6. Keep tone professional, friendly, and concise (max 400 words).
 """
-    
+    return prompt
+
+def insights_cache_key(prompt):
+    return canonical_hash({
+        "prompt": prompt,
+        "model": INSIGHTS_MODEL,
+        "temperature": INSIGHTS_TEMPERATURE,
+        "max_tokens": INSIGHTS_MAX_TOKENS,
+    })
+
+def get_cached_insights(key):
+    insights = insights_cache.get(key)
+    if insights is not None:
+        return insights
+
+    if insights_disk_cache is not None:
+        stored = insights_disk_cache.get(key)
+        if stored is not None:
+            insights = stored.decode("utf-8")
+            insights_cache.set(key, insights)
+            return insights
+
+    return None
+
+def store_insights(key, insights):
+    insights_cache.set(key, insights)
+    if insights_disk_cache is not None:
+        try:
+            insights_disk_cache.set(key, insights.encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not write insights to disk cache: {str(e)}")
+
+async def request_insights(key, prompt):
+    # A caller that just missed the previous flight may find it cached now
+    cached = get_cached_insights(key)
+    if cached is not None:
+        return cached
+
     logger.info("Sending request to Llama 3.1 8B Instant model via Groq API")
-    
+
+    insights = await chat_completion(
+        prompt,
+        model=INSIGHTS_MODEL,
+        temperature=INSIGHTS_TEMPERATURE,
+        max_tokens=INSIGHTS_MAX_TOKENS
+    )
+
+    logger.info("Successfully received response from Groq API")
+    logger.info(f"Generated insights length: {len(insights)} characters")
+
+    store_insights(key, insights)
+    return insights
+
+async def generate_ai_insights(analysis):
+    logger.info(f"Starting AI insights generation for analysis with score: {analysis['score']}")
+
+    prompt = build_insights_prompt(analysis)
+    key = insights_cache_key(prompt)
+
+    cached = get_cached_insights(key)
+    if cached is not None:
+        logger.info("Returning cached AI insights")
+        return cached
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            max_tokens=1024
-        )
-        
-        logger.info("Successfully received response from Groq API")
-        
-        insights = response.choices[0].message.content
-        logger.info(f"Generated insights length: {len(insights)} characters")
-        
-        return insights
-        
+        return await _inflight_insights.do(key, lambda: request_insights(key, prompt))
+
     except Exception as e:
         logger.error(f"Error in generating AI insights: {str(e)}", exc_info=True)
-        return f"Error generating insights. Please try again later."
\ No newline at end of file
+        return INSIGHTS_ERROR_MESSAGE
+
+async def stream_ai_insights(analysis):
+    """
+    Yield insight text as the model produces it. A cached completion is
+    yielded in one piece; a fresh one is cached once the stream completes.
+
+    A stream that fails before any text yields INSIGHTS_ERROR_MESSAGE; one
+    that fails partway re-raises, so the caller can tell it was cut short.
+    """
+    logger.info(f"Starting streamed AI insights for analysis with score: {analysis['score']}")
+
+    prompt = build_insights_prompt(analysis)
+    key = insights_cache_key(prompt)
+
+    cached = get_cached_insights(key)
+    if cached is not None:
+        logger.info("Returning cached AI insights")
+        yield cached
+        return
+
+    parts = []
+    try:
+        async for delta in stream_chat_completion(
+            prompt,
+            model=INSIGHTS_MODEL,
+            temperature=INSIGHTS_TEMPERATURE,
+            max_tokens=INSIGHTS_MAX_TOKENS
+        ):
+            parts.append(delta)
+            yield delta
+
+    except Exception as e:
+        logger.error(f"Error in streaming AI insights: {str(e)}", exc_info=True)
+        if parts:
+            raise
+        yield INSIGHTS_ERROR_MESSAGE
+        return
+
+    insights = "".join(parts)
+    logger.info(f"Streamed insights length: {len(insights)} characters")
+    store_insights(key, insights)
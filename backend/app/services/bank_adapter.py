@@ -1,30 +1,327 @@
+from abc import ABC, abstractmethod
+import asyncio
+import contextlib
 import datetime
+import logging
+import random
+import threading
+import weakref
+from urllib.parse import quote
+
+import httpx
+
+from app.core.cache import SingleFlight
+from app.core.config import (
+    BANK_API_KEY,
+    BANK_API_URL,
+    BANK_CONNECT_TIMEOUT,
+    BANK_MAX_CONCURRENCY,
+    BANK_MAX_CONNECTIONS,
+    BANK_MAX_RETRIES,
+    BANK_PAGE_SIZE,
+    BANK_RETRY_BACKOFF,
+    BANK_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BankAPIError(Exception):
+    """The bank API rejected a request, or kept failing after retries."""
+
+
+class BankAdapter(ABC):
+    """
+    Source of bank transactions. Subclasses implement pages(), an async
+    generator of transaction lists for one account, in the bank's order;
+    streaming, whole-account and multi-account fetches build on it.
+    """
+
+    @abstractmethod
+    def pages(self, account_id):
+        """Async generator of transaction lists for `account_id`."""
+
+    async def stream_transactions(self, account_id):
+        # Closing this stream early closes pages() too, which drops any
+        # request it has in flight
+        async with contextlib.aclosing(self.pages(account_id)) as pages:
+            async for page in pages:
+                for transaction in page:
+                    yield transaction
+
+    async def fetch_transactions(self, account_id):
+        transactions = []
+        async for page in self.pages(account_id):
+            transactions.extend(page)
+        return transactions
+
+    async def fetch_accounts(self, account_ids):
+        """{account_id: transactions} for several accounts, fetched concurrently."""
+        results = await asyncio.gather(
+            *(self.fetch_transactions(account_id) for account_id in account_ids)
+        )
+        return dict(zip(account_ids, results))
+
+    async def sync(self, account_id, cursor=None):
+        """
+        (transactions, cursor). Given the cursor of an earlier sync, only
+        the transactions added since. An adapter without delta support
+        returns every transaction and a None cursor: a full snapshot.
+        """
+        return await self.fetch_transactions(account_id), None
+
+
+class MockBankAdapter(BankAdapter):
+    """
+    Mock bank API adapter (sandbox-style), used when BANK_API_URL is not set
+    """
+
+    async def pages(self, account_id):
+        today = datetime.date.today()
+
+        yield [
+            {
+                "date": today.isoformat(),
+                "amount": 150000,
+                "type": "credit",
+                "description": "Customer payment"
+            },
+            {
+                "date": today.isoformat(),
+                "amount": 45000,
+                "type": "debit",
+                "description": "Office rent"
+            },
+            {
+                "date": today.isoformat(),
+                "amount": 18000,
+                "type": "debit",
+                "description": "Electricity bill"
+            }
+        ]
+
+
+class _HttpState:
+    def __init__(self, base_url, api_key):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=httpx.Timeout(BANK_TIMEOUT, connect=BANK_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=BANK_MAX_CONNECTIONS,
+                max_keepalive_connections=BANK_MAX_CONNECTIONS,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(BANK_MAX_CONCURRENCY)
+
+
+class HttpBankAdapter(BankAdapter):
+    """
+    Bank API with cursor pagination:
+
+        GET {base_url}/accounts/{account_id}/transactions?limit=N[&cursor=C]
+        -> {"transactions": [...], "next_cursor": "...", "has_more": bool}
+
+    next_cursor resumes after the page, also on the last one, so a later
+    sync fetches only what was added since. A bank that returns a null
+    next_cursor at the end (and no has_more) is synced by full snapshots.
+
+    Requests share one pooled client per event loop and at most
+    BANK_MAX_CONCURRENCY are in flight. While a page is being consumed the
+    next one is already being fetched.
+    """
+
+    def __init__(self, base_url, api_key=None, page_size=BANK_PAGE_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.page_size = page_size
+        # httpx connections and asyncio primitives cannot be shared across loops
+        self._loop_state = weakref.WeakKeyDictionary()
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = _HttpState(self.base_url, self.api_key)
+            self._loop_state[loop] = state
+        return state
+
+    async def _get_page(self, state, account_id, cursor):
+        path = f"/accounts/{quote(account_id, safe='')}/transactions"
+        params = {"limit": self.page_size}
+        if cursor:
+            params["cursor"] = cursor
+
+        for attempt in range(BANK_MAX_RETRIES + 1):
+            try:
+                async with state.semaphore:
+                    response = await state.client.get(path, params=params)
+                if response.status_code not in RETRYABLE_STATUSES:
+                    break
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = type(e).__name__
+
+            if attempt == BANK_MAX_RETRIES:
+                raise BankAPIError(f"Fetching transactions for {account_id} failed: {error}")
+            delay = _backoff(attempt)
+            logger.warning(
+                f"Bank API call failed ({error}), retrying in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{BANK_MAX_RETRIES})"
+            )
+            await asyncio.sleep(delay)
+
+        if response.is_error:
+            raise BankAPIError(
+                f"Fetching transactions for {account_id} failed: "
+                f"HTTP {response.status_code} {response.text[:200]}"
+            )
+
+        body = response.json()
+        next_cursor = body.get("next_cursor")
+        has_more = body.get("has_more", next_cursor is not None)
+        return body.get("transactions") or [], next_cursor, has_more
+
+    async def _cursor_pages(self, account_id, cursor=None):
+        # (transactions, cursor to resume after them) for each page
+        state = self._state()
+        pending = asyncio.ensure_future(self._get_page(state, account_id, cursor))
+        try:
+            while pending is not None:
+                transactions, cursor, has_more = await pending
+                pending = None
+                if has_more and cursor:
+                    # Request the next page before handing this one over
+                    pending = asyncio.ensure_future(self._get_page(state, account_id, cursor))
+                yield transactions, cursor
+        finally:
+            # The consumer stopped early: drop the prefetch, and retrieve its
+            # error if it already failed so it is not logged as unhandled
+            if pending is not None and not pending.cancel():
+                pending.exception()
+
+    async def pages(self, account_id):
+        async with contextlib.aclosing(self._cursor_pages(account_id)) as pages:
+            async for transactions, _ in pages:
+                if transactions:
+                    yield transactions
+
+    async def sync(self, account_id, cursor=None):
+        transactions, resume = [], cursor
+        async for page, next_cursor in self._cursor_pages(account_id, cursor):
+            transactions.extend(page)
+            resume = next_cursor
+        if cursor is not None and resume is None:
+            # The bank stopped handing out cursors: only a full snapshot is safe
+            return await self.sync(account_id)
+        return transactions, resume
+
+
+def _backoff(attempt):
+    # Exponential backoff with full jitter
+    return random.uniform(0, BANK_RETRY_BACKOFF * (2 ** attempt))
+
+
+_adapter = HttpBankAdapter(BANK_API_URL, BANK_API_KEY) if BANK_API_URL else MockBankAdapter()
+
+
+def get_bank_adapter() -> BankAdapter:
+    return _adapter
+
+
+def set_bank_adapter(adapter: BankAdapter):
+    """Swap the adapter every fetch goes through (another bank, a test double)."""
+    global _adapter
+    _adapter = adapter
+
+
+# Sync callers (the /analyze stage threads) share one background event loop,
+# so pooled connections are reused across requests.
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _submit(coro):
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever, name="bank-adapter", daemon=True
+            ).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop)
+
+
+def _run(coro):
+    return _submit(coro).result()
+
 
 def fetch_bank_transactions(account_id: str):
+    """All of an account's transactions, through the configured adapter."""
+    return _run(get_bank_adapter().fetch_transactions(account_id))
+
+
+# Requests syncing the same account from the same cursor share one fetch
+_inflight_syncs = SingleFlight()
+
+
+async def _sync_accounts(adapter, cursors):
+    async def sync(account_id, cursor):
+        return await _inflight_syncs.do(
+            (account_id, cursor), lambda: adapter.sync(account_id, cursor)
+        )
+
+    results = await asyncio.gather(
+        *(sync(account_id, cursor) for account_id, cursor in cursors.items())
+    )
+    return dict(zip(cursors, results))
+
+
+async def _sync_and_store(adapter, cursors, store):
+    results = await _sync_accounts(adapter, cursors)
+    # Off the event loop, so other syncs keep going while it writes
+    return await asyncio.get_running_loop().run_in_executor(None, store, results)
+
+
+def _log_late_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Bank sync failed after its caller stopped waiting: {future.exception()}")
+
+
+def sync_bank_accounts(cursors, store=None, timeout=None):
     """
-    Mock bank API adapter (sandbox-style)
-    Replace with real bank API later (RazorpayX, Setu, Plaid, etc.)
-    """
-
-    today = datetime.date.today()
-
-    return [
-        {
-            "date": today.isoformat(),
-            "amount": 150000,
-            "type": "credit",
-            "description": "Customer payment"
-        },
-        {
-            "date": today.isoformat(),
-            "amount": 45000,
-            "type": "debit",
-            "description": "Office rent"
-        },
-        {
-            "date": today.isoformat(),
-            "amount": 18000,
-            "type": "debit",
-            "description": "Electricity bill"
-        }
-    ]
+    {account_id: (transactions, cursor)} for {account_id: cursor}, fetched
+    concurrently; see BankAdapter.sync.
+
+    With `store`, returns store(results) instead, called on a background
+    thread. After `timeout` seconds raises TimeoutError without waiting
+    any longer: the fetch runs on, and store() is still called when it
+    finishes, so the calling thread is freed without losing the sync.
+    """
+    if store is None:
+        return _run(_sync_accounts(get_bank_adapter(), cursors))
+
+    future = _submit(_sync_and_store(get_bank_adapter(), cursors, store))
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.add_done_callback(_log_late_failure)
+        raise
+
+
+_change_listeners = []
+
+def on_transactions_changed(callback):
+    """
+    Register callback(account_id), called whenever an account's
+    transactions change (new sync, webhook, manual refresh).
+    """
+    _change_listeners.append(callback)
+
+
+def mark_transactions_changed(account_id: str):
+    for callback in _change_listeners:
+        callback(account_id)
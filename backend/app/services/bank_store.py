@@ -0,0 +1,215 @@
+import logging
+import time
+
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import BANK_SYNC_INTERVAL
+from app.core.database import get_engine
+from app.models.finance import BankMonthlyRollup, BankSyncState
+from app.services.bank_adapter import (
+    BankAPIError,
+    on_transactions_changed,
+    sync_bank_accounts,
+)
+from app.services.cashflow_enrichment import monthly_bank_totals
+
+logger = logging.getLogger(__name__)
+
+_state = BankSyncState.__table__
+_rollups = BankMonthlyRollup.__table__
+
+
+class _SyncConflict(Exception):
+    """Another sync of the account was applied first."""
+
+
+_rollup_listeners = []
+
+
+def on_rollups_changed(callback):
+    """
+    Register callback(account_id), called after a sync changed the
+    account's stored rollups. Unlike on_transactions_changed listeners,
+    these are not asked to sync the account again.
+    """
+    _rollup_listeners.append(callback)
+
+
+def _summarize(transactions):
+    # The sums bank_summary used to take over the raw transactions
+    inflows = sum(t["amount"] for t in transactions if t.get("type") == "credit")
+    outflows = sum(t["amount"] for t in transactions if t.get("type") == "debit")
+    if not transactions:
+        return [], inflows, outflows
+
+    monthly = monthly_bank_totals(pd.DataFrame(transactions))
+    rows = [
+        {"month": month.start_time.date(), "credit": float(credit), "debit": float(debit)}
+        for month, credit, debit in zip(monthly.index, monthly["credit"], monthly["debit"])
+    ]
+    return rows, inflows, outflows
+
+
+def _apply_sync(conn, account_id, previous, transactions, cursor, now):
+    # Returns whether the stored rollups changed
+    rows, inflows, outflows = _summarize(transactions)
+    # Fetched without a cursor, or the adapter gave none back: the
+    # transactions are the whole account, not what was added since
+    snapshot = previous is None or previous["cursor"] is None or cursor is None
+    values = {"cursor": cursor, "synced_at": now}
+
+    if previous is None:
+        try:
+            conn.execute(_state.insert().values(
+                account_id=account_id,
+                version=1,
+                inflows=inflows,
+                outflows=outflows,
+                transaction_count=len(transactions),
+                **values,
+            ))
+        except IntegrityError:
+            raise _SyncConflict(account_id)
+    else:
+        if snapshot:
+            values.update(inflows=inflows, outflows=outflows, transaction_count=len(transactions))
+        else:
+            values.update(
+                inflows=_state.c.inflows + inflows,
+                outflows=_state.c.outflows + outflows,
+                transaction_count=_state.c.transaction_count + len(transactions),
+            )
+        result = conn.execute(
+            _state.update()
+            .where(_state.c.account_id == account_id, _state.c.version == previous["version"])
+            .values(version=previous["version"] + 1, **values)
+        )
+        if result.rowcount == 0:
+            raise _SyncConflict(account_id)
+
+    if snapshot:
+        conn.execute(_rollups.delete().where(_rollups.c.account_id == account_id))
+        if rows:
+            conn.execute(_rollups.insert(), [{"account_id": account_id, **row} for row in rows])
+        # A first sync has nothing to replace; a later snapshot may differ
+        return bool(transactions) or previous is not None
+
+    # A delta touches a few recent months: add to them, or start them
+    for row in rows:
+        result = conn.execute(
+            _rollups.update()
+            .where(_rollups.c.account_id == account_id, _rollups.c.month == row["month"])
+            .values(
+                credit=_rollups.c.credit + row["credit"],
+                debit=_rollups.c.debit + row["debit"],
+            )
+        )
+        if result.rowcount == 0:
+            conn.execute(_rollups.insert().values(account_id=account_id, **row))
+    return bool(transactions)
+
+
+def _load_states(conn, account_ids):
+    result = conn.execute(select(_state).where(_state.c.account_id.in_(account_ids)))
+    return {row.account_id: row._asdict() for row in result}
+
+
+def sync_accounts(account_ids, engine=None, max_age=BANK_SYNC_INTERVAL, timeout=None):
+    """
+    Bring the stored rollups of `account_ids` up to date. Accounts never
+    synced, last synced more than `max_age` seconds ago, or marked changed
+    are synced concurrently, each fetching only what the bank added since
+    its cursor. When the bank is unreachable, accounts synced before keep
+    their stored rollups.
+
+    Raises TimeoutError when the sync takes longer than `timeout` seconds;
+    it finishes in the background and stores its rollups then.
+    """
+    engine = engine or get_engine()
+    with engine.connect() as conn:
+        states = _load_states(conn, account_ids)
+
+    now = time.time()
+    due = {
+        account_id: states[account_id]["cursor"] if account_id in states else None
+        for account_id in account_ids
+        if account_id not in states
+        or states[account_id]["synced_at"] is None
+        or now - states[account_id]["synced_at"] >= max_age
+    }
+    if not due:
+        return
+
+    def store(results):
+        for account_id, (transactions, cursor) in results.items():
+            try:
+                with engine.begin() as conn:
+                    changed = _apply_sync(conn, account_id, states.get(account_id), transactions, cursor, now)
+            except _SyncConflict:
+                # A concurrent request already applied this sync
+                continue
+            if changed:
+                for callback in _rollup_listeners:
+                    callback(account_id)
+
+    try:
+        sync_bank_accounts(due, store, timeout)
+    except BankAPIError as e:
+        if any(account_id not in states for account_id in due):
+            raise
+        logger.warning(f"Bank sync failed, using stored rollups: {e}")
+
+
+def bank_rollups(account_ids, engine=None):
+    """
+    Stored bank data for `account_ids` together: "monthly", credits and
+    debits per month in the form monthly_bank_totals gives (None when the
+    accounts have no transactions), and the bank_summary totals.
+    """
+    engine = engine or get_engine()
+    query = (
+        select(_rollups.c.month, func.sum(_rollups.c.credit), func.sum(_rollups.c.debit))
+        .where(_rollups.c.account_id.in_(account_ids))
+        .group_by(_rollups.c.month)
+        .order_by(_rollups.c.month)
+    )
+    with engine.connect() as conn:
+        states = _load_states(conn, account_ids)
+        months = conn.execute(query).fetchall()
+
+    transaction_count = sum(state["transaction_count"] for state in states.values())
+    monthly = None
+    if transaction_count:
+        monthly = pd.DataFrame(
+            [(credit, debit) for _, credit, debit in months],
+            index=pd.PeriodIndex([month for month, _, _ in months], freq="M"),
+            columns=["credit", "debit"],
+            dtype=float,
+        )
+
+    return {
+        "monthly": monthly,
+        "inflows": sum(state["inflows"] for state in states.values()),
+        "outflows": sum(state["outflows"] for state in states.values()),
+        "transaction_count": transaction_count,
+    }
+
+
+def synced_bank_rollups(account_ids, engine=None, timeout=None):
+    """sync_accounts, then bank_rollups."""
+    sync_accounts(account_ids, engine, timeout=timeout)
+    return bank_rollups(account_ids, engine)
+
+
+def request_sync(account_id, engine=None):
+    """Make the next read of the account sync it, whatever its age."""
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        conn.execute(
+            _state.update().where(_state.c.account_id == account_id).values(synced_at=None)
+        )
+
+
+on_transactions_changed(request_sync)
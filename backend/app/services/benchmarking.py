@@ -1,3 +1,5 @@
+from app.services.metrics import build_aggregates
+
 INDUSTRY_BENCHMARKS = {
     "Retail": {
         "profit_margin": 0.22,
@@ -37,17 +39,20 @@ INDUSTRY_BENCHMARKS = {
     }
 }
 BENCHMARKS = INDUSTRY_BENCHMARKS
-def compute_business_metrics(df):
-    total_revenue = df["revenue"].sum()
-    total_expenses = df["expense_amount"].sum()
-    total_emi = df["loan_emi"].sum()
+def compute_business_metrics(df, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
+    total_revenue = aggregates.sum("revenue")
+    total_expenses = aggregates.sum("expense_amount")
+    total_emi = aggregates.sum("loan_emi")
 
     profit_margin = (total_revenue - total_expenses) / max(total_revenue, 1)
     expense_ratio = total_expenses / max(total_revenue, 1)
     debt_ratio = total_emi / max(total_revenue, 1)
 
-    receivables = df["accounts_receivable"].mean()
-    payables = max(df["accounts_payable"].mean(), 1)
+    receivables = aggregates.mean("accounts_receivable")
+    payables = max(aggregates.mean("accounts_payable"), 1)
     liquidity_ratio = receivables / payables
 
     return {
@@ -56,12 +61,12 @@ def compute_business_metrics(df):
         "debt_ratio": round(debt_ratio, 2),
         "liquidity_ratio": round(liquidity_ratio, 2)
     }
-def compare_with_benchmark(df, industry):
+def compare_with_benchmark(df, industry, aggregates=None):
     if industry not in INDUSTRY_BENCHMARKS:
         raise ValueError("Unsupported industry")
 
 
-    business = compute_business_metrics(df)
+    business = compute_business_metrics(df, aggregates)
     benchmark = BENCHMARKS[industry]
 
     comparison = {}
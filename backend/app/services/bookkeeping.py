@@ -1,5 +1,11 @@
+import re
+
+import numpy as np
 import pandas as pd
 
+from app.core.cache import LRUCache
+from app.core.config import CATEGORY_MEMO_SIZE
+
 # Minimal SME Chart of Accounts (India-friendly)
 CHART_OF_ACCOUNTS = {
     "Rent & Lease": ["rent", "lease"],
@@ -12,18 +18,125 @@ CHART_OF_ACCOUNTS = {
     "Interest & Finance Charges": ["interest", "bank charge"],
 }
 
-def categorize(description: str):
-    if not description or not isinstance(description, str):
-        return "Uncategorized", 0.4
+UNCATEGORIZED = "Uncategorized"
+MATCHED_CONFIDENCE = 0.9
+UNMATCHED_CONFIDENCE = 0.5
+MISSING_CONFIDENCE = 0.4
 
-    text = description.lower()
+_END = ""  # trie key marking the end of a keyword
 
-    for category, keywords in CHART_OF_ACCOUNTS.items():
-        for kw in keywords:
-            if kw in text:
-                return category, 0.9
 
-    return "Uncategorized", 0.5
+class AccountMatcher:
+    """
+    Compiled chart-of-accounts matcher.
+
+    Gives the same answer as checking every keyword of every category with
+    `in`, category by category: the first category (in chart order) with a
+    keyword anywhere in the lower-cased description.
+
+    All keywords go into one trie-shaped regex, applied as a lookahead at
+    every offset, so the cost per description grows with its length rather
+    than with the number of keywords. At each offset the regex yields the
+    longest keyword starting there; every shorter keyword starting there is
+    a prefix of it, so each keyword carries the best priority along its
+    prefix chain. Results are memoized per lower-cased description.
+    """
+
+    def __init__(self, chart, memo_size=CATEGORY_MEMO_SIZE):
+        self.categories = list(chart)
+        self.memo = LRUCache(maxsize=memo_size, ttl=None)
+
+        trie = {}
+        priority = {}
+        self.empty_keyword_priority = None
+        for rank, keywords in enumerate(chart.values()):
+            for kw in keywords:
+                if not kw:
+                    # "" is in every string
+                    if self.empty_keyword_priority is None:
+                        self.empty_keyword_priority = rank
+                    continue
+                priority.setdefault(kw, rank)
+                node = trie
+                for ch in kw:
+                    node = node.setdefault(ch, {})
+                node[_END] = True
+
+        # Best priority among kw and every keyword that is a prefix of it
+        self.best_priority = {}
+        for kw in priority:
+            best = len(self.categories)
+            node = trie
+            for i, ch in enumerate(kw, 1):
+                node = node[ch]
+                if _END in node:
+                    best = min(best, priority[kw[:i]])
+            self.best_priority[kw] = best
+
+        self.pattern = re.compile(f"(?=({_trie_pattern(trie)}))") if trie else None
+
+    def _match(self, text):
+        best = self.empty_keyword_priority
+        if self.pattern is not None:
+            for kw in self.pattern.findall(text):
+                rank = self.best_priority[kw]
+                if best is None or rank < best:
+                    best = rank
+                    if best == 0:
+                        break
+
+        if best is None:
+            return UNCATEGORIZED, UNMATCHED_CONFIDENCE
+        return self.categories[best], MATCHED_CONFIDENCE
+
+    def categorize(self, description):
+        if not description or not isinstance(description, str):
+            return UNCATEGORIZED, MISSING_CONFIDENCE
+
+        text = description.lower()
+        result = self.memo.get(text)
+        if result is None:
+            result = self._match(text)
+            self.memo.set(text, result)
+        return result
+
+    def categorize_many(self, descriptions):
+        """
+        (accounts, confidence) arrays for a Series of descriptions; each
+        distinct value is categorized once.
+        """
+        codes, uniques = pd.factorize(descriptions, use_na_sentinel=True)
+
+        # A trailing entry for missing values, which factorize codes as -1
+        results = [self.categorize(value) for value in uniques]
+        results.append((UNCATEGORIZED, MISSING_CONFIDENCE))
+
+        accounts = np.array([account for account, _ in results], dtype=object)
+        confidence = np.array([conf for _, conf in results], dtype=float)
+        return accounts[codes], confidence[codes]
+
+
+def _trie_pattern(node):
+    branches = [
+        re.escape(ch) + _trie_pattern(child)
+        for ch, child in sorted(node.items())
+        if ch != _END
+    ]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        # Greedy, so the longest keyword wins
+        return "(?:" + body + ")?"
+    return body
+
+
+account_matcher = AccountMatcher(CHART_OF_ACCOUNTS)
+
+
+def categorize(description: str):
+    return account_matcher.categorize(description)
 
 
 def automated_bookkeeping(df: pd.DataFrame):
@@ -49,15 +162,8 @@ def automated_bookkeeping(df: pd.DataFrame):
     if "description" not in df.columns:
         df["description"] = ""
 
-    categories = []
-    confidence = []
-
-    for desc in df["description"]:
-        cat, conf = categorize(desc)
-        categories.append(cat)
-        confidence.append(conf)
-
-    df["account"] = categories
+    accounts, confidence = account_matcher.categorize_many(df["description"])
+    df["account"] = accounts
     df["confidence"] = confidence
 
     # Expense Ledger
@@ -0,0 +1,60 @@
+import threading
+
+from app.core.cache import LRUCache
+from app.core.config import BUSINESS_STATE_CACHE_SIZE, BUSINESS_STATE_CACHE_TTL
+from app.services.benchmarking import compare_with_benchmark
+from app.services.financial_store import load_history
+from app.services.metrics import IncrementalAggregates
+from app.services.risk_engine import identify_risks
+from app.services.scoring import calculate_health_score, health_status
+from app.services.working_capital import compute_working_capital_metrics
+
+# business_id -> IncrementalAggregates over its stored months, tagged with
+# the business_id so a write can drop it
+business_states = LRUCache(maxsize=BUSINESS_STATE_CACHE_SIZE, ttl=BUSINESS_STATE_CACHE_TTL)
+_lock = threading.Lock()
+
+
+def record_months(business_id, records):
+    """
+    Apply months just stored (as save_months returns them) to the business's
+    cached state, if it has one; each month is an O(1) update.
+    """
+    with _lock:
+        state = business_states.get(business_id)
+        if state is None:
+            return
+        for record in records:
+            state.put(record)
+
+
+def forget_business(business_id):
+    business_states.invalidate_tag(business_id)
+
+
+def score_business(business_id, industry="Retail"):
+    """
+    Score, risks, benchmarks and working capital from the stored history,
+    without re-reading or re-aggregating it when the state is cached.
+    None when nothing is stored for the business.
+    """
+    with _lock:
+        state = business_states.get(business_id)
+        if state is None:
+            records = load_history(business_id)
+            if not records:
+                return None
+            state = IncrementalAggregates.from_records(records)
+            business_states.set(business_id, state, tags=[business_id])
+
+        score_data = calculate_health_score(None, state)
+        return {
+            "business_id": business_id,
+            "months": state.months,
+            "score": score_data["total_score"],
+            "status": health_status(score_data["total_score"]),
+            "breakdown": score_data["breakdown"],
+            "risks": identify_risks(None, state),
+            "benchmarks": compare_with_benchmark(None, industry, state),
+            "working_capital": compute_working_capital_metrics(None, state),
+        }
@@ -1,5 +1,28 @@
 import pandas as pd
 
+TRANSACTION_TYPES = pd.CategoricalDtype(["credit", "debit"])
+
+def monthly_bank_totals(bank_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Credits and debits per month: one row per period, "credit" and "debit"
+    columns, 0 where a month has none of that type.
+    """
+    # Dates repeat heavily across transactions, so each distinct one is
+    # parsed once
+    codes, dates = pd.factorize(bank_df["date"])
+    months = pd.to_datetime(dates).to_period("M").take(codes, fill_value=pd.NaT)
+    # Categorical, so grouping compares codes rather than strings; any
+    # other type becomes NaN and is dropped
+    kinds = bank_df["type"].astype(TRANSACTION_TYPES)
+
+    totals = (
+        bank_df["amount"]
+        .groupby([months, kinds], observed=True)
+        .sum()
+        .unstack()
+    )
+    return totals.reindex(columns=TRANSACTION_TYPES.categories, fill_value=0).fillna(0)
+
 def enrich_with_bank_data(df: pd.DataFrame, transactions: list):
     """
     Merge bank transactions into financial dataframe
@@ -10,24 +33,37 @@ def enrich_with_bank_data(df: pd.DataFrame, transactions: list):
     if bank_df.empty:
         return df
 
-    bank_df["date"] = pd.to_datetime(bank_df["date"]).dt.to_period("M")
+    return enrich_with_bank_totals(df, monthly_bank_totals(bank_df))
 
-    credits = bank_df[bank_df["type"] == "credit"].groupby("date")["amount"].sum()
-    debits = bank_df[bank_df["type"] == "debit"].groupby("date")["amount"].sum()
+def enrich_with_bank_totals(df: pd.DataFrame, totals):
+    """
+    Merge monthly bank totals, in the form monthly_bank_totals gives, into
+    financial dataframe. None (no transactions at all) leaves df as it is.
+    """
 
-    df = df.copy()
+    if totals is None:
+        return df
 
     df = df.copy()
 
     df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.to_period("M")
 
-    df["bank_inflows"] = df["date"].apply(
-        lambda d: float(credits.get(d, 0)) if pd.notna(d) else 0
-    )
+    if df.empty:
+        # Kept from the per-row version: an empty column typed like the dates
+        df["bank_inflows"] = df["date"]
+        df["bank_outflows"] = df["date"]
+        return df
 
-    df["bank_outflows"] = df["date"].apply(
-        lambda d: float(debits.get(d, 0)) if pd.notna(d) else 0
-    )
+    if df["date"].isna().all():
+        # Kept from the per-row version: integer zeros when no row has a date
+        df["bank_inflows"] = 0
+        df["bank_outflows"] = 0
+        return df
 
+    # One lookup per row against the monthly pivot; undated rows and
+    # months without transactions get 0
+    monthly = totals.reindex(df["date"]).fillna(0)
+    df["bank_inflows"] = monthly["credit"].to_numpy(dtype=float)
+    df["bank_outflows"] = monthly["debit"].to_numpy(dtype=float)
 
     return df
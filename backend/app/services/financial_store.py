@@ -0,0 +1,162 @@
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import DB_INSERT_BATCH_ROWS
+from app.core.database import get_engine
+from app.models.finance import FinancialRecord
+
+# /analyze column -> FinancialRecord column
+STORED_COLUMNS = {
+    "revenue": "revenue",
+    "expense_category": "expense_category",
+    "expense_amount": "expense_amount",
+    "accounts_receivable": "receivable",
+    "accounts_payable": "payable",
+    "inventory_value": "inventory",
+    "loan_emi": "loan_emi",
+    "gst_paid": "gst_paid",
+    "gst_due": "gst_due",
+}
+
+_table = FinancialRecord.__table__
+
+
+def _upsert_statement(dialect_name):
+    # Re-uploading a month replaces it
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(_table)
+    elif dialect_name == "postgresql":
+        stmt = postgresql.insert(_table)
+    else:
+        return None
+
+    return stmt.on_conflict_do_update(
+        index_elements=["business_id", "date"],
+        set_={column: stmt.excluded[column] for column in STORED_COLUMNS.values()},
+    )
+
+
+def _history_rows(histories):
+    # One frame for every business, so each column is converted once
+    records = [
+        {**record, "business_id": business_id}
+        for business_id, monthly_data in histories.items()
+        for record in monthly_data
+    ]
+    df = pd.DataFrame(records)
+    if df.empty:
+        return []
+    if "date" not in df.columns:
+        raise ValueError("monthly_data rows need a date")
+
+    # Stored per calendar month, keyed by its first day
+    dates = pd.to_datetime(df["date"].astype(str), errors="coerce", format="mixed")
+    months = dates.dt.to_period("M")
+    if months.isna().any():
+        raise ValueError("monthly_data has rows with an unparseable date")
+
+    columns = {"business_id": df["business_id"], "date": months.dt.start_time.dt.date}
+    for source, column in STORED_COLUMNS.items():
+        if source not in df.columns:
+            columns[column] = pd.Series(None, index=df.index, dtype=object)
+        elif column == "expense_category":
+            # normalize_data fills a missing category with 0
+            columns[column] = df[source].map(lambda v: v if isinstance(v, str) else None)
+        else:
+            values = pd.to_numeric(df[source], errors="coerce").astype(float)
+            columns[column] = values.astype(object).where(values.notna(), None)
+
+    rows = pd.DataFrame(columns, index=df.index)
+    # One row per business and month; the last one wins, as an upsert would
+    rows = rows.drop_duplicates(["business_id", "date"], keep="last")
+
+    names = list(rows.columns)
+    return [
+        dict(zip(names, values))
+        for values in zip(*(rows[name].tolist() for name in names))
+    ]
+
+
+def save_months(business_id, monthly_data, engine=None):
+    """
+    Insert or replace a business's months. Returns the months as stored,
+    in the same record form load_history gives back.
+    """
+    rows = _history_rows({business_id: monthly_data})
+    _write_rows(rows, engine)
+    return [_as_record(row["date"], [row[c] for c in STORED_COLUMNS.values()]) for row in rows]
+
+
+def save_histories(histories, engine=None):
+    """
+    Insert or replace months for several businesses ({business_id:
+    monthly_data}) in executemany batches of DB_INSERT_BATCH_ROWS, all in
+    one transaction. Returns the number of months written.
+    """
+    rows = _history_rows(histories)
+    _write_rows(rows, engine)
+    return len(rows)
+
+
+def _write_rows(rows, engine=None):
+    if not rows:
+        return
+
+    engine = engine or get_engine()
+    stmt = _upsert_statement(engine.dialect.name)
+
+    with engine.begin() as conn:
+        if stmt is None:
+            # No portable upsert: clear the months being rewritten first
+            dates_by_business = {}
+            for row in rows:
+                dates_by_business.setdefault(row["business_id"], []).append(row["date"])
+            for business_id, dates in dates_by_business.items():
+                conn.execute(
+                    _table.delete().where(
+                        _table.c.business_id == business_id,
+                        _table.c.date.in_(dates),
+                    )
+                )
+            stmt = _table.insert()
+
+        for start in range(0, len(rows), DB_INSERT_BATCH_ROWS):
+            conn.execute(stmt, rows[start:start + DB_INSERT_BATCH_ROWS])
+
+
+def load_history(business_id, engine=None):
+    """
+    A business's stored months, oldest first, as /analyze monthly_data
+    records (ISO date strings).
+    """
+    engine = engine or get_engine()
+    columns = [_table.c[column] for column in STORED_COLUMNS.values()]
+    query = (
+        select(_table.c.date, *columns)
+        .where(_table.c.business_id == business_id)
+        .order_by(_table.c.date)
+    )
+
+    with engine.connect() as conn:
+        result = conn.execute(query).fetchall()
+
+    return [_as_record(row[0], row[1:]) for row in result]
+
+
+def _as_record(date, values):
+    # A column the month was stored without is left out, not None, so the
+    # record reads back as the row that was sent: analysis treats a column
+    # that is absent differently from one that is present but empty
+    return {
+        "date": date.isoformat(),
+        **{name: value for name, value in zip(STORED_COLUMNS, values) if value is not None},
+    }
+
+
+def delete_history(business_id, engine=None):
+    engine = engine or get_engine()
+    with engine.begin() as conn:
+        return conn.execute(
+            _table.delete().where(_table.c.business_id == business_id)
+        ).rowcount
@@ -1,22 +1,198 @@
-def forecast_revenue(df, months=6):
-    avg_revenue = df["revenue"].tail(3).mean()
+import logging
+
+import numpy as np
+
+from app.core.config import FORECAST_HORIZON_MONTHS, FORECAST_PATHS
+from app.services.metrics import build_aggregates
+
+# Fewest months with revenue a Monte Carlo forecast is fitted to, and the
+# fewest for month-of-year seasonality (two of every calendar month)
+MONTE_CARLO_MIN_MONTHS = 6
+SEASONAL_MIN_MONTHS = 24
+PERCENTILES = [10, 50, 90]
+# Scales a median absolute deviation to a normal standard deviation
+MAD_SCALE = 1.4826
+# Revenue paths are capped at this multiple of the largest month, so a
+# high-growth history cannot overflow the float32 paths
+MAX_REVENUE_GROWTH = 1000.0
+
+logger = logging.getLogger(__name__)
+
+
+def forecast_revenue(df, months=6, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
+    avg_revenue = aggregates.tail_mean("revenue", 3)
     return [round(avg_revenue, 2)] * months
 
-def calculate_cash_runway(df):
-    avg_monthly_burn = (
-        df["expense_amount"] + df["loan_emi"] - df["revenue"]
-    ).mean()
+def calculate_cash_runway(df, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
+    avg_monthly_burn = aggregates.mean_burn()
 
     if avg_monthly_burn <= 0:
         return "Stable"
 
-    avg_cash_buffer = df["revenue"].mean() * 0.5
+    avg_cash_buffer = aggregates.mean("revenue") * 0.5
     runway_months = avg_cash_buffer / avg_monthly_burn
 
     return round(runway_months, 1)
 
-def generate_forecast(df):
+def _seasonal_profile(log_revenue, positions):
+    # Month-of-year offsets of detrended log revenue, mean zero; rows are
+    # consecutive months, so a row's calendar slot is its position mod 12
+    if len(positions) < SEASONAL_MIN_MONTHS:
+        return np.zeros(12), False
+
+    slots = positions % 12
+    counts = np.bincount(slots, minlength=12)
+    if (counts < 2).any():
+        return np.zeros(12), False
+
+    trend = np.polyval(np.polyfit(positions, log_revenue, 1), positions)
+    profile = np.bincount(slots, weights=log_revenue - trend, minlength=12) / counts
+    return profile - profile.mean(), True
+
+def _starting_cash(df, aggregates):
+    # The latest reported cash balance; without one, the half month of
+    # average revenue calculate_cash_runway assumes
+    if "cash_balance" in df.columns:
+        balances = df["cash_balance"].to_numpy(dtype=float, na_value=np.nan)
+        reported = balances[balances > 0]
+        if reported.size:
+            return float(reported[-1])
+    return aggregates.mean("revenue") * 0.5
+
+def _robust_spread(values):
+    # Median absolute deviation as a standard deviation; one anomalous
+    # month does not move it
+    return float(MAD_SCALE * np.median(np.abs(values - np.median(values))))
+
+def _sorted_percentiles(rows):
+    # PERCENTILES of each sorted row, interpolated as np.percentile does
+    position = np.array(PERCENTILES) / 100 * (rows.shape[-1] - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, rows.shape[-1] - 1)
+    fraction = position - lower
+    return rows[..., lower] * (1 - fraction) + rows[..., upper] * fraction
+
+def _percentiles_or_none(values, horizon):
+    # Paths that never run out of cash are inf; a percentile past the
+    # horizon is reported as None
+    points = np.percentile(values, PERCENTILES, method="nearest")
+    return {
+        f"p{p}": round(float(v), 1) if v <= horizon else None
+        for p, v in zip(PERCENTILES, points)
+    }
+
+def simulate_cash_runway(aggregates, starting_cash, paths=FORECAST_PATHS,
+                         horizon=FORECAST_HORIZON_MONTHS, seed=0):
+    """
+    Monte Carlo revenue and cash-runway forecast, P10/P50/P90.
+
+    Revenue follows a log random walk with the median drift and the
+    MAD-based volatility of the monthly history, on top of a month-of-year
+    seasonal profile when there are two years of it, and is capped at
+    MAX_REVENUE_GROWTH times the largest month. Expenses are revenue times
+    an expense ratio drawn around the total expense over total revenue,
+    with the ratios' MAD-based spread; loan EMIs stay at their mean.
+    Every path and month is drawn and accumulated in one set of NumPy
+    array operations.
+
+    Returns None when there are fewer than MONTE_CARLO_MIN_MONTHS months
+    with revenue and expenses.
+    """
+    if aggregates.monthly_burn is None:
+        return None
+
+    revenue = aggregates.values("revenue")
+    expense = aggregates.values("expense_amount")
+    positions = np.flatnonzero((revenue > 0) & ~np.isnan(expense))
+    if len(positions) < MONTE_CARLO_MIN_MONTHS:
+        return None
+
+    log_revenue = np.log(revenue[positions])
+    seasonal, is_seasonal = _seasonal_profile(log_revenue, positions)
+    level = log_revenue - seasonal[positions % 12]
+
+    # Month-on-month changes, only between months that follow each other
+    steps = np.diff(level)[np.diff(positions) == 1]
+    if len(steps) < 2:
+        return None
+    # Plain floats, so they do not widen the float32 paths. Medians and
+    # MADs, so one anomalous month does not set the spread of every path.
+    drift = float(np.median(steps))
+    volatility = _robust_spread(steps)
+
+    ratios = expense[positions] / revenue[positions]
+    ratio_mean = float(expense[positions].sum() / revenue[positions].sum())
+    ratio_spread = _robust_spread(ratios)
+    emi = aggregates.values("loan_emi")
+    emi_mean = float(np.nanmean(emi)) if np.any(~np.isnan(emi)) else 0.0
+
+    # Arrays are month by path, so cumulative sums add whole rows and each
+    # month's paths sort as one contiguous row. Updates are in place: at
+    # this size allocating temporaries costs as much as the arithmetic.
+    rng = np.random.default_rng(seed)
+    log_paths, cash_flow = rng.standard_normal((2, horizon, paths), dtype=np.float32)
+
+    log_paths *= volatility
+    log_paths += drift
+    np.cumsum(log_paths, axis=0, out=log_paths)
+    future_slots = (aggregates.months + np.arange(horizon)) % 12
+    log_paths += (np.median(level[-3:]) + seasonal[future_slots]).astype(np.float32)[:, None]
+    np.minimum(log_paths, log_revenue.max() + np.log(MAX_REVENUE_GROWTH), out=log_paths)
+    revenue_paths = np.exp(log_paths, out=log_paths)
+
+    # Expense ratio per month and path, then the month's net cash flow
+    cash_flow *= ratio_spread
+    cash_flow += ratio_mean
+    np.maximum(cash_flow, 0.0, out=cash_flow)
+    np.subtract(1.0, cash_flow, out=cash_flow)
+    cash_flow *= revenue_paths
+    cash_flow -= emi_mean
+    cash = np.cumsum(cash_flow, axis=0)
+    cash += starting_cash
+
+    # Runway: months until cash first goes negative, the last month counted
+    # by the fraction of it the remaining cash covers
+    runs_out = cash < 0
+    ran_out = runs_out.any(axis=0)
+    month = runs_out.argmax(axis=0)
+    columns = np.arange(paths)
+    before = np.where(month > 0, cash[month - 1, columns], starting_cash)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        runway = np.where(ran_out, month + before / -cash_flow[month, columns], np.inf)
+
+    # One full sort per month is cheaper than np.percentile's partitions
+    revenue_points = np.round(_sorted_percentiles(np.sort(revenue_paths, axis=1)).astype(float), 2)
+
     return {
-        "revenue_forecast_6_months": forecast_revenue(df),
-        "cash_runway_months": calculate_cash_runway(df)
+        "paths": paths,
+        "horizon_months": horizon,
+        "seasonal": is_seasonal,
+        "starting_cash": round(float(starting_cash), 2),
+        "revenue": {
+            f"p{p}": points.tolist() for p, points in zip(PERCENTILES, revenue_points.T)
+        },
+        "cash_runway_months": _percentiles_or_none(runway, horizon),
+        "cash_out_probability": round(float(ran_out.mean()), 4),
+    }
+
+def generate_forecast(df, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
+    forecast = {
+        "revenue_forecast_6_months": forecast_revenue(df, aggregates=aggregates),
+        "cash_runway_months": calculate_cash_runway(df, aggregates),
     }
+    # The simulation is an extra; a history it cannot handle leaves it out
+    # rather than failing the analysis
+    try:
+        forecast["monte_carlo"] = simulate_cash_runway(aggregates, _starting_cash(df, aggregates))
+    except Exception as e:
+        logger.warning(f"Monte Carlo forecast failed: {str(e)}", exc_info=True)
+    return forecast
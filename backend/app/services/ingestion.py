@@ -0,0 +1,67 @@
+import logging
+import os
+
+from app.core.config import CSV_CHUNK_ROWS, CSV_CHUNKED_THRESHOLD_BYTES
+from app.services.parser import read_table
+from app.services.normalizer import normalize_data, normalize_csv_in_chunks
+from app.services.pdf_parser import parse_pdf_with_selection
+from app.services.financial_store import save_months
+from app.services.business_scores import record_months
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".xls", ".xlsx", ".csv", ".pdf")
+
+
+def parse_upload(filename, source, size=None, chunked=False):
+    """
+    The /upload response for one file read from the binary file object
+    `source`: monthly totals, warnings, confidence and, for PDFs, the page
+    selection. Blocking; run it off the event loop.
+    """
+    page_selection = None
+
+    # Large CSVs are folded into monthly totals chunk by chunk instead of
+    # being loaded whole
+    if filename.endswith(".csv") and (
+        chunked or (size or 0) > CSV_CHUNKED_THRESHOLD_BYTES
+    ):
+        monthly_df, warnings = normalize_csv_in_chunks(source, CSV_CHUNK_ROWS)
+        confidence = 1.0
+    elif filename.endswith((".xls", ".xlsx", ".csv")):
+        df = read_table(filename, source)
+        monthly_df, warnings = normalize_data(df)
+        confidence = 1.0
+    elif filename.endswith(".pdf"):
+        df, confidence, page_selection = parse_pdf_with_selection(source.read())
+        logger.debug(f"PDF DataFrame columns: {df.columns.tolist()}")
+        monthly_df, warnings = normalize_data(df)
+    else:
+        raise ValueError("Unsupported file format")
+
+    response = {
+        "monthly_data": monthly_df.to_dict(orient="records"),
+        "warnings": warnings,
+        "confidence": confidence
+    }
+    if page_selection is not None:
+        response["page_selection"] = page_selection
+
+    return response
+
+
+def store_upload(business_id, response):
+    """Persist parsed months under `business_id`, noting the count in the response."""
+    stored = save_months(business_id, response["monthly_data"])
+    record_months(business_id, stored)
+    response["stored_months"] = len(stored)
+    return response
+
+
+def process_upload_job(filename, path, chunked=False, business_id=None):
+    """Background job body: parse_upload on a file spooled to disk."""
+    with open(path, "rb") as source:
+        response = parse_upload(filename, source, os.path.getsize(path), chunked)
+    if business_id:
+        store_upload(business_id, response)
+    return response
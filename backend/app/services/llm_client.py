@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import random
+import weakref
+
+import httpx
+from groq import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncGroq,
+    InternalServerError,
+    RateLimitError,
+)
+
+from app.core.config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    LLM_CONNECT_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF,
+    LLM_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+# One pooled client and concurrency limit per event loop; httpx connections
+# and asyncio primitives cannot be shared across loops.
+_loop_state = weakref.WeakKeyDictionary()
+
+
+class _LLMState:
+    def __init__(self):
+        http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+        )
+        self.client = AsyncGroq(
+            api_key=GROQ_API_KEY,
+            base_url=GROQ_BASE_URL,
+            http_client=http_client,
+            max_retries=0,
+        )
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+
+def _state():
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        state = _LLMState()
+        _loop_state[loop] = state
+    return state
+
+
+def get_llm_client() -> AsyncGroq:
+    return _state().client
+
+
+def _backoff(attempt):
+    # Exponential backoff with full jitter
+    return random.uniform(0, LLM_RETRY_BACKOFF * (2 ** attempt))
+
+
+async def chat_completion(prompt, model, temperature, max_tokens):
+    """
+    Run one chat completion through the shared client, holding a slot of
+    the global concurrency limit and retrying transient failures.
+    Returns the completion text.
+    """
+    state = _state()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with state.semaphore:
+                response = await state.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            return response.choices[0].message.content
+
+        except RETRYABLE_ERRORS as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            logger.warning(
+                f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{LLM_MAX_RETRIES})"
+            )
+            await asyncio.sleep(delay)
+
+
+async def stream_chat_completion(prompt, model, temperature, max_tokens):
+    """
+    Stream one chat completion, yielding text deltas as they arrive.
+
+    Transient failures are retried only until the first token has been
+    yielded; after that a failure propagates to the caller.
+    """
+    state = _state()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        started = False
+        try:
+            async with state.semaphore:
+                stream = await state.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        started = True
+                        yield delta
+            return
+
+        except RETRYABLE_ERRORS as e:
+            if started or attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            logger.warning(
+                f"LLM stream failed ({type(e).__name__}), retrying in {delay:.2f}s "
+                f"(attempt {attempt + 1}/{LLM_MAX_RETRIES})"
+            )
+            await asyncio.sleep(delay)
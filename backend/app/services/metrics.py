@@ -0,0 +1,347 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Columns read by scoring, risk, benchmarking, working capital and forecasting
+AGGREGATE_COLUMNS = [
+    "revenue",
+    "expense_amount",
+    "expense",
+    "loan_emi",
+    "accounts_receivable",
+    "accounts_payable",
+    "receivable",
+    "payable",
+    "gst_paid",
+    "gst_due",
+]
+
+
+def exact_sum(values):
+    """
+    Correctly rounded sum of the non-NaN values. Unlike NumPy's pairwise
+    sum it does not depend on the order or grouping of the values, so a
+    total kept up to date month by month (IncrementalAggregates) is the
+    same number a full recompute gives.
+    """
+    infinite = values[np.isinf(values)]
+    if infinite.size:
+        return float(np.sum(infinite))
+    return math.fsum(values[~np.isnan(values)].tolist())
+
+
+def _two_sum(a, b):
+    # s + err == a + b exactly (Knuth's TwoSum), elementwise
+    s = a + b
+    b_virtual = s - a
+    err = (a - (s - b_virtual)) + (b - b_virtual)
+    return s, err
+
+
+def exact_row_sums(values):
+    """
+    exact_sum of every row of a 2-D array.
+
+    Rows are summed together, one column at a time, in double-double
+    precision (Ogita, Rump and Oishi's Sum2): a running sum plus the sum of
+    every addition's exact rounding error. That total is within
+    n^2 * 2^-106 * sum(|x|) of the exact sum, so it rounds to the same
+    float as math.fsum unless the exact sum lies that close to a rounding
+    boundary; those rows, rare outside contrived input, are summed again
+    with math.fsum.
+    """
+    finite = np.where(np.isfinite(values), values, 0.0)
+    rows, n = finite.shape
+
+    # A row that overflows ends up unsettled, and fsum raises for it
+    with np.errstate(over="ignore", invalid="ignore"):
+        total = np.zeros(rows)
+        errors = np.zeros(rows)
+        for column in finite.T:
+            total, err = _two_sum(total, column)
+            errors += err
+        sums, residual = _two_sum(total, errors)
+
+        # Error bound of total + errors (gamma_n^2 * sum(|x|)), doubled for margin
+        gamma = n * 2.0 ** -53 / (1 - n * 2.0 ** -53)
+        bound = 2 * gamma * gamma * np.abs(finite).sum(axis=1)
+        half_up = (np.nextafter(sums, np.inf) - sums) / 2
+        half_down = (sums - np.nextafter(sums, -np.inf)) / 2
+        settled = (residual + bound < half_up) & (residual - bound > -half_down)
+
+    for row in np.flatnonzero(~settled):
+        sums[row] = math.fsum(finite[row].tolist())
+
+    has_infinite = np.isinf(values).any(axis=1)
+    if has_infinite.any():
+        infinite = np.where(np.isinf(values), values, 0.0)
+        sums = np.where(has_infinite, infinite.sum(axis=1), sums)
+    return sums
+
+
+def _nanmean(values):
+    count = np.count_nonzero(~np.isnan(values))
+    if count == 0:
+        return float("nan")
+    return exact_sum(values) / count
+
+
+class FinancialAggregates:
+    """
+    Sums, means, counts and per-month cash-flow vectors for one monthly
+    dataframe, computed once so every analysis service reads the same numbers.
+
+    Missing columns are not filled in: asking for one raises KeyError,
+    the same as indexing the dataframe directly would.
+    """
+
+    def __init__(self, columns: dict, months: int):
+        self.months = months
+        self.columns = columns
+
+        self.sums = {}
+        self.counts = {}
+        for name, values in columns.items():
+            self.sums[name] = exact_sum(values)
+            self.counts[name] = int(np.count_nonzero(~np.isnan(values)))
+
+        self.monthly_cash = None
+        self.monthly_burn = None
+        self.positive_cash_months = 0
+        self.negative_cash_months = 0
+
+        if all(c in columns for c in ("revenue", "expense_amount", "loan_emi")):
+            revenue = columns["revenue"]
+            expense = columns["expense_amount"]
+            emi = columns["loan_emi"]
+
+            self.monthly_cash = revenue - expense - emi
+            self.monthly_burn = expense + emi - revenue
+            self.positive_cash_months = int(np.count_nonzero(self.monthly_cash > 0))
+            self.negative_cash_months = int(np.count_nonzero(self.monthly_cash < 0))
+
+        self.gst_clear_months = 0
+        self.gst_pending_months = 0
+        if "gst_due" in columns:
+            self.gst_clear_months = int(np.count_nonzero(columns["gst_due"] == 0))
+            self.gst_pending_months = int(np.count_nonzero(columns["gst_due"] > 0))
+
+    def has(self, name):
+        return name in self.columns
+
+    def values(self, name):
+        return self.columns[name]
+
+    def sum(self, name):
+        return self.sums[name]
+
+    def count(self, name):
+        return self.counts[name]
+
+    def mean(self, name):
+        if self.counts[name] == 0:
+            return float("nan")
+        return self.sums[name] / self.counts[name]
+
+    def tail_mean(self, name, n):
+        return _nanmean(self.columns[name][-n:])
+
+    def mean_burn(self):
+        if self.monthly_burn is None:
+            raise KeyError("revenue, expense_amount and loan_emi are required")
+        return _nanmean(self.monthly_burn)
+
+
+def build_aggregates(df: pd.DataFrame) -> FinancialAggregates:
+    """
+    Build the shared aggregate object from a monthly dataframe in one pass
+    over its NumPy arrays.
+    """
+    columns = {}
+    for name in AGGREGATE_COLUMNS:
+        if name in df.columns:
+            columns[name] = df[name].to_numpy(dtype=float, na_value=np.nan)
+
+    return FinancialAggregates(columns, len(df))
+
+
+class ExactSum:
+    """
+    Running correctly rounded sum that values can be added to and removed
+    from without any rounding drift: the exact total is held as a short
+    list of non-overlapping partials (Shewchuk's algorithm, as in
+    math.fsum). NaN is skipped, as in exact_sum.
+    """
+
+    __slots__ = ("partials", "positive_inf", "negative_inf")
+
+    def __init__(self):
+        self.partials = []
+        self.positive_inf = 0
+        self.negative_inf = 0
+
+    def add(self, x):
+        self._add(x, 1)
+
+    def remove(self, x):
+        self._add(-x, -1)
+
+    def _add(self, x, sign):
+        if math.isnan(x):
+            return
+        if math.isinf(x):
+            # The sign of x is already flipped for a removal
+            if (x > 0) == (sign > 0):
+                self.positive_inf += sign
+            else:
+                self.negative_inf += sign
+            return
+
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def value(self):
+        if self.positive_inf and self.negative_inf:
+            return float("nan")
+        if self.positive_inf:
+            return float("inf")
+        if self.negative_inf:
+            return float("-inf")
+        return math.fsum(self.partials)
+
+
+class IncrementalAggregates:
+    """
+    The aggregate interface scoring, risks, benchmarking and working capital
+    read (has / sum / count / mean, months and the cash-flow and GST month
+    tallies), kept up to date one month at a time.
+
+    append(), replace() and remove() cost O(1) in the length of the history:
+    each adjusts running exact sums, non-null counts and tallies by the
+    difference the month makes. Because sums are exact, the results equal
+    build_aggregates() over the same months, in any order.
+
+    Months are keyed by the calendar month of their "date".
+    """
+
+    def __init__(self):
+        self.rows = {}
+        self._sums = {name: ExactSum() for name in AGGREGATE_COLUMNS}
+        self._counts = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+        # Months whose row has the column at all, which decides has()
+        self._present = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+
+        self.positive_cash_months = 0
+        self.negative_cash_months = 0
+        self.gst_clear_months = 0
+        self.gst_pending_months = 0
+
+    @classmethod
+    def from_records(cls, records):
+        aggregates = cls()
+        for record in records:
+            aggregates.put(record)
+        return aggregates
+
+    @property
+    def months(self):
+        return len(self.rows)
+
+    @staticmethod
+    def month_key(record):
+        if record.get("date") is None:
+            raise ValueError("monthly_data rows need a date")
+        return pd.Period(record["date"], freq="M")
+
+    def append(self, record):
+        month = self.month_key(record)
+        if month in self.rows:
+            raise ValueError(f"Month {month} is already present; use replace()")
+        self._apply(month, record, 1)
+
+    def replace(self, record):
+        month = self.month_key(record)
+        if month not in self.rows:
+            raise KeyError(f"Month {month} is not present")
+        self._apply(month, self.rows[month], -1)
+        self._apply(month, record, 1)
+
+    def put(self, record):
+        """Append the month, or replace it when already present."""
+        month = self.month_key(record)
+        if month in self.rows:
+            self._apply(month, self.rows[month], -1)
+        self._apply(month, record, 1)
+
+    def remove(self, month):
+        month = pd.Period(month, freq="M")
+        self._apply(month, self.rows[month], -1)
+
+    def records(self):
+        """Current months in date order, as given."""
+        return [self.rows[month] for month in sorted(self.rows)]
+
+    def _apply(self, month, record, sign):
+        values = {}
+        for name in AGGREGATE_COLUMNS:
+            if name not in record:
+                values[name] = float("nan")
+                continue
+            value = record[name]
+            values[name] = float("nan") if value is None else float(value)
+            self._present[name] += sign
+
+            if not math.isnan(values[name]):
+                self._counts[name] += sign
+                if sign > 0:
+                    self._sums[name].add(values[name])
+                else:
+                    self._sums[name].remove(values[name])
+
+        # NaN (missing) inputs make the month neither positive nor negative,
+        # the same as the vectorized comparison
+        cash = values["revenue"] - values["expense_amount"] - values["loan_emi"]
+        if cash > 0:
+            self.positive_cash_months += sign
+        elif cash < 0:
+            self.negative_cash_months += sign
+
+        gst_due = values["gst_due"]
+        if gst_due == 0:
+            self.gst_clear_months += sign
+        elif gst_due > 0:
+            self.gst_pending_months += sign
+
+        if sign > 0:
+            self.rows[month] = record
+        else:
+            del self.rows[month]
+
+    def has(self, name):
+        return self._present.get(name, 0) > 0
+
+    def sum(self, name):
+        if not self.has(name):
+            raise KeyError(name)
+        return self._sums[name].value()
+
+    def count(self, name):
+        if not self.has(name):
+            raise KeyError(name)
+        return self._counts[name]
+
+    def mean(self, name):
+        if self.count(name) == 0:
+            return float("nan")
+        return self.sum(name) / self.count(name)
@@ -13,47 +13,62 @@ COLUMN_MAP = {
     "gst_due": ["gst_due"]
 }
 
-def normalize_data(df):
+def resolve_columns(columns):
+    """
+    Map each standard column to the (lower-cased, stripped) source column
+    that supplies it, or None when it is missing.
+    """
+    resolved = {}
     warnings = []
-    
-    # Make sure we're working with a DataFrame
-    if not isinstance(df, pd.DataFrame):
-        df = pd.DataFrame(df)
-    
-    df.columns = df.columns.str.lower().str.strip()
-    normalized = {}
-    
-    # First, try to find exact matches for our required columns
+
     for standard, variants in COLUMN_MAP.items():
-        column_found = False
-        
+        source = None
+
         # Check variants
         for v in variants:
-            if v in df.columns:
-                normalized[standard] = df[v]
-                column_found = True
+            if v in columns:
+                source = v
                 break
-        
+
         # Check for approximate matches (for PDF data)
-        if not column_found:
-            for col in df.columns:
+        if source is None:
+            for col in columns:
                 if any(variant in col for variant in variants):
-                    normalized[standard] = df[col]
-                    column_found = True
+                    source = col
                     break
-        
-        # If still not found, set to 0
-        if not column_found:
+
+        resolved[standard] = source
+        if source is None:
             if standard == "date":
-                # Use current date if no date column
-                normalized[standard] = pd.Series([pd.Timestamp.now()])
                 warnings.append("Date column missing, using current date")
             else:
-                normalized[standard] = 0
                 warnings.append(f"Missing column: {standard}")
-    
-    clean_df = pd.DataFrame(normalized)
-    
+
+    return resolved, warnings
+
+def _clean_frame(df, resolved, missing_date):
+    normalized = {}
+    for standard, source in resolved.items():
+        if source is not None:
+            normalized[standard] = df[source]
+        elif standard == "date":
+            # Use current date if no date column
+            normalized[standard] = missing_date
+        else:
+            normalized[standard] = 0
+
+    return pd.DataFrame(normalized)
+
+def normalize_data(df):
+    # Make sure we're working with a DataFrame
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(df)
+
+    df.columns = df.columns.str.lower().str.strip()
+
+    resolved, warnings = resolve_columns(df.columns)
+    clean_df = _clean_frame(df, resolved, pd.Series([pd.Timestamp.now()]))
+
     # Convert date to period
     try:
         clean_df["date"] = pd.to_datetime(clean_df["date"], errors='coerce')
@@ -61,8 +76,70 @@ def normalize_data(df):
     except:
         clean_df["date"] = pd.Period.now('M')
         warnings.append("Date conversion failed, using current month")
-    
+
     # Group by month
     monthly_df = clean_df.groupby("date").sum(numeric_only=True).reset_index()
-    
-    return monthly_df, warnings
\ No newline at end of file
+
+    return monthly_df, warnings
+
+def _first_date_format(values):
+    first = values.dropna()
+    if first.empty or not isinstance(first.iloc[0], str):
+        return None
+    return pd.tseries.api.guess_datetime_format(first.iloc[0])
+
+def normalize_csv_in_chunks(source, chunksize=100_000):
+    """
+    Streaming version of normalize_data(pd.read_csv(source)).
+
+    Columns are resolved once from the header and only the mapped ones are
+    read. Each chunk is folded into running per-month sums, so peak memory
+    depends on the number of months rather than the number of rows.
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    source.seek(0)
+
+    lowered = header.str.lower().str.strip()
+    resolved, warnings = resolve_columns(lowered)
+    source_names = dict(zip(lowered, header))
+    usecols = sorted({source_names[c] for c in resolved.values() if c is not None})
+
+    now = pd.Timestamp.now()
+    date_format = None
+    monthly = None
+    non_numeric = set()
+
+    for chunk in pd.read_csv(source, usecols=usecols, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.lower().str.strip()
+        # Same as normalize_data: without a date column only the first row
+        # of the file is dated
+        clean = _clean_frame(chunk, resolved, pd.Series([now]).reindex(chunk.index))
+
+        # Parse every chunk with the format pandas would infer for the
+        # whole column, i.e. from its first non-null value
+        if date_format is None:
+            date_format = _first_date_format(clean["date"])
+        clean["date"] = pd.to_datetime(
+            clean["date"], errors="coerce", format=date_format
+        ).dt.to_period("M")
+
+        chunk_monthly = clean.groupby("date").sum(numeric_only=True)
+
+        # A column that is non-numeric in any chunk would be object dtype in
+        # a single full read, and numeric_only would drop it there too
+        for standard in resolved:
+            if standard != "date" and standard not in chunk_monthly.columns:
+                non_numeric.add(standard)
+
+        if monthly is None:
+            monthly = chunk_monthly
+        else:
+            monthly = pd.concat([monthly, chunk_monthly]).groupby(level=0).sum()
+
+    columns = [c for c in resolved if c != "date" and c not in non_numeric]
+    if monthly is None:
+        monthly = pd.DataFrame(columns=columns, index=pd.PeriodIndex([], freq="M", name="date"))
+
+    monthly_df = monthly[columns].sort_index().reset_index()
+
+    return monthly_df, warnings
@@ -1,9 +1,12 @@
 import pandas as pd
 
 def parse_file(file):
-    if file.filename.endswith(".csv"):
-        return pd.read_csv(file.file)
-    elif file.filename.endswith(".xlsx"):
-        return pd.read_excel(file.file)
+    return read_table(file.filename, file.file)
+
+def read_table(filename, source):
+    if filename.endswith(".csv"):
+        return pd.read_csv(source)
+    elif filename.endswith(".xlsx"):
+        return pd.read_excel(source)
     else:
         raise ValueError("Unsupported file format")
@@ -1,11 +1,244 @@
 import pdfplumber
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
 import pytesseract
 from PIL import Image
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
 import io
+import logging
+import os
 import re
+import tempfile
 from datetime import datetime
 
+from app.core.cache import DiskCache
+from app.core.config import (
+    OCR_CACHE_DIR,
+    OCR_CACHE_MAX_BYTES,
+    PDF_INDEX_MIN_PAGES,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pages without extractable text are OCRed. So are pages with less text than
+# PAGE_TEXT_MIN_CHARS when images cover SCAN_MIN_COVERAGE of the page (a
+# scan with a stamped page number); other short pages, such as signature or
+# "continued" pages, keep their text layer.
+PAGE_TEXT_MIN_CHARS = 20
+SCAN_MIN_COVERAGE = 0.5
+
+TEXT_LAYER_CONFIDENCE = 0.85
+OCR_CONFIDENCE = 0.65
+
+OCR_RESOLUTION = 300
+
+# Keyed by the rendered pixels, so a page re-uploaded on its own or inside a
+# different PDF skips tesseract. Worker processes share it through the disk.
+ocr_cache = (
+    DiskCache(OCR_CACHE_DIR, suffix=".txt", max_bytes=OCR_CACHE_MAX_BYTES)
+    if OCR_CACHE_DIR else None
+)
+
+_page_pool = None
+
+def _init_page_worker():
+    # One tesseract thread per worker; the pool already uses every core
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+def use_serial_extraction():
+    """
+    Initializer for processes that are pool workers themselves: extract
+    pages in-process rather than starting a page pool of their own.
+    """
+    global PDF_WORKERS
+    PDF_WORKERS = 1
+    _init_page_worker()
+
+def get_page_pool():
+    global _page_pool
+    if _page_pool is None:
+        _page_pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS, initializer=_init_page_worker
+        )
+    return _page_pool
+
+def page_image_key(img) -> str:
+    digest = hashlib.sha256(f"{OCR_RESOLUTION}:{img.mode}:{img.size}:".encode())
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+def ocr_page(page) -> str:
+    img = page.to_image(resolution=OCR_RESOLUTION).original
+    if ocr_cache is None:
+        return pytesseract.image_to_string(img)
+
+    key = page_image_key(img)
+    cached = ocr_cache.get(key)
+    if cached is not None:
+        return cached.decode("utf-8")
+
+    text = pytesseract.image_to_string(img)
+    try:
+        ocr_cache.set(key, text.encode("utf-8"))
+    except OSError as e:
+        logger.warning(f"Could not write OCR text to cache: {str(e)}")
+    return text
+
+def is_scanned(text, image_coverage):
+    """
+    Whether a page with this text layer needs OCR. image_coverage() gives
+    the fraction of the page covered by images; it is only called for
+    pages with a little text.
+    """
+    chars = len(text.strip())
+    if chars == 0:
+        return True
+    return chars < PAGE_TEXT_MIN_CHARS and image_coverage() >= SCAN_MIN_COVERAGE
+
+def _image_coverage(page):
+    # Fraction of a pdfplumber page covered by images
+    area = sum((image["x1"] - image["x0"]) * (image["bottom"] - image["top"]) for image in page.images)
+    return area / (page.width * page.height)
+
+def _pdfium_image_coverage(page):
+    area = 0.0
+    for obj in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+        left, bottom, right, top = obj.get_bounds()
+        area += (right - left) * (top - bottom)
+    return area / (page.get_width() * page.get_height())
+
+def extract_page(page):
+    """
+    Text of one page and whether OCR was needed: the text layer unless the
+    page is scanned (see is_scanned), otherwise tesseract on the rendered
+    page.
+    """
+    text = page.extract_text() or ""
+    if not is_scanned(text, lambda: _image_coverage(page)):
+        return text, False
+    return ocr_page(page), True
+
+def _extract_page_list(source, page_numbers):
+    with pdfplumber.open(source) as pdf:
+        results = []
+        for i in page_numbers:
+            page = pdf.pages[i]
+            results.append(extract_page(page))
+            page.close()  # drop pdfplumber's per-page object cache
+        return results
+
+def extract_pages(file_bytes: bytes, page_numbers=None):
+    """
+    Per-page (text, used_ocr) for `page_numbers` (0-based, default every
+    page), in that order.
+
+    Large selections are split into contiguous runs, one per worker
+    process, so text extraction and OCR use every core.
+    """
+    if page_numbers is None:
+        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+            page_numbers = range(len(pdf.pages))
+    page_numbers = list(page_numbers)
+    page_count = len(page_numbers)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS <= 1:
+        return _extract_page_list(io.BytesIO(file_bytes), page_numbers)
+
+    # Workers open the PDF from disk rather than each receiving a copy
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(file_bytes)
+        path = tmp.name
+
+    try:
+        # More runs than workers keeps cores busy when OCR-heavy runs take
+        # longer than text-only ones
+        ranges = min(page_count, PDF_WORKERS * 4)
+        bounds = [page_count * i // ranges for i in range(ranges + 1)]
+        futures = [
+            get_page_pool().submit(_extract_page_list, path, page_numbers[start:stop])
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        return [page for future in futures for page in future.result()]
+    finally:
+        os.unlink(path)
+
+# Statement headings; the page after one is kept as well, since statements
+# often run onto a second page
+STATEMENT_HEADINGS = [
+    "balance sheet",
+    "statement of financial position",
+    "profit and loss",
+    "income statement",
+    "cash flow",
+]
+
+def index_pages(file_bytes: bytes):
+    """
+    Cheap first pass over the PDF text layer with pdfium: per page, the
+    statement headings it mentions and the line items it has amounts for
+    (see page_line_items), or None for a scanned page (its content is
+    unknown until OCR).
+    """
+    pdf = pdfium.PdfDocument(file_bytes)
+    try:
+        index = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            text = textpage.get_text_bounded()
+            textpage.close()
+            scanned = is_scanned(text, lambda: _pdfium_image_coverage(page))
+            page.close()
+
+            if scanned:
+                index.append(None)
+                continue
+
+            text = text.lower()
+            # Headings wrap across lines as often as not
+            flat = " ".join(text.split())
+            index.append(
+                [heading for heading in STATEMENT_HEADINGS if heading in flat]
+                + page_line_items(text)
+            )
+        return index
+    finally:
+        pdf.close()
+
+def select_pages(index):
+    """
+    Pages worth extracting from a page index, and the decision for every
+    page as {"page": 1-based number, "selected", "reason", "keywords"}.
+    """
+    decisions = []
+    for i, keywords in enumerate(index):
+        if keywords is None:
+            selected, reason = True, "no text layer"
+        elif keywords:
+            selected, reason = True, "keywords"
+        elif i > 0 and any(k in STATEMENT_HEADINGS for k in index[i - 1] or ()):
+            selected, reason = True, f"continues statement from page {i}"
+        else:
+            selected, reason = False, "no keywords"
+        decisions.append({
+            "page": i + 1,
+            "selected": selected,
+            "reason": reason,
+            "keywords": keywords or []
+        })
+
+    selected = [d["page"] - 1 for d in decisions if d["selected"]]
+    if not selected:
+        # Nothing recognisable; fall back to reading the whole document
+        for d in decisions:
+            d["selected"], d["reason"] = True, "no sections found"
+        selected = list(range(len(index)))
+
+    return selected, decisions
+
 def extract_text_pdf(file_bytes: bytes) -> str:
     text = ""
     with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
@@ -19,10 +252,149 @@ def extract_scanned_pdf(file_bytes: bytes) -> str:
     text = ""
     with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
         for page in pdf.pages:
-            img = page.to_image(resolution=300).original
-            text += pytesseract.image_to_string(img)
+            text += ocr_page(page)
     return text.strip()
 
+# Amount following a field keyword on the same line
+AMOUNT_PATTERN = r'.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
+
+# Field -> keyword patterns in priority order, as (leading literal, pattern).
+# The first pattern that matches anywhere in the document wins.
+FIELD_PATTERNS = {
+    "revenue": [
+        ("revenue from operations", r'revenue from operations'),
+        ("sales", r'sales'),
+        ("total revenue", r'total revenue'),
+        ("sales", r'sales\s*\/\s*services'),
+    ],
+    # EXPENSE (from cash flow - cash paid to suppliers/employees)
+    "expense_amount": [
+        ("cash paid to suppliers", r'cash paid to suppliers'),
+        ("cash paid", r'cash paid.*?employees'),
+        ("expenses", r'expenses'),
+    ],
+    # ACCOUNTS RECEIVABLE (Trade Receivables from balance sheet)
+    "accounts_receivable": [
+        ("trade receivables", r'trade receivables'),
+        ("receivables", r'receivables'),
+        ("accounts receivable", r'accounts receivable'),
+    ],
+    # ACCOUNTS PAYABLE (Trade Payables from balance sheet)
+    "accounts_payable": [
+        ("trade payables", r'trade payables'),
+        ("payables", r'payables'),
+        ("accounts payable", r'accounts payable'),
+    ],
+    "inventory_value": [
+        ("inventories", r'inventories'),
+        ("inventory", r'inventory'),
+        ("stock", r'stock'),
+    ],
+    # LOAN EMI (from financing activities - loan repayments)
+    "loan_emi": [
+        ("loan repayments", r'loan repayments'),
+        ("loan", r'loan.*?repayment'),
+        ("emi", r'emi'),
+    ],
+    # CASH BALANCE (from cash flow statement)
+    "cash_balance": [
+        ("cash at end", r'cash at end'),
+        ("cash and bank", r'cash and bank'),
+        ("cash balance", r'cash balance'),
+    ],
+    # GST - if mentioned (common in Indian financials)
+    "gst_paid": [
+        ("gst", r'gst.*?paid'),
+        ("tax", r'tax.*?paid'),
+        ("direct taxes", r'direct taxes.*?paid'),
+    ],
+}
+
+COMPILED_FIELD_PATTERNS = {
+    field: [
+        (literal, re.compile(pattern + AMOUNT_PATTERN, re.IGNORECASE))
+        for literal, pattern in patterns
+    ]
+    for field, patterns in FIELD_PATTERNS.items()
+}
+
+DATE_PATTERN = re.compile(r'quarter ended (\w+ \d{1,2}, \d{4})', re.IGNORECASE)
+
+# Leading keyword of every field pattern, and of the date. Page selection
+# keeps the pages where one of them is followed by an amount, i.e. every
+# page extract_financial_data could read a field from.
+LINE_ITEM_KEYWORDS = list(dict.fromkeys(
+    literal for patterns in FIELD_PATTERNS.values() for literal, _ in patterns
+)) + ["quarter ended"]
+
+# The only non-ASCII characters that IGNORECASE matches against the
+# (lower-case ASCII) literals and that survive str.lower()
+CASE_FOLD_CHARS = ("\u017f", "\u0131")  # long s, dotless i
+
+def _search_from_literal(pattern, literal, text):
+    """
+    Same result as pattern.search(text) for a pattern that starts with
+    `literal`: a match can only start where the literal occurs, so only
+    those offsets (found with str.find) are tried.
+    """
+    pos = text.find(literal)
+    while pos != -1:
+        match = pattern.match(text, pos)
+        if match:
+            return match
+        pos = text.find(literal, pos + 1)
+    return None
+
+def find_field_matches(text: str) -> dict:
+    """
+    Per field, the match of its highest-priority pattern at its first
+    occurrence, i.e. what running each pattern with re.search over the
+    whole text gives. `text` must already be lower-cased.
+
+    The patterns are compiled once at import. Instead of letting each
+    regex scan the whole document, candidate offsets come from str.find
+    on the pattern's leading keyword, which skips non-matching text far
+    faster than the regex engine.
+    """
+    if any(char in text for char in CASE_FOLD_CHARS):
+        # These can match a keyword letter without containing it
+        search = lambda pattern, literal: pattern.search(text)
+    else:
+        search = lambda pattern, literal: _search_from_literal(pattern, literal, text)
+
+    matches = {}
+    for field, patterns in COMPILED_FIELD_PATTERNS.items():
+        for literal, pattern in patterns:
+            match = search(pattern, literal)
+            if match:
+                matches[field] = match
+                break
+
+    date_match = search(DATE_PATTERN, "quarter ended")
+    if date_match:
+        matches["date"] = date_match
+    return matches
+
+def page_line_items(text: str) -> list:
+    """
+    LINE_ITEM_KEYWORDS of the field patterns that match `text` (lower-cased)
+    with an amount. Keywords alone, like "sales" or "tax", turn up all over
+    the narrative sections of an annual report.
+    """
+    if any(char in text for char in CASE_FOLD_CHARS):
+        search = lambda pattern, literal: pattern.search(text)
+    else:
+        search = lambda pattern, literal: _search_from_literal(pattern, literal, text)
+
+    found = []
+    for patterns in COMPILED_FIELD_PATTERNS.values():
+        for literal, pattern in patterns:
+            if literal not in found and search(pattern, literal):
+                found.append(literal)
+    if search(DATE_PATTERN, "quarter ended"):
+        found.append("quarter ended")
+    return found
+
 def extract_financial_data(text: str) -> dict:
     """Extract comprehensive financial data from PDF text"""
     data = {
@@ -42,159 +414,65 @@ def extract_financial_data(text: str) -> dict:
     
     # Clean the text
     text = text.lower()
-    
+
+    matches = find_field_matches(text)
+
     # Extract date (look for quarter ended date)
-    date_match = re.search(r'quarter ended (\w+ \d{1,2}, \d{4})', text, re.IGNORECASE)
+    date_match = matches.pop("date", None)
     if date_match:
         try:
             data["date"] = pd.to_datetime(date_match.group(1)).strftime("%Y-%m-%d")
         except:
             pass
-    
-    # REVENUE PATTERNS
-    revenue_patterns = [
-        r'revenue from operations.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'sales.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'total revenue.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'sales\s*\/\s*services.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in revenue_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["revenue"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # EXPENSE PATTERNS (from cash flow - cash paid to suppliers/employees)
-    expense_patterns = [
-        r'cash paid to suppliers.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'cash paid.*?employees.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'expenses.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in expense_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["expense_amount"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # ACCOUNTS RECEIVABLE (Trade Receivables from balance sheet)
-    ar_patterns = [
-        r'trade receivables.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'receivables.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'accounts receivable.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in ar_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["accounts_receivable"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # ACCOUNTS PAYABLE (Trade Payables from balance sheet)
-    ap_patterns = [
-        r'trade payables.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'payables.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'accounts payable.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in ap_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["accounts_payable"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # INVENTORY VALUE
-    inventory_patterns = [
-        r'inventories.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'inventory.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'stock.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in inventory_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["inventory_value"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # LOAN EMI (from financing activities - loan repayments)
-    loan_patterns = [
-        r'loan repayments.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'loan.*?repayment.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'emi.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in loan_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["loan_emi"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # CASH BALANCE (from cash flow statement)
-    cash_patterns = [
-        r'cash at end.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'cash and bank.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'cash balance.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in cash_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["cash_balance"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
-    # GST - if mentioned (common in Indian financials)
-    gst_patterns = [
-        r'gst.*?paid.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'tax.*?paid.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',
-        r'direct taxes.*?paid.*?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'
-    ]
-    
-    for pattern in gst_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            try:
-                data["gst_paid"] = float(match.group(1).replace(",", ""))
-                break
-            except:
-                continue
-    
+
+    for field, match in matches.items():
+        data[field] = float(match.group(1).replace(",", ""))
+
     return data
 
 def parse_pdf(file_bytes: bytes):
-    text = extract_text_pdf(file_bytes)
+    """Returns (df, confidence); see parse_pdf_with_selection."""
+    df, confidence, _ = parse_pdf_with_selection(file_bytes)
+    return df, confidence
 
-    if not text or len(text.strip()) < 50:
-        text = extract_scanned_pdf(file_bytes)
-        confidence = 0.65
+def parse_pdf_with_selection(file_bytes: bytes):
+    """
+    Returns (df, confidence, page_selection). Documents of at least
+    PDF_INDEX_MIN_PAGES pages are indexed first and only the statement
+    pages are extracted; page_selection records why each page was kept or
+    skipped.
+    """
+    index = index_pages(file_bytes)
+    if len(index) >= PDF_INDEX_MIN_PAGES:
+        page_numbers, decisions = select_pages(index)
     else:
-        confidence = 0.85
+        page_numbers = list(range(len(index)))
+        decisions = [
+            {"page": i + 1, "selected": True, "reason": "short document", "keywords": keywords or []}
+            for i, keywords in enumerate(index)
+        ]
+
+    pages = extract_pages(file_bytes, page_numbers)
+    text = "\n".join(page_text for page_text, _ in pages if page_text).strip()
 
     if not text:
         raise ValueError("Unable to extract text from PDF")
 
+    # Share of pages read from a text layer vs. OCR
+    ocr_pages = sum(1 for _, used_ocr in pages if used_ocr)
+    confidence = round(
+        (TEXT_LAYER_CONFIDENCE * (len(pages) - ocr_pages) + OCR_CONFIDENCE * ocr_pages)
+        / len(pages),
+        2
+    )
+
     financial_data = extract_financial_data(text)
     df = pd.DataFrame([financial_data])
 
-    return df, confidence
+    page_selection = {
+        "page_count": len(index),
+        "selected_pages": [i + 1 for i in page_numbers],
+        "pages": decisions
+    }
+
+    return df, confidence, page_selection
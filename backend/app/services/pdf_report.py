@@ -3,449 +3,769 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
+from reportlab import rl_config
 from reportlab.pdfgen import canvas
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
 from io import BytesIO
+from xml.sax.saxutils import escape
+import json
 import logging
+import os
+import re
+import threading
+import zipfile
+
+from app.core.config import REPORT_CHUNK_SIZE, REPORT_WORKERS
+from app.services.pdf_stream import PDFStreamWriter
 
 logger = logging.getLogger(__name__)
 
-def generate_pdf_report(analysis: dict, ai_insights: str = None):
-    """
-    Generate a comprehensive PDF financial health report.
+# Page streams stay binary: ASCII85 only matters for 7-bit channels and
+# took about a quarter of each render. rl_config is process-wide, so it is
+# switched off only while this module's documents are being built, and
+# restored when the last concurrent build finishes.
+_binary_builds = 0
+_saved_use_a85 = rl_config.useA85
+_binary_builds_lock = threading.Lock()
+
+@contextmanager
+def _binary_streams():
+    global _binary_builds, _saved_use_a85
+    with _binary_builds_lock:
+        if _binary_builds == 0:
+            _saved_use_a85 = rl_config.useA85
+            rl_config.useA85 = 0
+        _binary_builds += 1
+    try:
+        yield
+    finally:
+        with _binary_builds_lock:
+            _binary_builds -= 1
+            if _binary_builds == 0:
+                rl_config.useA85 = _saved_use_a85
+
+class _ReportDocTemplate(SimpleDocTemplate):
+    def build(self, *args, **kwargs):
+        with _binary_streams():
+            super().build(*args, **kwargs)
+
+def _build_styles():
+    styles = getSampleStyleSheet()
+
+    # =====================
+    # CUSTOM STYLES
+    # =====================
+    styles.add(ParagraphStyle(
+        name='CustomNormal',
+        parent=styles['Normal'],
+        fontSize=10,
+        leading=12,
+        spaceAfter=6
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RiskHigh',
+        parent=styles['CustomNormal'],
+        textColor=colors.red
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RiskMedium',
+        parent=styles['CustomNormal'],
+        textColor=colors.orange
+    ))
+
+    styles.add(ParagraphStyle(
+        name='RiskLow',
+        parent=styles['CustomNormal'],
+        textColor=colors.green
+    ))
+
+    styles.add(ParagraphStyle(
+        name='InsightBullet',
+        parent=styles['CustomNormal'],
+        leftIndent=20,
+        bulletIndent=10,
+        spaceBefore=4,
+        spaceAfter=4
+    ))
+    return styles
+
+# Styles and table templates are built once per process and shared by every
+# report: flowables only read them.
+REPORT_STYLES = _build_styles()
+
+BREAKDOWN_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+])
+
+BENCHMARK_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+])
+
+WORKING_CAPITAL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+])
+
+FORECAST_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+])
+
+BENCHMARK_STATUS_COLORS = {'Better': colors.green, 'Worse': colors.red}
+RISK_LEVEL_COLORS = {'High': colors.red, 'Medium': colors.orange, 'Low': colors.green}
+
+def _add_page_numbers(canvas, doc, offset=0):
+    # offset: pages before this document when it is one section of a larger one
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    page_num = f"Page {doc.page + offset}"
+    canvas.drawRightString(A4[0] - 50, 30, page_num)
+    canvas.restoreState()
+
+def _analysis_elements(analysis: dict, business_name: str = None):
+    """Flowables of the pages that do not depend on the AI insights: cover to forecast."""
+    styles = REPORT_STYLES
     
-    Args:
-        analysis: Dictionary containing financial analysis data
-        ai_insights: AI-generated insights text (optional)
+    elements = []
+
+    # =====================
+    # COVER PAGE (FIXED)
+    # =====================
+    elements.append(Paragraph(
+        "<font size=24><b>FINANCIAL HEALTH ASSESSMENT REPORT</b></font>",
+        styles["Title"]
+    ))
+    elements.append(Spacer(1, 24))
     
-    Returns:
-        BytesIO buffer containing PDF
-    """
-    try:
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, 
-            pagesize=A4,
-            title="Financial Health Assessment Report",
-            author="Financial Analysis System"
-        )
-        styles = getSampleStyleSheet()
-        
-        # =====================
-        # CUSTOM STYLES
-        # =====================
-        styles.add(ParagraphStyle(
-            name='CustomNormal',
-            parent=styles['Normal'],
-            fontSize=10,
-            leading=12,
-            spaceAfter=6
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='RiskHigh',
-            parent=styles['CustomNormal'],
-            textColor=colors.red
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='RiskMedium',
-            parent=styles['CustomNormal'],
-            textColor=colors.orange
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='RiskLow',
-            parent=styles['CustomNormal'],
-            textColor=colors.green
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='InsightBullet',
-            parent=styles['CustomNormal'],
-            leftIndent=20,
-            bulletIndent=10,
-            spaceBefore=4,
-            spaceAfter=4
-        ))
-        
-        elements = []
+    # Company Info (a placeholder when the report is not for a named business)
+    company = "Business Financial Analysis" if business_name is None else escape(str(business_name))
+    elements.append(Paragraph(
+        f"<font size=14><b>{company}</b></font>",
+        styles["Heading2"]
+    ))
+    elements.append(Spacer(1, 36))
+    
+    # Score Card - FIXED COLOR HANDLING
+    score = analysis.get('score', 0)
+    status = analysis.get('status', 'Unknown')
+    
+    # Determine status color
+    if status == "Healthy":
+        status_color = colors.green
+        color_hex = "#10B981"  # Green
+    elif status == "Watch":
+        status_color = colors.orange
+        color_hex = "#F59E0B"  # Amber
+    elif status == "Critical":
+        status_color = colors.red
+        color_hex = "#EF4444"  # Red
+    else:
+        status_color = colors.black
+        color_hex = "#000000"  # Black
+    
+    elements.append(Paragraph(
+        f"<font size=36><b>{score} / 100</b></font>",
+        styles["Heading1"]
+    ))
+    elements.append(Paragraph(
+        f"<font color={color_hex}><b>{status.upper()}</b></font>",
+        styles["Heading2"]
+    ))
+    
+    elements.append(Spacer(1, 48))
+    elements.append(Paragraph(
+        f"<i>Report Generated: {datetime.now().strftime('%d %B %Y, %I:%M %p')}</i>",
+        styles["Italic"]
+    ))
+    
+    elements.append(PageBreak())
 
-        # =====================
-        # COVER PAGE (FIXED)
-        # =====================
+    # =====================
+    # EXECUTIVE SUMMARY
+    # =====================
+    elements.append(Paragraph(
+        "<font size=16><b>EXECUTIVE SUMMARY</b></font>",
+        styles["Heading1"]
+    ))
+    elements.append(Spacer(1, 12))
+    
+    # Overall Health
+    elements.append(Paragraph(
+        "<b>Overall Financial Health</b>",
+        styles["Heading2"]
+    ))
+    elements.append(Paragraph(
+        f"Your business has achieved a financial health score of <b>{score}/100</b>, "
+        f"which is categorized as <b>{status}</b>. "
+        "This assessment considers multiple financial metrics including profitability, "
+        "liquidity, efficiency, and growth potential.",
+        styles["CustomNormal"]
+    ))
+    elements.append(Spacer(1, 12))
+    
+    # =====================
+    # DETAILED BREAKDOWN
+    # =====================
+    elements.append(Paragraph(
+        "<b>SCORE BREAKDOWN</b>",
+        styles["Heading2"]
+    ))
+    
+    # Create table for breakdown
+    breakdown_data = [['Metric', 'Score', 'Weight']]
+    breakdown = analysis.get('breakdown', {})
+    
+    if breakdown:
+        # Simple equal weight distribution
+        weight_per_item = 100 // len(breakdown) if len(breakdown) > 0 else 0
+        remaining_weight = 100 - (weight_per_item * len(breakdown))
+        
+        for i, (metric, score_value) in enumerate(breakdown.items()):
+            # Add remaining weight to the last item
+            current_weight = weight_per_item + (remaining_weight if i == len(breakdown) - 1 else 0)
+            breakdown_data.append([
+                metric.replace('_', ' ').title(),
+                str(score_value),
+                f"{current_weight}%"
+            ])
+        
+        if len(breakdown_data) > 1:
+            table = Table(breakdown_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
+            table.setStyle(BREAKDOWN_TABLE_STYLE)
+            elements.append(table)
+    
+    elements.append(Spacer(1, 20))
+    
+    # =====================
+    # RISK ASSESSMENT
+    # =====================
+    elements.append(Paragraph(
+        "<b>RISK ASSESSMENT</b>",
+        styles["Heading2"]
+    ))
+    
+    risks = analysis.get('risks', [])
+    if risks:
+        for risk in risks:
+            risk_type = risk.get('type', 'Unknown')
+            severity = risk.get('severity', 'Medium')
+            reason = risk.get('reason', '')
+            
+            # Choose style based on severity
+            if severity == 'High':
+                risk_style = 'RiskHigh'
+            elif severity == 'Medium':
+                risk_style = 'RiskMedium'
+            else:
+                risk_style = 'RiskLow'
+            
+            elements.append(Paragraph(
+                f"<b>{risk_type}</b> ({severity} Risk): {reason}",
+                styles[risk_style]
+            ))
+            elements.append(Spacer(1, 4))
+    else:
         elements.append(Paragraph(
-            "<font size=24><b>FINANCIAL HEALTH ASSESSMENT REPORT</b></font>",
-            styles["Title"]
+            "<font color=green>✓ No major financial risks detected.</font>",
+            styles["CustomNormal"]
         ))
-        elements.append(Spacer(1, 24))
-        
-        # Company Info placeholder
+    
+    elements.append(Spacer(1, 20))
+    
+    # =====================
+    # INDUSTRY BENCHMARKS
+    # =====================
+    elements.append(Paragraph(
+        "<b>INDUSTRY BENCHMARK COMPARISON</b>",
+        styles["Heading2"]
+    ))
+    
+    benchmarks = analysis.get('benchmarks', {})
+    if benchmarks:
+        benchmark_data = [['Metric', 'Your Business', 'Industry Average', 'Status']]
+        
+        for metric, data in benchmarks.items():
+            business_value = data.get('business', 'N/A')
+            industry_avg = data.get('industry_avg', 'N/A')
+            status = data.get('status', 'Neutral')
+            
+            benchmark_data.append([
+                metric.replace('_', ' ').title(),
+                str(business_value),
+                str(industry_avg),
+                status
+            ])
+        
+        if len(benchmark_data) > 1:
+            table = Table(benchmark_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1*inch])
+            table.setStyle(BENCHMARK_TABLE_STYLE)
+            
+            # Apply conditional coloring for status column
+            status_colors = [
+                ('TEXTCOLOR', (-1, i), (-1, i), BENCHMARK_STATUS_COLORS[row[3]])
+                for i, row in enumerate(benchmark_data[1:], 1)
+                if row[3] in BENCHMARK_STATUS_COLORS
+            ]
+            if status_colors:
+                table.setStyle(status_colors)
+            
+            elements.append(table)
+    
+    elements.append(Spacer(1, 20))
+    
+    # =====================
+    # WORKING CAPITAL
+    # =====================
+    working_capital = analysis.get('working_capital')
+    if working_capital:
         elements.append(Paragraph(
-            "<font size=14><b>Business Financial Analysis</b></font>",
+            "<b>WORKING CAPITAL ANALYSIS</b>",
             styles["Heading2"]
         ))
-        elements.append(Spacer(1, 36))
-        
-        # Score Card - FIXED COLOR HANDLING
-        score = analysis.get('score', 0)
-        status = analysis.get('status', 'Unknown')
-        
-        # Determine status color
-        if status == "Healthy":
-            status_color = colors.green
-            color_hex = "#10B981"  # Green
-        elif status == "Watch":
-            status_color = colors.orange
-            color_hex = "#F59E0B"  # Amber
-        elif status == "Critical":
-            status_color = colors.red
-            color_hex = "#EF4444"  # Red
-        else:
-            status_color = colors.black
-            color_hex = "#000000"  # Black
         
+        dso = working_capital.get('dso', 'N/A')
+        dpo = working_capital.get('dpo', 'N/A')
+        ccc = working_capital.get('cash_conversion_cycle', 'N/A')
+        risk_level = working_capital.get('risk_level', 'N/A')
+        
+        wc_data = [
+            ['Metric', 'Value', 'Risk Level'],
+            ['DSO (Days Sales Outstanding)', f"{dso} days", ''],
+            ['DPO (Days Payable Outstanding)', f"{dpo} days", ''],
+            ['Cash Conversion Cycle', f"{ccc} days", risk_level]
+        ]
+        
+        table = Table(wc_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
+        table.setStyle(WORKING_CAPITAL_TABLE_STYLE)
+        
+        # Color code risk level
+        if risk_level in RISK_LEVEL_COLORS:
+            table.setStyle([
+                ('TEXTCOLOR', (-1, -1), (-1, -1), RISK_LEVEL_COLORS[risk_level])
+            ])
+        
+        elements.append(table)
+        
+        # Suggested actions
+        actions = working_capital.get('actions', [])
+        if actions:
+            elements.append(Spacer(1, 10))
+            elements.append(Paragraph("<b>Suggested Actions:</b>", styles["CustomNormal"]))
+            for action in actions:
+                elements.append(Paragraph(f"• {action}", styles["InsightBullet"]))
+    
+    elements.append(Spacer(1, 20))
+    
+    # =====================
+    # FORECAST
+    # =====================
+    forecast = analysis.get('forecast', {})
+    if forecast:
         elements.append(Paragraph(
-            f"<font size=36><b>{score} / 100</b></font>",
-            styles["Heading1"]
-        ))
-        elements.append(Paragraph(
-            f"<font color={color_hex}><b>{status.upper()}</b></font>",
+            "<b>FINANCIAL FORECAST</b>",
             styles["Heading2"]
         ))
         
-        elements.append(Spacer(1, 48))
+        cash_runway = forecast.get('cash_runway_months', 'N/A')
         elements.append(Paragraph(
-            f"<i>Report Generated: {datetime.now().strftime('%d %B %Y, %I:%M %p')}</i>",
-            styles["Italic"]
+            f"<b>Estimated Cash Runway:</b> {cash_runway}",
+            styles["CustomNormal"]
         ))
         
-        elements.append(PageBreak())
+        revenue_forecast = forecast.get('revenue_forecast_6_months', [])
+        if revenue_forecast and isinstance(revenue_forecast, list):
+            elements.append(Spacer(1, 10))
+            elements.append(Paragraph("<b>6-Month Revenue Forecast:</b>", styles["CustomNormal"]))
+            
+            forecast_data = []
+            for i, amount in enumerate(revenue_forecast[:6], 1):
+                try:
+                    formatted_amount = f"₹{int(amount):,}"
+                except (ValueError, TypeError):
+                    formatted_amount = f"₹{amount}"
+                forecast_data.append([f"Month {i}", formatted_amount])
+            
+            if forecast_data:
+                table = Table(forecast_data, colWidths=[1.5*inch, 2*inch])
+                table.setStyle(FORECAST_TABLE_STYLE)
+                elements.append(table)
+    return elements
 
-        # =====================
-        # EXECUTIVE SUMMARY
-        # =====================
+def _insights_elements(ai_insights: str = None, pending: bool = False):
+    """
+    Flowables of the insights section and the disclaimer. `pending` puts a
+    marked placeholder where insights that were not ready would go.
+    """
+    styles = REPORT_STYLES
+    elements = []
+
+    # =====================
+    # AI INSIGHTS & RECOMMENDATIONS
+    # =====================
+    if pending:
         elements.append(Paragraph(
-            "<font size=16><b>EXECUTIVE SUMMARY</b></font>",
+            "<font size=16><b>AI INSIGHTS & RECOMMENDATIONS</b></font>",
             styles["Heading1"]
         ))
         elements.append(Spacer(1, 12))
-        
-        # Overall Health
-        elements.append(Paragraph(
-            "<b>Overall Financial Health</b>",
-            styles["Heading2"]
-        ))
         elements.append(Paragraph(
-            f"Your business has achieved a financial health score of <b>{score}/100</b>, "
-            f"which is categorized as <b>{status}</b>. "
-            "This assessment considers multiple financial metrics including profitability, "
-            "liquidity, efficiency, and growth potential.",
-            styles["CustomNormal"]
+            "<b>[Insights not included]</b> The AI insights were not ready in time for this "
+            "report. Download the report again in a moment to include them.",
+            styles["RiskMedium"]
         ))
-        elements.append(Spacer(1, 12))
-        
-        # =====================
-        # DETAILED BREAKDOWN
-        # =====================
-        elements.append(Paragraph(
-            "<b>SCORE BREAKDOWN</b>",
-            styles["Heading2"]
-        ))
-        
-        # Create table for breakdown
-        breakdown_data = [['Metric', 'Score', 'Weight']]
-        breakdown = analysis.get('breakdown', {})
-        
-        if breakdown:
-            # Simple equal weight distribution
-            weight_per_item = 100 // len(breakdown) if len(breakdown) > 0 else 0
-            remaining_weight = 100 - (weight_per_item * len(breakdown))
-            
-            for i, (metric, score_value) in enumerate(breakdown.items()):
-                # Add remaining weight to the last item
-                current_weight = weight_per_item + (remaining_weight if i == len(breakdown) - 1 else 0)
-                breakdown_data.append([
-                    metric.replace('_', ' ').title(),
-                    str(score_value),
-                    f"{current_weight}%"
-                ])
-            
-            if len(breakdown_data) > 1:
-                table = Table(breakdown_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
-                ]))
-                elements.append(table)
-        
         elements.append(Spacer(1, 20))
-        
-        # =====================
-        # RISK ASSESSMENT
-        # =====================
+    elif ai_insights and ai_insights != "Error generating insights. Please try again later.":
         elements.append(Paragraph(
-            "<b>RISK ASSESSMENT</b>",
-            styles["Heading2"]
+            "<font size=16><b>AI INSIGHTS & RECOMMENDATIONS</b></font>",
+            styles["Heading1"]
         ))
+        elements.append(Spacer(1, 12))
         
-        risks = analysis.get('risks', [])
-        if risks:
-            for risk in risks:
-                risk_type = risk.get('type', 'Unknown')
-                severity = risk.get('severity', 'Medium')
-                reason = risk.get('reason', '')
+        # Clean and format AI insights
+        cleaned_insights = ai_insights.strip()
+        
+        # Split into paragraphs and format
+        paragraphs = cleaned_insights.split('\n\n')
+        for para in paragraphs:
+            if para.strip():
+                # Check if paragraph contains bullet points
+                lines = para.split('\n')
+                has_bullets = any(
+                    line.strip().startswith(('•', '-', '*')) or 
+                    (len(line.strip()) > 1 and line.strip()[0].isdigit() and line.strip()[1] == '.')
+                    for line in lines
+                )
                 
-                # Choose style based on severity
-                if severity == 'High':
-                    risk_style = 'RiskHigh'
-                elif severity == 'Medium':
-                    risk_style = 'RiskMedium'
+                if has_bullets:
+                    # Handle bullet points
+                    for line in lines:
+                        line = line.strip()
+                        if line:
+                            # Format bullet points
+                            if line.startswith(('•', '-', '*')):
+                                elements.append(Paragraph(
+                                    f"• {line[1:].strip()}",
+                                    styles["InsightBullet"]
+                                ))
+                            elif line[0].isdigit() and line[1] == '.':
+                                elements.append(Paragraph(
+                                    f"{line}",
+                                    styles["InsightBullet"]
+                                ))
+                            else:
+                                elements.append(Paragraph(line, styles["CustomNormal"]))
                 else:
-                    risk_style = 'RiskLow'
-                
-                elements.append(Paragraph(
-                    f"<b>{risk_type}</b> ({severity} Risk): {reason}",
-                    styles[risk_style]
-                ))
-                elements.append(Spacer(1, 4))
-        else:
-            elements.append(Paragraph(
-                "<font color=green>✓ No major financial risks detected.</font>",
-                styles["CustomNormal"]
-            ))
-        
-        elements.append(Spacer(1, 20))
-        
-        # =====================
-        # INDUSTRY BENCHMARKS
-        # =====================
-        elements.append(Paragraph(
-            "<b>INDUSTRY BENCHMARK COMPARISON</b>",
-            styles["Heading2"]
-        ))
-        
-        benchmarks = analysis.get('benchmarks', {})
-        if benchmarks:
-            benchmark_data = [['Metric', 'Your Business', 'Industry Average', 'Status']]
-            
-            for metric, data in benchmarks.items():
-                business_value = data.get('business', 'N/A')
-                industry_avg = data.get('industry_avg', 'N/A')
-                status = data.get('status', 'Neutral')
-                
-                benchmark_data.append([
-                    metric.replace('_', ' ').title(),
-                    str(business_value),
-                    str(industry_avg),
-                    status
-                ])
-            
-            if len(benchmark_data) > 1:
-                table = Table(benchmark_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1*inch])
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-                ]))
-                
-                # Apply conditional coloring for status column
-                for i in range(1, len(benchmark_data)):
-                    status_val = benchmark_data[i][3]
-                    if status_val == 'Better':
-                        table.setStyle(TableStyle([
-                            ('TEXTCOLOR', (-1, i), (-1, i), colors.green)
-                        ]))
-                    elif status_val == 'Worse':
-                        table.setStyle(TableStyle([
-                            ('TEXTCOLOR', (-1, i), (-1, i), colors.red)
-                        ]))
-                
-                elements.append(table)
-        
-        elements.append(Spacer(1, 20))
-        
-        # =====================
-        # WORKING CAPITAL
-        # =====================
-        working_capital = analysis.get('working_capital')
-        if working_capital:
-            elements.append(Paragraph(
-                "<b>WORKING CAPITAL ANALYSIS</b>",
-                styles["Heading2"]
-            ))
-            
-            dso = working_capital.get('dso', 'N/A')
-            dpo = working_capital.get('dpo', 'N/A')
-            ccc = working_capital.get('cash_conversion_cycle', 'N/A')
-            risk_level = working_capital.get('risk_level', 'N/A')
-            
-            wc_data = [
-                ['Metric', 'Value', 'Risk Level'],
-                ['DSO (Days Sales Outstanding)', f"{dso} days", ''],
-                ['DPO (Days Payable Outstanding)', f"{dpo} days", ''],
-                ['Cash Conversion Cycle', f"{ccc} days", risk_level]
-            ]
-            
-            table = Table(wc_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ]))
-            
-            # Color code risk level
-            if risk_level == 'High':
-                table.setStyle(TableStyle([
-                    ('TEXTCOLOR', (-1, -1), (-1, -1), colors.red)
-                ]))
-            elif risk_level == 'Medium':
-                table.setStyle(TableStyle([
-                    ('TEXTCOLOR', (-1, -1), (-1, -1), colors.orange)
-                ]))
-            elif risk_level == 'Low':
-                table.setStyle(TableStyle([
-                    ('TEXTCOLOR', (-1, -1), (-1, -1), colors.green)
-                ]))
-            
-            elements.append(table)
-            
-            # Suggested actions
-            actions = working_capital.get('actions', [])
-            if actions:
-                elements.append(Spacer(1, 10))
-                elements.append(Paragraph("<b>Suggested Actions:</b>", styles["CustomNormal"]))
-                for action in actions:
-                    elements.append(Paragraph(f"• {action}", styles["InsightBullet"]))
+                    # Regular paragraph
+                    elements.append(Paragraph(para, styles["CustomNormal"]))
+                elements.append(Spacer(1, 8))
         
         elements.append(Spacer(1, 20))
+    
+    # =====================
+    # DISCLAIMER
+    # =====================
+    elements.append(Paragraph(
+        "<font size=9><i>Disclaimer: This report is generated by AI and is for informational purposes only. "
+        "It does not constitute financial advice. Please consult with a qualified financial advisor "
+        "before making any business decisions. Generated on "
+        f"{datetime.now().strftime('%d %B %Y')}.</i></font>",
+        styles["Italic"]
+    ))
+    return elements
+
+def _report_elements(analysis: dict, ai_insights: str = None, business_name: str = None):
+    """Flowables of one business's report, from its cover page to the disclaimer."""
+    return _analysis_elements(analysis, business_name) + [PageBreak()] + _insights_elements(ai_insights)
+
+def generate_pdf_report(analysis: dict, ai_insights: str = None):
+    """
+    Generate a comprehensive PDF financial health report.
+    
+    Args:
+        analysis: Dictionary containing financial analysis data
+        ai_insights: AI-generated insights text (optional)
+    
+    Returns:
+        BytesIO buffer containing PDF
+    """
+    try:
+        buffer = BytesIO()
+        doc = _ReportDocTemplate(
+            buffer, 
+            pagesize=A4,
+            title="Financial Health Assessment Report",
+            author="Financial Analysis System"
+        )
+        elements = _report_elements(analysis, ai_insights)
         
-        # =====================
-        # FORECAST
-        # =====================
-        forecast = analysis.get('forecast', {})
-        if forecast:
-            elements.append(Paragraph(
-                "<b>FINANCIAL FORECAST</b>",
-                styles["Heading2"]
-            ))
-            
-            cash_runway = forecast.get('cash_runway_months', 'N/A')
-            elements.append(Paragraph(
-                f"<b>Estimated Cash Runway:</b> {cash_runway}",
-                styles["CustomNormal"]
-            ))
-            
-            revenue_forecast = forecast.get('revenue_forecast_6_months', [])
-            if revenue_forecast and isinstance(revenue_forecast, list):
-                elements.append(Spacer(1, 10))
-                elements.append(Paragraph("<b>6-Month Revenue Forecast:</b>", styles["CustomNormal"]))
-                
-                forecast_data = []
-                for i, amount in enumerate(revenue_forecast[:6], 1):
-                    try:
-                        formatted_amount = f"₹{int(amount):,}"
-                    except (ValueError, TypeError):
-                        formatted_amount = f"₹{amount}"
-                    forecast_data.append([f"Month {i}", formatted_amount])
-                
-                if forecast_data:
-                    table = Table(forecast_data, colWidths=[1.5*inch, 2*inch])
-                    table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-                    ]))
-                    elements.append(table)
-        
-        elements.append(PageBreak())
-        
-        # =====================
-        # AI INSIGHTS & RECOMMENDATIONS
-        # =====================
-        if ai_insights and ai_insights != "Error generating insights. Please try again later.":
-            elements.append(Paragraph(
-                "<font size=16><b>AI INSIGHTS & RECOMMENDATIONS</b></font>",
-                styles["Heading1"]
-            ))
-            elements.append(Spacer(1, 12))
-            
-            # Clean and format AI insights
-            cleaned_insights = ai_insights.strip()
-            
-            # Split into paragraphs and format
-            paragraphs = cleaned_insights.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    # Check if paragraph contains bullet points
-                    lines = para.split('\n')
-                    has_bullets = any(
-                        line.strip().startswith(('•', '-', '*')) or 
-                        (len(line.strip()) > 1 and line.strip()[0].isdigit() and line.strip()[1] == '.')
-                        for line in lines
-                    )
-                    
-                    if has_bullets:
-                        # Handle bullet points
-                        for line in lines:
-                            line = line.strip()
-                            if line:
-                                # Format bullet points
-                                if line.startswith(('•', '-', '*')):
-                                    elements.append(Paragraph(
-                                        f"• {line[1:].strip()}",
-                                        styles["InsightBullet"]
-                                    ))
-                                elif line[0].isdigit() and line[1] == '.':
-                                    elements.append(Paragraph(
-                                        f"{line}",
-                                        styles["InsightBullet"]
-                                    ))
-                                else:
-                                    elements.append(Paragraph(line, styles["CustomNormal"]))
-                    else:
-                        # Regular paragraph
-                        elements.append(Paragraph(para, styles["CustomNormal"]))
-                    elements.append(Spacer(1, 8))
-            
-            elements.append(Spacer(1, 20))
-        
-        # =====================
-        # DISCLAIMER
-        # =====================
-        elements.append(Paragraph(
-            "<font size=9><i>Disclaimer: This report is generated by AI and is for informational purposes only. "
-            "It does not constitute financial advice. Please consult with a qualified financial advisor "
-            "before making any business decisions. Generated on "
-            f"{datetime.now().strftime('%d %B %Y')}.</i></font>",
-            styles["Italic"]
-        ))
-        
-        # =====================
-        # ADD PAGE NUMBERS
-        # =====================
-        def add_page_numbers(canvas, doc):
-            canvas.saveState()
-            canvas.setFont('Helvetica', 8)
-            page_num = f"Page {doc.page}"
-            canvas.drawRightString(A4[0] - 50, 30, page_num)
-            canvas.restoreState()
-        
-        # Build document
-        doc.build(elements, onFirstPage=add_page_numbers, onLaterPages=add_page_numbers)
+        # Build document, with page numbers
+        doc.build(elements, onFirstPage=_add_page_numbers, onLaterPages=_add_page_numbers)
         buffer.seek(0)
         logger.info("PDF report generated successfully")
         return buffer
         
     except Exception as e:
         logger.error(f"Error in PDF generation: {str(e)}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+
+# Reports in two sections, so the pages that do not depend on the AI
+# insights can be rendered while the insights are still being generated
+def _render_section(elements, first_page):
+    buffer = BytesIO()
+    doc = _ReportDocTemplate(buffer, pagesize=A4)
+    on_page = partial(_add_page_numbers, offset=first_page - 1)
+    doc.build(elements, onFirstPage=on_page, onLaterPages=on_page)
+    return buffer.getvalue()
+
+def render_report_body(analysis: dict):
+    """
+    The pages of generate_pdf_report that do not depend on the AI
+    insights (cover to forecast), as PDF bytes for finish_report.
+    """
+    return _render_section(_analysis_elements(analysis), 1)
+
+def finish_report(body: bytes, ai_insights: str = None, insights_pending: bool = False):
+    """
+    The full report: `body` from render_report_body, then the insights
+    section (a marked placeholder when `insights_pending`) and the
+    disclaimer. Same pages as generate_pdf_report.
+
+    Returns:
+        PDF bytes
+    """
+    buffer = BytesIO()
+    writer = PDFStreamWriter(
+        buffer.write,
+        title="Financial Health Assessment Report",
+        author="Financial Analysis System"
+    )
+    writer.add(body)
+    writer.add(_render_section(
+        _insights_elements(ai_insights, pending=insights_pending), writer.page_count + 1
+    ))
+    writer.close()
+    logger.info("PDF report generated successfully")
+    return buffer.getvalue()
+
+
+_report_pool = None
+
+def get_report_pool():
+    """Shared pool for bulk rendering; None when REPORT_WORKERS is 1."""
+    global _report_pool
+    if _report_pool is None and REPORT_WORKERS > 1:
+        _report_pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS)
+    return _report_pool
+
+def _render_one(report):
+    name, analysis, ai_insights = report
+    try:
+        return name, generate_pdf_report(analysis, ai_insights).getvalue(), None
+    except Exception as e:
+        # One bad analysis must not sink the rest of the batch
+        return name, None, f"{type(e).__name__}: {e}"
+
+def _report_filename(name, used):
+    stem = re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("._")[:100] or "report"
+    filename = f"{stem}.pdf"
+    n = 1
+    while filename in used:
+        n += 1
+        filename = f"{stem}_{n}.pdf"
+    used.add(filename)
+    return filename
+
+def render_reports(reports, output, pool=None):
+    """
+    Render many reports across a process pool (default get_report_pool()).
+
+    `reports` is an iterable of (name, analysis, ai_insights); `output` is
+    a directory, or a path ending in .zip for a single archive. Each report
+    is written as <name>.pdf as soon as it is rendered. Reports that fail
+    are listed in failed.json next to them.
+
+    Returns {"rendered": count, "failed": [{"name", "error"}]}.
+    """
+    if pool is None:
+        pool = get_report_pool()
+    if pool is None:
+        rendered = map(_render_one, reports)
+    else:
+        rendered = pool.map(_render_one, reports, chunksize=REPORT_CHUNK_SIZE)
+
+    archive = None
+    if output.endswith(".zip"):
+        # PDF streams are already compressed
+        archive = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED)
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    def write(filename, data):
+        if archive is not None:
+            archive.writestr(filename, data)
+        else:
+            with open(os.path.join(output, filename), "wb") as f:
+                f.write(data)
+
+    used = set()
+    count = 0
+    failed = []
+    try:
+        for name, pdf_bytes, error in rendered:
+            if error is not None:
+                failed.append({"name": name, "error": error})
+                continue
+            write(_report_filename(name, used), pdf_bytes)
+            count += 1
+
+        if failed:
+            write("failed.json", json.dumps(failed, indent=2).encode("utf-8"))
+    finally:
+        if archive is not None:
+            archive.close()
+
+    logger.info(f"Bulk rendering wrote {count} reports to {output}, {len(failed)} failed")
+    return {"rendered": count, "failed": failed}
+
+
+# =====================
+# PORTFOLIO REPORTS
+# =====================
+# Overview rows per section; the table is split across sections so no
+# section grows with the size of the portfolio
+PORTFOLIO_TABLE_ROWS = 200
+
+PORTFOLIO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('ALIGN', (1, 0), (2, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+])
+
+def _business_name(result, position):
+    return f"Business {result.get('business_id', position + 1)}"
+
+def _portfolio_overview(results):
+    styles = REPORT_STYLES
+    scored = [r for r in results if "error" not in r]
+    statuses = Counter(r.get('status', 'Unknown') for r in scored)
+    average = sum(r.get('score', 0) for r in scored) / len(scored) if scored else 0
+
+    elements = [
+        Paragraph("<font size=24><b>PORTFOLIO FINANCIAL HEALTH REPORT</b></font>", styles["Title"]),
+        Spacer(1, 24),
+        Paragraph(
+            f"<b>{len(results)}</b> businesses, <b>{len(scored)}</b> scored. "
+            f"Average score <b>{average:.1f}/100</b>.",
+            styles["CustomNormal"]
+        ),
+    ]
+    if statuses:
+        elements.append(Paragraph(
+            ", ".join(f"{status}: <b>{count}</b>" for status, count in sorted(statuses.items())),
+            styles["CustomNormal"]
+        ))
+    elements.append(Paragraph(
+        f"<i>Report Generated: {datetime.now().strftime('%d %B %Y, %I:%M %p')}</i>",
+        styles["Italic"]
+    ))
+    elements.append(Spacer(1, 24))
+    return elements + _portfolio_table(results, 0)
+
+def _portfolio_table(results, start):
+    rows = [['Business', 'Score', 'Status', 'Risks']]
+    for position in range(start, min(start + PORTFOLIO_TABLE_ROWS, len(results))):
+        result = results[position]
+        name = escape(_business_name(result, position))
+        if "error" in result:
+            rows.append([name, '-', 'Error', Paragraph(escape(str(result['error'])), REPORT_STYLES["CustomNormal"])])
+        else:
+            risks = ", ".join(risk.get('type', 'Unknown') for risk in result.get('risks', [])) or "None"
+            rows.append([name, str(result.get('score', 0)), result.get('status', 'Unknown'),
+                         Paragraph(escape(risks), REPORT_STYLES["CustomNormal"])])
+
+    table = Table(rows, colWidths=[1.8*inch, 0.8*inch, 1*inch, 3*inch], repeatRows=1)
+    table.setStyle(PORTFOLIO_TABLE_STYLE)
+    return [table]
+
+def _portfolio_sections(results):
+    """
+    (name, build) for each section of a portfolio report, in order; each
+    build() returns the section's flowables, which start on a new page.
+    """
+    yield "Overview", partial(_portfolio_overview, results)
+    for start in range(PORTFOLIO_TABLE_ROWS, len(results), PORTFOLIO_TABLE_ROWS):
+        yield "Overview", partial(_portfolio_table, results, start)
+
+    for position, result in enumerate(results):
+        if "error" not in result:
+            name = _business_name(result, position)
+            yield name, partial(_report_elements, result, None, name)
+
+def _failed_section(name, error):
+    return [
+        Paragraph(f"<b>{escape(name)}</b>", REPORT_STYLES["Heading2"]),
+        Paragraph(
+            f"This section could not be generated: {escape(type(error).__name__)}.",
+            REPORT_STYLES["CustomNormal"]
+        ),
+    ]
+
+def stream_portfolio_report(results: list):
+    """
+    Generate a portfolio report, as a generator of PDF byte chunks.
+
+    Args:
+        results: Per-business results of analyze_portfolio; entries with
+            an "error" are listed in the overview only
+
+    Each section (an overview page range, then each business's report) is
+    rendered on its own and yielded as soon as it is done, so memory stays
+    at about one section whatever the page count and the first bytes go
+    out after the first section. A business whose section fails gets a
+    short note in its place: earlier bytes are already sent.
+    """
+    chunks = []
+    writer = PDFStreamWriter(
+        chunks.append,
+        title="Portfolio Financial Health Report",
+        author="Financial Analysis System"
+    )
+
+    for name, build in _portfolio_sections(results):
+        first_page = writer.page_count + 1
+        try:
+            pdf = _render_section(build(), first_page)
+        except Exception as e:
+            logger.error(f"Portfolio report section {name} failed: {str(e)}", exc_info=True)
+            pdf = _render_section(_failed_section(name, e), first_page)
+        writer.add(pdf)
+        yield b"".join(chunks)
+        chunks.clear()
+
+    writer.close()
+    yield b"".join(chunks)
+    logger.info(f"Portfolio report generated: {len(results)} businesses, {writer.page_count} pages")
@@ -0,0 +1,130 @@
+import re
+from datetime import datetime
+
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_TRAILER_REF = re.compile(rb"/(Root|Info) (\d+) 0 R")
+_OBJ_HEADER = re.compile(rb"\d+ \d+ obj\s*")
+_STREAM_START = re.compile(rb">>\s*stream\r?\n")
+_REF = re.compile(rb"(\d+) 0 R\b")
+
+# The writer's own objects; those of the added documents follow
+CATALOG, PAGES, INFO = 1, 2, 3
+
+
+def _pdf_string(text):
+    escaped = str(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1", "replace") + b")"
+
+
+def _read_objects(pdf: bytes):
+    """
+    ({number: object body}, root, info) of a PDF with a classic xref table,
+    as reportlab writes them. Bodies run from after "N 0 obj" to the end
+    of "endobj".
+    """
+    xref_at = int(pdf[pdf.rindex(b"startxref") + 9:].split()[0])
+    trailer_at = pdf.index(b"trailer", xref_at)
+    lines = pdf[xref_at:trailer_at].split(b"\n")
+    first = int(lines[1].split()[0])
+
+    offsets = {}
+    for number, entry in enumerate(lines[2:], first):
+        match = _XREF_ENTRY.match(entry)
+        if match and match.group(3) == b"n":
+            offsets[number] = int(match.group(1))
+
+    # Each object ends where the next one (or the xref table) starts
+    starts = sorted((offset, number) for number, offset in offsets.items())
+    objects = {}
+    for (offset, number), (end, _) in zip(starts, starts[1:] + [(xref_at, None)]):
+        body = pdf[offset:end]
+        objects[number] = body[_OBJ_HEADER.match(body).end():]
+
+    refs = dict(_TRAILER_REF.findall(pdf[trailer_at:]))
+    info = refs.get(b"Info")
+    return objects, int(refs[b"Root"]), int(info) if info is not None else None
+
+
+class PDFStreamWriter:
+    """
+    Writes one PDF out of many small ones, added in page order.
+
+    Each add() renumbers the document's objects and writes them through
+    `write` straight away; only an offset per object and the page list are
+    kept, so memory does not grow with the pages already written. close()
+    writes the page tree, catalog, xref table and trailer.
+    """
+
+    def __init__(self, write, title=None, author=None):
+        self._write = write
+        self._position = 0
+        # Index 0 is the xref table's free entry
+        self._offsets = [0, None, None, None]
+        self._kids = []
+        self._info = {"Title": title, "Author": author}
+        self._emit(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    @property
+    def page_count(self):
+        return len(self._kids)
+
+    def _emit(self, data):
+        self._write(data)
+        self._position += len(data)
+
+    def _emit_object(self, number, body):
+        self._offsets[number] = self._position
+        self._emit(b"%d 0 obj\n" % number + body)
+
+    def add(self, pdf: bytes):
+        """Append every page of `pdf`. Returns how many there were."""
+        objects, root, info = _read_objects(pdf)
+        pages_root = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+        kids = [int(n) for n in _REF.findall(
+            re.search(rb"/Kids \[([^\]]*)\]", objects[pages_root]).group(1)
+        )]
+
+        # The document's own catalog, page tree and info give way to ours
+        numbers = {pages_root: PAGES}
+        for number in objects:
+            if number not in (root, info, pages_root):
+                numbers[number] = len(self._offsets)
+                self._offsets.append(None)
+
+        def renumber(match):
+            return b"%d 0 R" % numbers[int(match.group(1))]
+
+        for number, body in objects.items():
+            if number in (root, info, pages_root):
+                continue
+            # References are only rewritten in the dictionary, never in
+            # stream data
+            stream = _STREAM_START.search(body)
+            split = stream.start() if stream else len(body)
+            self._emit_object(numbers[number], _REF.sub(renumber, body[:split]) + body[split:])
+
+        self._kids.extend(numbers[kid] for kid in kids)
+        return len(kids)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % kid for kid in self._kids)
+        self._emit_object(
+            PAGES,
+            b"<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n" % (len(self._kids), kids),
+        )
+        self._emit_object(
+            CATALOG, b"<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>\nendobj\n" % PAGES
+        )
+        info = {key: value for key, value in self._info.items() if value is not None}
+        info["CreationDate"] = datetime.now().strftime("D:%Y%m%d%H%M%S")
+        entries = b" ".join(b"/%s %s" % (key.encode(), _pdf_string(value)) for key, value in info.items())
+        self._emit_object(INFO, b"<<\n" + entries + b"\n>>\nendobj\n")
+
+        xref_at = self._position
+        table = [b"xref\n0 %d\n" % len(self._offsets), b"0000000000 65535 f \n"]
+        table.extend(b"%010d 00000 n \n" % offset for offset in self._offsets[1:])
+        self._emit(b"".join(table))
+        self._emit(
+            b"trailer\n<<\n/Info %d 0 R\n/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n"
+            % (INFO, CATALOG, len(self._offsets), xref_at)
+        )
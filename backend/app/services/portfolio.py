@@ -0,0 +1,341 @@
+from operator import itemgetter
+
+import numpy as np
+
+from app.services.benchmarking import INDUSTRY_BENCHMARKS
+from app.services.metrics import exact_row_sums
+
+# Columns the batch path needs from every business
+REQUIRED_COLUMNS = [
+    "revenue",
+    "expense_amount",
+    "loan_emi",
+    "accounts_receivable",
+    "accounts_payable",
+]
+OPTIONAL_COLUMNS = ["gst_due"]
+PACKED_COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+
+
+class PortfolioBlock:
+    """
+    Businesses that share a history length, packed as (business x month)
+    float arrays, so month tallies need no padding mask. Row totals are
+    exact sums, the same numbers the single-business path computes.
+    """
+
+    def __init__(self, positions, business_ids, industries, columns, has_gst_due):
+        self.positions = positions
+        self.business_ids = business_ids
+        self.industries = industries
+        self.columns = columns
+        self.has_gst_due = has_gst_due
+        self.months = columns["revenue"].shape[1]
+
+    def __len__(self):
+        return len(self.positions)
+
+
+def _present(records, column):
+    return any(column in record for record in records)
+
+
+_pick_all = itemgetter(*PACKED_COLUMNS)
+
+
+def _month_rows(records):
+    try:
+        return [_pick_all(record) for record in records]
+    except KeyError:
+        return [
+            tuple(record.get(column, np.nan) for column in PACKED_COLUMNS)
+            for record in records
+        ]
+
+
+def _non_numeric_columns(records):
+    bad = []
+    for column in PACKED_COLUMNS:
+        try:
+            np.array([record.get(column, np.nan) for record in records], dtype=float)
+        except (TypeError, ValueError):
+            bad.append(column)
+    return bad
+
+
+def _pack_members(members, errors):
+    # (business, month, column) floats for a group, converted in one go. A
+    # value that is not a number fails the whole conversion, so the group is
+    # then converted business by business and the bad ones are reported.
+    try:
+        return members, np.array(
+            [_month_rows(business["monthly_data"]) for _, business, _ in members],
+            dtype=float,
+        )
+    except (TypeError, ValueError):
+        pass
+
+    kept, rows = [], []
+    for member in members:
+        position, business, _ = member
+        try:
+            rows.append(np.array(_month_rows(business["monthly_data"]), dtype=float))
+        except (TypeError, ValueError):
+            bad = _non_numeric_columns(business["monthly_data"])
+            errors[position] = f"Non-numeric values in: {', '.join(bad)}"
+            continue
+        kept.append(member)
+    return kept, np.array(rows, dtype=float)
+
+
+def pack_portfolio(businesses: list, default_industry: str = "Retail"):
+    """
+    Group businesses by number of months and pack each group into arrays.
+
+    Returns (blocks, errors) where errors maps input position to a message
+    for businesses that cannot be scored.
+    """
+    groups = {}
+    errors = {}
+
+    for position, business in enumerate(businesses):
+        records = business.get("monthly_data") or []
+        industry = business.get("industry", default_industry)
+
+        if not records:
+            errors[position] = "monthly_data is empty"
+            continue
+        if industry not in INDUSTRY_BENCHMARKS:
+            errors[position] = "Unsupported industry"
+            continue
+        missing = [c for c in REQUIRED_COLUMNS if not _present(records, c)]
+        if missing:
+            errors[position] = f"Missing columns: {', '.join(missing)}"
+            continue
+
+        groups.setdefault(len(records), []).append((position, business, industry))
+
+    blocks = []
+    for members in groups.values():
+        # Convert the group, then lay each column out as its own contiguous
+        # (business x month) array.
+        members, packed = _pack_members(members, errors)
+        if not members:
+            continue
+        packed = np.ascontiguousarray(np.moveaxis(packed, 2, 0))
+        columns = dict(zip(PACKED_COLUMNS, packed))
+
+        blocks.append(PortfolioBlock(
+            positions=[position for position, _, _ in members],
+            business_ids=[
+                business.get("business_id", position)
+                for position, business, _ in members
+            ],
+            industries=[industry for _, _, industry in members],
+            columns=columns,
+            has_gst_due=np.array(
+                [_present(business["monthly_data"], "gst_due") for _, business, _ in members]
+            ),
+        ))
+
+    return blocks, errors
+
+
+def _row_means(values):
+    sums = exact_row_sums(values)
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def score_block(block: PortfolioBlock):
+    """
+    Vectorized equivalent of calculate_health_score, health_status,
+    identify_risks and compute_business_metrics for one block.
+    """
+    cols = block.columns
+    revenue = cols["revenue"]
+    expense = cols["expense_amount"]
+    emi = cols["loan_emi"]
+
+    total_revenue = exact_row_sums(revenue)
+    total_expenses = exact_row_sums(expense)
+    total_emi = exact_row_sums(emi)
+    revenue_floor = np.maximum(total_revenue, 1)
+
+    monthly_cash = revenue - expense - emi
+    positive_months = np.count_nonzero(monthly_cash > 0, axis=1)
+    negative_months = np.count_nonzero(monthly_cash < 0, axis=1)
+    total_months = block.months
+
+    cash_flow_score = (positive_months / total_months) * 25
+
+    profit_margin = (total_revenue - total_expenses) / revenue_floor
+    profitability_score = np.select(
+        [profit_margin >= 0.2, profit_margin >= 0.1, profit_margin > 0],
+        [20, 15, 8],
+        default=0,
+    )
+
+    expense_ratio = total_expenses / revenue_floor
+    expense_score = np.select(
+        [expense_ratio <= 0.6, expense_ratio <= 0.75, expense_ratio <= 0.9],
+        [15, 10, 5],
+        default=0,
+    )
+
+    receivables = _row_means(cols["accounts_receivable"])
+    payables = np.maximum(_row_means(cols["accounts_payable"]), 1)
+    liquidity_ratio = receivables / payables
+    liquidity_score = np.select(
+        [liquidity_ratio >= 1.5, liquidity_ratio >= 1.0, liquidity_ratio >= 0.7],
+        [15, 10, 5],
+        default=0,
+    )
+
+    debt_ratio = total_emi / revenue_floor
+    debt_score = np.select(
+        [debt_ratio <= 0.1, debt_ratio <= 0.2, debt_ratio <= 0.3],
+        [15, 10, 5],
+        default=0,
+    )
+
+    gst_due = cols["gst_due"]
+    gst_months_paid = np.count_nonzero(gst_due == 0, axis=1)
+    delayed_gst_months = np.count_nonzero(gst_due > 0, axis=1)
+    tax_score = np.where(
+        block.has_gst_due, (gst_months_paid / total_months) * 10, 3
+    )
+
+    total_score = np.rint(
+        cash_flow_score + profitability_score + expense_score +
+        liquidity_score + debt_score + tax_score
+    ).astype(int)
+
+    status = np.select(
+        [total_score >= 75, total_score >= 50], ["Healthy", "Watch"], default="At Risk"
+    )
+
+    return {
+        "total_score": total_score,
+        "status": status,
+        "cash_flow_score": cash_flow_score,
+        "profitability_score": profitability_score,
+        "expense_score": expense_score,
+        "liquidity_score": liquidity_score,
+        "debt_score": debt_score,
+        "tax_score": tax_score,
+        "cash_flow_risk": negative_months >= 3,
+        "expense_risk": expense_ratio > 0.75,
+        "debt_risk": debt_ratio > 0.2,
+        "tax_risk": delayed_gst_months >= 2,
+        "profit_margin": profit_margin,
+        "expense_ratio": expense_ratio,
+        "debt_ratio": debt_ratio,
+        "liquidity_ratio": liquidity_ratio,
+    }
+
+
+RISK_FLAGS = [
+    ("cash_flow_risk", {
+        "type": "Cash Flow Risk",
+        "severity": "High",
+        "reason": "Negative cash flow in 3 or more months"
+    }),
+    ("expense_risk", {
+        "type": "Expense Risk",
+        "severity": "Medium",
+        "reason": "Expenses exceed 75% of revenue"
+    }),
+    ("debt_risk", {
+        "type": "Debt Risk",
+        "severity": "High",
+        "reason": "Loan EMIs consume more than 20% of revenue"
+    }),
+    ("tax_risk", {
+        "type": "Tax Compliance Risk",
+        "severity": "Medium",
+        "reason": "GST dues pending in multiple months"
+    }),
+]
+
+BENCHMARK_METRICS = ["profit_margin", "expense_ratio", "debt_ratio", "liquidity_ratio"]
+
+
+def _benchmark_block(block: PortfolioBlock, scored: dict):
+    # Business metrics are rounded with Python's round() so they match
+    # compute_business_metrics digit for digit.
+    business = {
+        metric: np.array([round(v, 2) for v in scored[metric].tolist()])
+        for metric in BENCHMARK_METRICS
+    }
+    industry_avg = {
+        metric: np.array([INDUSTRY_BENCHMARKS[i][metric] for i in block.industries])
+        for metric in BENCHMARK_METRICS
+    }
+
+    comparisons = [{} for _ in range(len(block))]
+    for metric in BENCHMARK_METRICS:
+        diff = business[metric] - industry_avg[metric]
+        status = np.select([diff > 0, diff < 0], ["Better", "Worse"], default="Same")
+
+        for row, (b, avg, d, s) in enumerate(zip(
+            business[metric].tolist(),
+            industry_avg[metric].tolist(),
+            diff.tolist(),
+            status.tolist(),
+        )):
+            comparisons[row][metric] = {
+                "business": b,
+                "industry_avg": avg,
+                "difference": round(d, 2),
+                "status": s
+            }
+
+    return comparisons
+
+
+def analyze_portfolio(businesses: list, default_industry: str = "Retail"):
+    """
+    Score many businesses at once.
+
+    Each result carries the same score, status, breakdown, risks and
+    benchmarks that /analyze returns for that business on its own.
+    """
+    blocks, errors = pack_portfolio(businesses, default_industry)
+    results = [None] * len(businesses)
+
+    for position, message in errors.items():
+        results[position] = {
+            "business_id": businesses[position].get("business_id", position),
+            "error": message
+        }
+
+    for block in blocks:
+        scored = score_block(block)
+        comparisons = _benchmark_block(block, scored)
+
+        columns = {key: value.tolist() for key, value in scored.items()}
+        for row, position in enumerate(block.positions):
+            results[position] = {
+                "business_id": block.business_ids[row],
+                "score": columns["total_score"][row],
+                "status": columns["status"][row],
+                "breakdown": {
+                    "cash_flow": round(columns["cash_flow_score"][row], 1),
+                    "profitability": columns["profitability_score"][row],
+                    "expenses": columns["expense_score"][row],
+                    "liquidity": columns["liquidity_score"][row],
+                    "debt": columns["debt_score"][row],
+                    "tax": (
+                        round(columns["tax_score"][row], 1)
+                        if block.has_gst_due[row] else 3
+                    )
+                },
+                "risks": [
+                    risk.copy() for flag, risk in RISK_FLAGS if columns[flag][row]
+                ],
+                "benchmarks": comparisons[row]
+            }
+
+    return results
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+
+from app.core.cache import DiskCache, canonical_hash
+from app.core.config import (
+    REPORT_CACHE_DIR,
+    REPORT_CACHE_MAX_BYTES,
+    REPORT_POINTER_MAX_ENTRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+# A pointer file holds one 64-character report key
+POINTER_BYTES = 64
+
+# Rendered PDFs keyed by analysis + insights text. Each analysis also points
+# at the report last rendered for it, so a repeat download is found before
+# the LLM is asked for insights. Pointers have their own LRU bound, and one
+# found leading to an evicted PDF is deleted.
+report_cache = (
+    DiskCache(REPORT_CACHE_DIR, suffix=".pdf", max_bytes=REPORT_CACHE_MAX_BYTES)
+    if REPORT_CACHE_DIR else None
+)
+report_pointers = (
+    DiskCache(
+        REPORT_CACHE_DIR, suffix=".ref", max_bytes=REPORT_POINTER_MAX_ENTRIES * POINTER_BYTES
+    )
+    if REPORT_CACHE_DIR else None
+)
+
+
+def report_key(analysis: dict, ai_insights: str) -> str:
+    return canonical_hash({"analysis": analysis, "insights": ai_insights})
+
+
+def report_etag(pdf: bytes) -> str:
+    """Strong ETag: a hash of the exact bytes served."""
+    return f'"{hashlib.sha256(pdf).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match compares weakly: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def get_report(key: str):
+    """The cached PDF stored under `key`, or None."""
+    if report_cache is None:
+        return None
+    return report_cache.get(key)
+
+
+def get_cached_report(analysis: dict):
+    """(key, pdf) of the report last rendered for `analysis`, or None."""
+    if report_pointers is None:
+        return None
+    analysis_key = canonical_hash(analysis)
+    pointer = report_pointers.get(analysis_key)
+    if pointer is None:
+        return None
+    key = pointer.decode("ascii")
+    pdf = get_report(key)
+    if pdf is None:
+        # The PDF was evicted
+        report_pointers.delete(analysis_key)
+        return None
+    return key, pdf
+
+
+def store_report(analysis: dict, ai_insights: str, pdf: bytes) -> str:
+    """Cache a rendered report; returns its key. A full disk only costs the cache."""
+    key = report_key(analysis, ai_insights)
+    if report_cache is None:
+        return key
+    try:
+        # The PDF first, so a pointer never leads to a report not yet written
+        report_cache.set(key, pdf)
+        report_pointers.set(canonical_hash(analysis), key.encode("ascii"))
+    except OSError as e:
+        logger.warning(f"Could not write report to disk cache: {str(e)}")
+    return key
@@ -1,9 +1,14 @@
-def identify_risks(df):
+from app.services.metrics import build_aggregates
+
+
+def identify_risks(df, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
     risks = []
 
     # Cash Flow Risk
-    monthly_cash = df["revenue"] - df["expense_amount"] - df["loan_emi"]
-    negative_months = (monthly_cash < 0).sum()
+    negative_months = aggregates.negative_cash_months
     if negative_months >= 3:
         risks.append({
             "type": "Cash Flow Risk",
@@ -12,8 +17,8 @@ def identify_risks(df):
         })
 
     # Expense Risk
-    total_revenue = df["revenue"].sum()
-    total_expenses = df["expense_amount"].sum()
+    total_revenue = aggregates.sum("revenue")
+    total_expenses = aggregates.sum("expense_amount")
     expense_ratio = total_expenses / max(total_revenue, 1)
     if expense_ratio > 0.75:
         risks.append({
@@ -23,7 +28,7 @@ def identify_risks(df):
         })
 
     # Debt Risk
-    total_emi = df["loan_emi"].sum()
+    total_emi = aggregates.sum("loan_emi")
     debt_ratio = total_emi / max(total_revenue, 1)
     if debt_ratio > 0.2:
         risks.append({
@@ -33,7 +38,7 @@ def identify_risks(df):
         })
 
     # Tax Compliance Risk
-    delayed_gst_months = (df["gst_due"] > 0).sum()
+    delayed_gst_months = aggregates.gst_pending_months
     if delayed_gst_months >= 2:
         risks.append({
             "type": "Tax Compliance Risk",
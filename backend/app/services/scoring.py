@@ -1,11 +1,16 @@
-def calculate_health_score(df):
-    total_revenue = df["revenue"].sum()
-    total_expenses = df["expense_amount"].sum()
-    total_emi = df["loan_emi"].sum()
+from app.services.metrics import build_aggregates
 
-    monthly_cash = df["revenue"] - df["expense_amount"] - df["loan_emi"]
-    positive_months = (monthly_cash > 0).sum()
-    total_months = len(df)
+
+def calculate_health_score(df, aggregates=None):
+    if aggregates is None:
+        aggregates = build_aggregates(df)
+
+    total_revenue = aggregates.sum("revenue")
+    total_expenses = aggregates.sum("expense_amount")
+    total_emi = aggregates.sum("loan_emi")
+
+    positive_months = aggregates.positive_cash_months
+    total_months = aggregates.months
 
     cash_flow_score = (positive_months / total_months) * 25
 
@@ -29,8 +34,8 @@ def calculate_health_score(df):
     else:
         expense_score = 0
 
-    receivables = df["accounts_receivable"].mean()
-    payables = max(df["accounts_payable"].mean(), 1)
+    receivables = aggregates.mean("accounts_receivable")
+    payables = max(aggregates.mean("accounts_payable"), 1)
     liquidity_ratio = receivables / payables
 
     if liquidity_ratio >= 1.5:
@@ -52,8 +57,8 @@ def calculate_health_score(df):
     else:
         debt_score = 0
 
-    gst_months_paid = (df["gst_due"] == 0).sum()
-    if "gst_due" in df.columns:
+    if aggregates.has("gst_due"):
+        gst_months_paid = aggregates.gst_clear_months
         tax_score = (gst_months_paid / total_months) * 10
     else:
         tax_score = 3
@@ -1,36 +1,221 @@
-from groq import Groq
-from app.core.config import GROQ_API_KEY
+from app.core.cache import DiskCache, LRUCache, canonical_hash
+from app.core.config import (
+    TRANSLATION_CACHE_DIR,
+    TRANSLATION_CACHE_MAX_BYTES,
+    TRANSLATION_CACHE_SIZE,
+    TRANSLATION_CACHE_TTL,
+)
+from app.services.llm_client import chat_completion, stream_chat_completion
+import asyncio
 import logging
+import re
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
-# Initialize Groq client
-client = Groq(api_key=GROQ_API_KEY)
-def translate_text(text, language):
+
+TRANSLATION_MODEL = "llama-3.1-8b-instant"
+TRANSLATION_TEMPERATURE = 0.3
+TRANSLATION_MAX_TOKENS = 1024
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+WHITESPACE = re.compile(r"\s+")
+
+# Insights reuse the same paragraphs across businesses, so translations are
+# cached per paragraph and language rather than per document.
+segment_cache = LRUCache(maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL)
+segment_disk_cache = (
+    DiskCache(TRANSLATION_CACHE_DIR, suffix=".txt", max_bytes=TRANSLATION_CACHE_MAX_BYTES)
+    if TRANSLATION_CACHE_DIR else None
+)
+segment_stats = {"hits": 0, "misses": 0}
+
+
+def split_segments(text):
+    return [segment for segment in PARAGRAPH_BREAK.split(text) if segment.strip()]
+
+
+def segment_key(segment, language):
+    normalized = WHITESPACE.sub(" ", segment).strip()
+    return canonical_hash({
+        "segment": normalized,
+        "language": language,
+        "model": TRANSLATION_MODEL,
+    })
+
+
+def get_cached_segment(key):
+    translation = segment_cache.get(key)
+    if translation is None and segment_disk_cache is not None:
+        stored = segment_disk_cache.get(key)
+        if stored is not None:
+            translation = stored.decode("utf-8")
+            segment_cache.set(key, translation)
+
+    segment_stats["hits" if translation is not None else "misses"] += 1
+    return translation
+
+
+def store_segment(key, translation):
+    segment_cache.set(key, translation)
+    if segment_disk_cache is not None:
+        try:
+            segment_disk_cache.set(key, translation.encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"Could not write translation to disk cache: {str(e)}")
+
+
+def translation_cache_stats():
+    lookups = segment_stats["hits"] + segment_stats["misses"]
+    return {
+        "segment_hits": segment_stats["hits"],
+        "segment_misses": segment_stats["misses"],
+        "hit_rate": round(segment_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "memory": segment_cache.stats(),
+        "persistent": segment_disk_cache is not None,
+        "disk": segment_disk_cache.stats() if segment_disk_cache is not None else None
+    }
+
+
+def translation_prompt(segment, language):
+    return f"Translate the following financial advice into {language}:\n{segment}"
+
+
+async def _translate_segment(segment, key, language):
+    try:
+        translation = await chat_completion(
+            translation_prompt(segment, language),
+            model=TRANSLATION_MODEL,
+            temperature=TRANSLATION_TEMPERATURE,
+            max_tokens=TRANSLATION_MAX_TOKENS
+        )
+    except Exception as e:
+        logger.error(f"Error in translating segment to {language}: {str(e)}", exc_info=True)
+        return segment  # Return original segment as fallback
+
+    store_segment(key, translation.strip())
+    return translation.strip()
+
+
+async def translate_text(text, language):
     if language == "en":
         logger.info(f"Language is English, returning original text (length: {len(text)} chars)")
         return text
 
     logger.info(f"Translating text from English to {language}")
     logger.debug(f"Text to translate (first 100 chars): {text[:100]}...")
-    
-    prompt = f"Translate the following financial advice into {language}:\n{text}"
 
+    segments = split_segments(text)
+    keys = [segment_key(segment, language) for segment in segments]
+    translations = [get_cached_segment(key) for key in keys]
+
+    # Only cache misses go to the model, concurrently
+    missing = [i for i, translation in enumerate(translations) if translation is None]
+    logger.info(
+        f"Translating {len(missing)} of {len(segments)} segments to {language} "
+        f"({len(segments) - len(missing)} cached)"
+    )
+    results = await asyncio.gather(*(
+        _translate_segment(segments[i], keys[i], language) for i in missing
+    ))
+    for i, translation in zip(missing, results):
+        translations[i] = translation
+
+    translation = "\n\n".join(translations)
+    logger.debug(f"Translated text (first 100 chars): {translation[:100]}...")
+
+    return translation
+
+
+async def stream_translate_text(chunks, language):
+    """
+    Translate a stream of English text chunks paragraph by paragraph.
+
+    Each paragraph is sent for translation as soon as it is complete, and
+    its translation is streamed back while later paragraphs are still
+    arriving from `chunks`. An error from `chunks`, or from a paragraph
+    translation that fails partway, is raised.
+    """
+    if language == "en":
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    logger.info(f"Streaming translation from English to {language}")
+
+    # Drain the source on its own task so it keeps flowing (and releases its
+    # LLM slot) while paragraph translations wait for theirs.
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        finally:
+            await queue.put(None)
+
+    pump_task = asyncio.create_task(pump())
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=1024
-        )
-        
-        logger.info(f"Successfully translated text to {language}")
-        translation = response.choices[0].message.content
-        logger.debug(f"Translated text (first 100 chars): {translation[:100]}...")
-        
-        return translation
-        
+        buffer = ""
+        first = True
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+
+            buffer += chunk
+            # Everything before the last paragraph break is complete, and is
+            # split as translate_text splits it, so both share cached segments
+            last_break = None
+            for last_break in PARAGRAPH_BREAK.finditer(buffer):
+                pass
+            if last_break is None:
+                continue
+            complete, buffer = buffer[:last_break.start()], buffer[last_break.end():]
+            for paragraph in split_segments(complete):
+                if not first:
+                    yield "\n\n"
+                first = False
+                async for delta in _stream_translate_paragraph(paragraph, language):
+                    yield delta
+
+        await pump_task
+
+        for paragraph in split_segments(buffer):
+            if not first:
+                yield "\n\n"
+            first = False
+            async for delta in _stream_translate_paragraph(paragraph, language):
+                yield delta
+
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+
+
+async def _stream_translate_paragraph(paragraph, language):
+    key = segment_key(paragraph, language)
+    cached = get_cached_segment(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    try:
+        async for delta in stream_chat_completion(
+            translation_prompt(paragraph, language),
+            model=TRANSLATION_MODEL,
+            temperature=TRANSLATION_TEMPERATURE,
+            max_tokens=TRANSLATION_MAX_TOKENS
+        ):
+            parts.append(delta)
+            yield delta
+
     except Exception as e:
-        logger.error(f"Error in translating text to {language}: {str(e)}", exc_info=True)
-        return text  # Return original text as fallback
\ No newline at end of file
+        logger.error(f"Error in streaming translation to {language}: {str(e)}", exc_info=True)
+        if parts:
+            raise  # Half a translated paragraph cannot be patched up
+        yield paragraph  # Fall back to the original paragraph
+        return
+
+    store_segment(key, "".join(parts).strip())
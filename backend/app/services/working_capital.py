@@ -1,17 +1,24 @@
-def compute_working_capital_metrics(monthly_df):
+from app.services.metrics import build_aggregates
+
+
+def compute_working_capital_metrics(monthly_df, aggregates=None):
     """
     monthly_df: DataFrame with columns:
     revenue, receivable, payable, expense_amount
+    aggregates: optional precomputed FinancialAggregates for monthly_df
     """
 
-    avg_revenue = monthly_df["revenue"].mean() if "revenue" in monthly_df else 0
-    avg_receivable = monthly_df["receivable"].mean() if "receivable" in monthly_df else 0
-    avg_payable = monthly_df["payable"].mean() if "payable" in monthly_df else 0
-    expense_col = "expense_amount" if "expense_amount" in monthly_df.columns else (
-    "expense" if "expense" in monthly_df.columns else None
+    if aggregates is None:
+        aggregates = build_aggregates(monthly_df)
+
+    avg_revenue = aggregates.mean("revenue") if aggregates.has("revenue") else 0
+    avg_receivable = aggregates.mean("receivable") if aggregates.has("receivable") else 0
+    avg_payable = aggregates.mean("payable") if aggregates.has("payable") else 0
+    expense_col = "expense_amount" if aggregates.has("expense_amount") else (
+    "expense" if aggregates.has("expense") else None
     )
 
-    avg_expense = monthly_df[expense_col].mean() if expense_col else 0
+    avg_expense = aggregates.mean(expense_col) if expense_col else 0
 
     dso = (avg_receivable / avg_revenue) * 30 if avg_revenue > 0 else 0
     dpo = (avg_payable / avg_expense) * 30 if avg_expense > 0 else 0
@@ -0,0 +1,298 @@
+"""
+The metric services as they were before the shared aggregate kernel
+(baseline commit 0798770), copied unchanged so bench_metrics_kernel
+measures the code it replaced. Do not import from app code.
+"""
+
+
+# app/services/scoring.py
+
+def calculate_health_score(df):
+    total_revenue = df["revenue"].sum()
+    total_expenses = df["expense_amount"].sum()
+    total_emi = df["loan_emi"].sum()
+
+    monthly_cash = df["revenue"] - df["expense_amount"] - df["loan_emi"]
+    positive_months = (monthly_cash > 0).sum()
+    total_months = len(df)
+
+    cash_flow_score = (positive_months / total_months) * 25
+
+    profit_margin = (total_revenue - total_expenses) / max(total_revenue, 1)
+    if profit_margin >= 0.2:
+        profitability_score = 20
+    elif profit_margin >= 0.1:
+        profitability_score = 15
+    elif profit_margin > 0:
+        profitability_score = 8
+    else:
+        profitability_score = 0
+
+    expense_ratio = total_expenses / max(total_revenue, 1)
+    if expense_ratio <= 0.6:
+        expense_score = 15
+    elif expense_ratio <= 0.75:
+        expense_score = 10
+    elif expense_ratio <= 0.9:
+        expense_score = 5
+    else:
+        expense_score = 0
+
+    receivables = df["accounts_receivable"].mean()
+    payables = max(df["accounts_payable"].mean(), 1)
+    liquidity_ratio = receivables / payables
+
+    if liquidity_ratio >= 1.5:
+        liquidity_score = 15
+    elif liquidity_ratio >= 1.0:
+        liquidity_score = 10
+    elif liquidity_ratio >= 0.7:
+        liquidity_score = 5
+    else:
+        liquidity_score = 0
+
+    debt_ratio = total_emi / max(total_revenue, 1)
+    if debt_ratio <= 0.1:
+        debt_score = 15
+    elif debt_ratio <= 0.2:
+        debt_score = 10
+    elif debt_ratio <= 0.3:
+        debt_score = 5
+    else:
+        debt_score = 0
+
+    gst_months_paid = (df["gst_due"] == 0).sum()
+    if "gst_due" in df.columns:
+        tax_score = (gst_months_paid / total_months) * 10
+    else:
+        tax_score = 3
+
+    total_score = round(
+        cash_flow_score + profitability_score + expense_score +
+        liquidity_score + debt_score + tax_score
+    )
+
+    return {
+        "total_score": total_score,
+        "breakdown": {
+            "cash_flow": round(cash_flow_score, 1),
+            "profitability": profitability_score,
+            "expenses": expense_score,
+            "liquidity": liquidity_score,
+            "debt": debt_score,
+            "tax": round(tax_score, 1)
+        }
+    }
+def health_status(score):
+    if score >= 75:
+        return "Healthy"
+    elif score >= 50:
+        return "Watch"
+    else:
+        return "At Risk"
+
+
+# app/services/risk_engine.py
+
+def identify_risks(df):
+    risks = []
+
+    # Cash Flow Risk
+    monthly_cash = df["revenue"] - df["expense_amount"] - df["loan_emi"]
+    negative_months = (monthly_cash < 0).sum()
+    if negative_months >= 3:
+        risks.append({
+            "type": "Cash Flow Risk",
+            "severity": "High",
+            "reason": "Negative cash flow in 3 or more months"
+        })
+
+    # Expense Risk
+    total_revenue = df["revenue"].sum()
+    total_expenses = df["expense_amount"].sum()
+    expense_ratio = total_expenses / max(total_revenue, 1)
+    if expense_ratio > 0.75:
+        risks.append({
+            "type": "Expense Risk",
+            "severity": "Medium",
+            "reason": "Expenses exceed 75% of revenue"
+        })
+
+    # Debt Risk
+    total_emi = df["loan_emi"].sum()
+    debt_ratio = total_emi / max(total_revenue, 1)
+    if debt_ratio > 0.2:
+        risks.append({
+            "type": "Debt Risk",
+            "severity": "High",
+            "reason": "Loan EMIs consume more than 20% of revenue"
+        })
+
+    # Tax Compliance Risk
+    delayed_gst_months = (df["gst_due"] > 0).sum()
+    if delayed_gst_months >= 2:
+        risks.append({
+            "type": "Tax Compliance Risk",
+            "severity": "Medium",
+            "reason": "GST dues pending in multiple months"
+        })
+
+    return risks
+
+
+# app/services/benchmarking.py
+
+INDUSTRY_BENCHMARKS = {
+    "Retail": {
+        "profit_margin": 0.22,
+        "expense_ratio": 0.58,
+        "debt_ratio": 0.15,
+        "liquidity_ratio": 1.2
+    },
+    "Manufacturing": {
+        "profit_margin": 0.18,
+        "expense_ratio": 0.62,
+        "debt_ratio": 0.25,
+        "liquidity_ratio": 1.4
+    },
+    "Services": {
+        "profit_margin": 0.30,
+        "expense_ratio": 0.50,
+        "debt_ratio": 0.10,
+        "liquidity_ratio": 1.3
+    },
+    "Agriculture": {
+        "profit_margin": 0.15,
+        "expense_ratio": 0.65,
+        "debt_ratio": 0.30,
+        "liquidity_ratio": 1.1
+    },
+    "Logistics": {
+        "profit_margin": 0.12,
+        "expense_ratio": 0.70,
+        "debt_ratio": 0.35,
+        "liquidity_ratio": 1.0
+    },
+    "E-commerce": {
+        "profit_margin": 0.20,
+        "expense_ratio": 0.60,
+        "debt_ratio": 0.18,
+        "liquidity_ratio": 1.25
+    }
+}
+BENCHMARKS = INDUSTRY_BENCHMARKS
+def compute_business_metrics(df):
+    total_revenue = df["revenue"].sum()
+    total_expenses = df["expense_amount"].sum()
+    total_emi = df["loan_emi"].sum()
+
+    profit_margin = (total_revenue - total_expenses) / max(total_revenue, 1)
+    expense_ratio = total_expenses / max(total_revenue, 1)
+    debt_ratio = total_emi / max(total_revenue, 1)
+
+    receivables = df["accounts_receivable"].mean()
+    payables = max(df["accounts_payable"].mean(), 1)
+    liquidity_ratio = receivables / payables
+
+    return {
+        "profit_margin": round(profit_margin, 2),
+        "expense_ratio": round(expense_ratio, 2),
+        "debt_ratio": round(debt_ratio, 2),
+        "liquidity_ratio": round(liquidity_ratio, 2)
+    }
+def compare_with_benchmark(df, industry):
+    if industry not in INDUSTRY_BENCHMARKS:
+        raise ValueError("Unsupported industry")
+
+
+    business = compute_business_metrics(df)
+    benchmark = BENCHMARKS[industry]
+
+    comparison = {}
+
+    for metric in benchmark:
+        diff = business[metric] - benchmark[metric]
+        comparison[metric] = {
+            "business": business[metric],
+            "industry_avg": benchmark[metric],
+            "difference": round(diff, 2),
+            "status": (
+                "Better" if diff > 0 else
+                "Worse" if diff < 0 else
+                "Same"
+            )
+        }
+
+    return comparison
+
+
+# app/services/forecasting.py
+
+def forecast_revenue(df, months=6):
+    avg_revenue = df["revenue"].tail(3).mean()
+    return [round(avg_revenue, 2)] * months
+
+def calculate_cash_runway(df):
+    avg_monthly_burn = (
+        df["expense_amount"] + df["loan_emi"] - df["revenue"]
+    ).mean()
+
+    if avg_monthly_burn <= 0:
+        return "Stable"
+
+    avg_cash_buffer = df["revenue"].mean() * 0.5
+    runway_months = avg_cash_buffer / avg_monthly_burn
+
+    return round(runway_months, 1)
+
+def generate_forecast(df):
+    return {
+        "revenue_forecast_6_months": forecast_revenue(df),
+        "cash_runway_months": calculate_cash_runway(df)
+    }
+
+
+# app/services/working_capital.py
+
+def compute_working_capital_metrics(monthly_df):
+    """
+    monthly_df: DataFrame with columns:
+    revenue, receivable, payable, expense_amount
+    """
+
+    avg_revenue = monthly_df["revenue"].mean() if "revenue" in monthly_df else 0
+    avg_receivable = monthly_df["receivable"].mean() if "receivable" in monthly_df else 0
+    avg_payable = monthly_df["payable"].mean() if "payable" in monthly_df else 0
+    expense_col = "expense_amount" if "expense_amount" in monthly_df.columns else (
+    "expense" if "expense" in monthly_df.columns else None
+    )
+
+    avg_expense = monthly_df[expense_col].mean() if expense_col else 0
+
+    dso = (avg_receivable / avg_revenue) * 30 if avg_revenue > 0 else 0
+    dpo = (avg_payable / avg_expense) * 30 if avg_expense > 0 else 0
+
+    ccc = dso - dpo
+
+    risk = "Low"
+    if ccc > 45:
+        risk = "High"
+    elif ccc > 30:
+        risk = "Medium"
+
+    actions = []
+
+    if dso > 30:
+        actions.append("Speed up receivables collection by tightening credit terms.")
+    if dpo < 30:
+        actions.append("Negotiate longer payment terms with suppliers.")
+    if ccc > 45:
+        actions.append("Consider short-term working capital financing to bridge cash gaps.")
+
+    return {
+        "dso": round(dso, 2),
+        "dpo": round(dpo, 2),
+        "cash_conversion_cycle": round(ccc, 2),
+        "risk_level": risk,
+        "actions": actions
+    }
@@ -0,0 +1,130 @@
+"""
+Bank fetch latency against the local stand-in bank server: HttpBankAdapter
+(pooled client, next page prefetched, accounts fetched concurrently)
+against fetching page after page on a fresh connection and one account
+after another.
+
+First checks that streamed transactions are exactly the server's, across
+page sizes, and that stopping a stream early is clean.
+
+Run from backend/:
+    python -m benchmarks.bench_bank_fetch [transactions_per_account]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+from benchmarks import fake_bank_server
+from benchmarks.fake_llm_server import serve_in_thread
+from app.services.bank_adapter import BankAPIError, HttpBankAdapter
+
+PORT = 8910
+BASE_URL = f"http://127.0.0.1:{PORT}"
+PAGE_SIZE = 1000
+ACCOUNTS = 4
+
+
+async def naive_fetch(account_id, page_size=PAGE_SIZE):
+    # Baseline: one page at a time, a new connection for each
+    transactions, cursor = [], None
+    while True:
+        params = {"limit": page_size, **({"cursor": cursor} if cursor else {})}
+        async with httpx.AsyncClient(base_url=BASE_URL) as client:
+            response = await client.get(f"/accounts/{account_id}/transactions", params=params)
+        body = response.json()
+        transactions.extend(body["transactions"])
+        cursor = body["next_cursor"]
+        if not body["has_more"]:
+            return transactions
+
+
+async def check():
+    for count, page_size in [(0, 10), (1, 10), (10, 10), (2500, 100), (2501, 1000), (7000, 9000)]:
+        account_id = f"acct-{count}"
+        adapter = HttpBankAdapter(BASE_URL, page_size=page_size)
+        streamed = [t async for t in adapter.stream_transactions(account_id)]
+        if streamed != fake_bank_server.transactions(account_id):
+            raise AssertionError(f"{account_id} at page size {page_size}: stream differs")
+
+    adapter = HttpBankAdapter(BASE_URL, page_size=100)
+    by_account = await adapter.fetch_accounts(["acct-300", "acct-5", "acct-300"])
+    if by_account["acct-5"] != fake_bank_server.transactions("acct-5"):
+        raise AssertionError("fetch_accounts differs")
+
+    # Stopping early cancels the prefetched page
+    stream = adapter.stream_transactions("acct-1000")
+    first = []
+    async for transaction in stream:
+        first.append(transaction)
+        if len(first) == 150:
+            break
+    await stream.aclose()
+    if first != fake_bank_server.transactions("acct-1000", 0, 150):
+        raise AssertionError("early stop differs")
+
+    try:
+        await HttpBankAdapter(BASE_URL, page_size=0).fetch_transactions("acct-5")
+    except BankAPIError:
+        pass
+    else:
+        raise AssertionError("a rejected request must raise BankAPIError")
+
+    print("streamed transactions match the bank server across page sizes")
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - start
+
+
+async def first_transaction(adapter, account_id):
+    stream = adapter.stream_transactions(account_id)
+    await stream.__anext__()
+    await stream.aclose()
+
+
+async def run(count):
+    accounts = [f"acct{i}-{count}" for i in range(ACCOUNTS)]
+    adapter = HttpBankAdapter(BASE_URL, page_size=PAGE_SIZE)
+    # Warm the pool
+    await adapter.fetch_transactions("acct-10")
+
+    pages = -(-count // PAGE_SIZE)
+    print(
+        f"{count} transactions per account, {pages} pages of {PAGE_SIZE}, "
+        f"{fake_bank_server.FAKE_BANK_DELAY * 1000:.0f} ms per page at the bank"
+    )
+
+    _, naive = await timed(naive_fetch(accounts[0]))
+    _, pooled = await timed(adapter.fetch_transactions(accounts[0]))
+    _, first = await timed(first_transaction(adapter, accounts[0]))
+    print(
+        f"  one account: new connection per page {naive * 1000:,.0f} ms, "
+        f"adapter {pooled * 1000:,.0f} ms ({count / pooled:,.0f} txn/s), "
+        f"first transaction after {first * 1000:,.0f} ms"
+    )
+
+    async def one_after_another():
+        for account_id in accounts:
+            await adapter.fetch_transactions(account_id)
+
+    _, sequential = await timed(one_after_another())
+    _, concurrent = await timed(adapter.fetch_accounts(accounts))
+    print(
+        f"  {ACCOUNTS} accounts: one after another {sequential * 1000:,.0f} ms, "
+        f"concurrently {concurrent * 1000:,.0f} ms ({ACCOUNTS * count / concurrent:,.0f} txn/s)"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    serve_in_thread(fake_bank_server.app, PORT)
+    asyncio.run(check())
+    asyncio.run(run(count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Bank data for /analyze from the delta-synced store against re-fetching
+every transaction, on the local stand-in bank server.
+
+First checks, across full syncs, deltas, empty deltas and snapshot-only
+adapters, that the stored rollups enrich a frame exactly as the raw
+transactions do and give the same bank_summary totals, and that deltas
+with new transactions are reported to on_rollups_changed listeners, and
+that a sync over its timeout returns at once and still stores its
+rollups when the bank answers. Then times the
+bank stage of one /analyze call: the first sync, a repeat with nothing
+new, a repeat after new transactions cleared, and a full re-fetch.
+
+Run from backend/:
+    python -m benchmarks.bench_bank_sync [transactions]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import pandas as pd
+
+from benchmarks import fake_bank_server
+from benchmarks.fake_llm_server import serve_in_thread
+from app.core.database import get_engine
+from app.services.bank_adapter import (
+    BankAdapter,
+    HttpBankAdapter,
+    MockBankAdapter,
+    fetch_bank_transactions,
+    set_bank_adapter,
+)
+from app.services.bank_store import (
+    bank_rollups,
+    on_rollups_changed,
+    request_sync,
+    sync_accounts,
+)
+from app.services.cashflow_enrichment import enrich_with_bank_data, enrich_with_bank_totals
+
+PORT = 8913
+BASE_URL = f"http://127.0.0.1:{PORT}"
+NEW_TRANSACTIONS = 500
+
+
+def frame():
+    months = pd.period_range("2021-07", "2026-06", freq="M").astype(str).tolist()
+    return pd.DataFrame({"date": months + ["not a date"], "revenue": 1.0})
+
+
+def expected(account_ids):
+    transactions = [t for a in account_ids for t in fake_bank_server.transactions(a)]
+    summary = {
+        "inflows": sum(t["amount"] for t in transactions if t["type"] == "credit"),
+        "outflows": sum(t["amount"] for t in transactions if t["type"] == "debit"),
+        "transaction_count": len(transactions),
+    }
+    return enrich_with_bank_data(frame(), transactions), summary
+
+
+def assert_matches(account_ids, engine, label):
+    enriched, summary = expected(account_ids)
+    stored = bank_rollups(account_ids, engine)
+    pd.testing.assert_frame_equal(enrich_with_bank_totals(frame(), stored["monthly"]), enriched)
+    actual = {k: stored[k] for k in summary}
+    if actual != summary:
+        raise AssertionError(f"{label}: bank_summary {actual} != {summary}")
+
+
+def append(account_id, count):
+    httpx.post(f"{BASE_URL}/accounts/{account_id}/append", params={"count": count})
+
+
+class SnapshotOnly(BankAdapter):
+    # An adapter without delta support: every sync is the whole account
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def pages(self, account_id):
+        async for page in self.inner.pages(account_id):
+            yield page
+
+
+class Slow(BankAdapter):
+    def __init__(self, inner, delay):
+        self.inner = inner
+        self.delay = delay
+
+    async def pages(self, account_id):
+        await asyncio.sleep(self.delay)
+        async for page in self.inner.pages(account_id):
+            yield page
+
+
+def check(engine):
+    adapter = HttpBankAdapter(BASE_URL, page_size=97)
+    set_bank_adapter(adapter)
+    accounts = ["check-a-1200", "check-b-0", "check-c-35"]
+
+    changed = []
+    on_rollups_changed(changed.append)
+
+    sync_accounts(accounts, engine)
+    assert_matches(accounts, engine, "first sync")
+
+    for step, count in enumerate([0, 1, 96, 97, 250]):
+        append("check-a-1200", count)
+        append("check-c-35", count * 2)
+        changed.clear()
+        sync_accounts(accounts, engine, max_age=0)
+        assert_matches(accounts, engine, f"delta {step}")
+        # Cached analyses of an account are dropped when a delta adds to it
+        expect = ["check-a-1200", "check-c-35"] if count else []
+        if sorted(changed) != expect:
+            raise AssertionError(f"delta {step}: rollups-changed for {changed}, expected {expect}")
+
+    # Fresh rollups are served without asking the bank...
+    append("check-a-1200", 10)
+    sync_accounts(accounts, engine)
+    stored = bank_rollups(["check-a-1200"], engine)["transaction_count"]
+    if stored != 1200 + 444:
+        raise AssertionError(f"a fresh account was synced ({stored} transactions)")
+    # ...until the account is marked changed
+    request_sync("check-a-1200", engine)
+    sync_accounts(accounts, engine)
+    assert_matches(accounts, engine, "after request_sync")
+
+    set_bank_adapter(SnapshotOnly(adapter))
+    append("check-c-35", 5)
+    sync_accounts(accounts, engine, max_age=0)
+    assert_matches(accounts, engine, "snapshot adapter")
+
+    set_bank_adapter(MockBankAdapter())
+    for _ in range(2):
+        sync_accounts(["mock"], engine, max_age=0)
+    if bank_rollups(["mock"], engine)["transaction_count"] != 3:
+        raise AssertionError("snapshots must replace, not add up")
+
+    # Over its timeout, the caller gets TimeoutError back at once and the
+    # sync is stored in the background
+    set_bank_adapter(Slow(adapter, 1.0))
+    append("check-c-35", 5)
+    start = time.perf_counter()
+    try:
+        sync_accounts(accounts, engine, max_age=0, timeout=0.1)
+        raise AssertionError("a slow sync must time out")
+    except TimeoutError:
+        pass
+    if time.perf_counter() - start > 0.5:
+        raise AssertionError("a timed-out sync kept its caller waiting")
+    time.sleep(1.5)
+    assert_matches(accounts, engine, "after a timed-out sync")
+
+    print("stored rollups match the raw transactions across syncs, deltas and snapshots")
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(engine, count):
+    account = f"bench-{count}"
+    set_bank_adapter(HttpBankAdapter(BASE_URL))
+
+    def from_store(max_age):
+        sync_accounts([account], engine, max_age=max_age)
+        enrich_with_bank_totals(frame(), bank_rollups([account], engine)["monthly"])
+
+    def refetch():
+        enrich_with_bank_data(frame(), fetch_bank_transactions(account))
+
+    first = timed(from_store, 0)
+    fresh = timed(from_store, 60)
+    nothing_new = timed(from_store, 0)
+    append(account, NEW_TRANSACTIONS)
+    delta = timed(from_store, 0)
+    full = timed(refetch)
+
+    print(f"{count} transactions, bank stage of one /analyze call:")
+    print(f"  re-fetch everything            {full:8,.0f} ms")
+    print(f"  store, first sync              {first:8,.0f} ms")
+    print(f"  store, {NEW_TRANSACTIONS} new transactions     {delta:8,.0f} ms")
+    print(f"  store, nothing new             {nothing_new:8,.0f} ms")
+    print(f"  store, within BANK_SYNC_INTERVAL {fresh:6,.0f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    serve_in_thread(fake_bank_server.app, PORT)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = get_engine(f"sqlite:///{os.path.join(directory, 'bank.sqlite3')}")
+        check(engine)
+        run(engine, count)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
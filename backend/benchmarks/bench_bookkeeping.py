@@ -0,0 +1,125 @@
+"""
+Transaction categorization for automated_bookkeeping: the compiled,
+memoized AccountMatcher against the previous per-row, per-keyword `in`
+scan, on the shipped chart of accounts and on a 2000-keyword chart.
+
+Both are first checked to agree on generated descriptions.
+
+Run from backend/:
+    python -m benchmarks.bench_bookkeeping [rows]
+"""
+import random
+import string
+import sys
+import time
+
+import pandas as pd
+
+from app.services.bookkeeping import CHART_OF_ACCOUNTS, AccountMatcher
+
+UNIQUE_DESCRIPTIONS = 20000
+CHECK_DESCRIPTIONS = 20000
+# The per-keyword scan is too slow to run over every row of the big chart
+LEGACY_ROWS = 100_000
+
+
+def legacy_categorize(description, chart):
+    # Previous behaviour: every keyword of every category, in order
+    if not description or not isinstance(description, str):
+        return "Uncategorized", 0.4
+    text = description.lower()
+    for category, keywords in chart.items():
+        for kw in keywords:
+            if kw in text:
+                return category, 0.9
+    return "Uncategorized", 0.5
+
+
+def random_word(rng):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def large_chart(rng, categories=200, keywords_per_category=10):
+    chart = dict(CHART_OF_ACCOUNTS)
+    for i in range(categories):
+        chart[f"Account {i}"] = [random_word(rng) for _ in range(keywords_per_category)]
+    return chart
+
+
+def descriptions(rng, chart, count):
+    keywords = [kw for kws in chart.values() for kw in kws]
+    values = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.02:
+            values.append(rng.choice([None, "", float("nan"), 42]))
+            continue
+        words = [
+            rng.choice(keywords) if rng.random() < 0.3 else random_word(rng)
+            for _ in range(rng.randint(1, 6))
+        ]
+        text = " ".join(words)
+        values.append(text.upper() if roll > 0.9 else text)
+    return values
+
+
+def check(chart, rng):
+    matcher = AccountMatcher(chart)
+    values = descriptions(rng, chart, CHECK_DESCRIPTIONS)
+    # Keywords glued together exercise overlapping and prefix matches
+    keywords = [kw for kws in chart.values() for kw in kws]
+    values += ["".join(rng.choices(keywords, k=3)) for _ in range(CHECK_DESCRIPTIONS)]
+
+    for value in values:
+        expected = legacy_categorize(value, chart)
+        actual = matcher.categorize(value)
+        if expected != actual:
+            raise AssertionError(f"{value!r}: expected {expected}, got {actual}")
+
+    accounts, confidence = matcher.categorize_many(pd.Series(values, dtype=object))
+    if list(zip(accounts, confidence)) != [legacy_categorize(v, chart) for v in values]:
+        raise AssertionError("categorize_many disagrees with the per-row scan")
+
+
+def run(label, chart, rows, rng):
+    pool = descriptions(rng, chart, UNIQUE_DESCRIPTIONS)
+    series = pd.Series(rng.choices(pool, k=rows), dtype=object)
+
+    legacy_rows = series.iloc[:LEGACY_ROWS]
+    start = time.perf_counter()
+    for value in legacy_rows:
+        legacy_categorize(value, chart)
+    legacy_rate = len(legacy_rows) / (time.perf_counter() - start)
+
+    matcher = AccountMatcher(chart)
+    start = time.perf_counter()
+    matcher.categorize_many(series)
+    cold_rate = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matcher.categorize_many(series)
+    warm_rate = rows / (time.perf_counter() - start)
+
+    keywords = sum(len(kws) for kws in chart.values())
+    print(
+        f"{label} ({keywords} keywords), {rows} rows / {UNIQUE_DESCRIPTIONS} distinct: "
+        f"per-row scan {legacy_rate:,.0f} rows/s, matcher {cold_rate:,.0f} rows/s "
+        f"(memo warm {warm_rate:,.0f} rows/s)"
+    )
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(0)
+    big_chart = large_chart(rng)
+
+    check(CHART_OF_ACCOUNTS, rng)
+    check(big_chart, rng)
+    print("AccountMatcher matches the per-keyword scan on both charts")
+
+    run("shipped chart", CHART_OF_ACCOUNTS, rows, rng)
+    run("large chart", big_chart, rows, rng)
+
+
+if __name__ == "__main__":
+    main()
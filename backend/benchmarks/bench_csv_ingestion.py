@@ -0,0 +1,116 @@
+"""
+Peak RSS and rows/second for /upload CSV normalization, full read vs
+chunked streaming, on synthetic transaction-level exports.
+
+Run from backend/:
+    python -m benchmarks.bench_csv_ingestion [rows ...]
+
+Defaults to 1M, 10M and 50M rows (the 50M file is about 3.5 GB on disk).
+The full-read mode is skipped above FULL_READ_MAX_ROWS. Each measurement
+runs in its own process so peak RSS is not shared between runs.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import CSV_CHUNK_ROWS
+from app.services.normalizer import normalize_csv_in_chunks, normalize_data
+
+DEFAULT_ROWS = [1_000_000, 10_000_000, 50_000_000]
+FULL_READ_MAX_ROWS = 10_000_000
+BLOCK_ROWS = 1_000_000
+
+
+def write_csv(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2018-01-01")
+    span_seconds = 6 * 365 * 24 * 3600
+    written = 0
+    header = True
+
+    while written < rows:
+        n = min(BLOCK_ROWS, rows - written)
+        offsets = np.sort(rng.integers(0, span_seconds, n))
+        pd.DataFrame({
+            "Date": (start + pd.to_timedelta(offsets, unit="s")).strftime("%Y-%m-%d"),
+            "Revenue": rng.integers(0, 50000, n),
+            "Expense_Category": rng.choice(["Rent", "Salaries", "Utilities", "Marketing"], n),
+            "Expense_Amount": rng.uniform(0, 20000, n).round(2),
+            "Receivable": rng.uniform(0, 5000, n).round(2),
+            "Payable": rng.uniform(0, 5000, n).round(2),
+            "Loan_EMI": rng.uniform(0, 1000, n).round(2),
+            "GST_Paid": rng.uniform(0, 900, n).round(2),
+            "GST_Due": rng.uniform(0, 300, n).round(2),
+        }).to_csv(path, mode="a", header=header, index=False)
+        written += n
+        header = False
+
+
+def peak_rss_mb():
+    # VmHWM resets on exec; ru_maxrss would include the parent that wrote
+    # the CSV before forking this measurement process
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(mode, path):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        if mode == "chunked":
+            monthly_df, _ = normalize_csv_in_chunks(f, CSV_CHUNK_ROWS)
+        else:
+            monthly_df, _ = normalize_data(pd.read_csv(f))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "months": len(monthly_df),
+    }))
+
+
+def run_measurement(mode, path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_csv_ingestion", "--measure", mode, path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], sys.argv[3])
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+    print(f"{'rows':>12} {'mode':>8} {'seconds':>9} {'rows/s':>12} {'peak RSS MB':>12}")
+
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ledger.csv")
+            write_csv(path, rows)
+
+            modes = ["chunked"] + (["full"] if rows <= FULL_READ_MAX_ROWS else [])
+            for mode in modes:
+                result = run_measurement(mode, path)
+                print(
+                    f"{rows:>12,} {mode:>8} {result['seconds']:>9.2f} "
+                    f"{rows / result['seconds']:>12,.0f} {result['peak_rss_mb']:>12.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Insert and read throughput of the financial time-series store at 1M rows,
+against a throwaway SQLite file (or BENCH_DATABASE_URL).
+
+First checks that /analyze on a stored history ({"business_id"}) gives
+the same analysis as sending the history itself, for histories with
+columns missing in every month or in some.
+
+Run from backend/:
+    python -m benchmarks.bench_financial_store [businesses] [months]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = tempfile.mkdtemp(prefix="financial-store-")
+os.environ["CACHE_DIR"] = CACHE_DIR
+os.environ["DATABASE_URL"] = ""  # the round-trip check uses the local store
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.database import get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.financial_store import load_history, save_histories  # noqa: E402
+
+# Businesses written per save_histories call
+WRITE_BATCH_BUSINESSES = 1000
+READ_SAMPLE = 2000
+
+
+def history(months, rng):
+    dates = pd.period_range("2010-01", periods=months, freq="M").astype(str)
+    return pd.DataFrame({
+        "date": dates,
+        "revenue": rng.uniform(3e5, 6e5, months),
+        "expense_amount": rng.uniform(1e5, 4e5, months),
+        "accounts_receivable": rng.uniform(8e4, 1.5e5, months),
+        "accounts_payable": rng.uniform(6e4, 1.2e5, months),
+        "inventory_value": rng.uniform(5e4, 1e5, months),
+        "loan_emi": rng.uniform(1e4, 3e4, months),
+        "gst_paid": rng.uniform(0, 2e4, months),
+        "gst_due": rng.uniform(0, 2e4, months),
+    }).to_dict(orient="records")
+
+
+def round_trip_histories(rng):
+    full = history(12, rng)
+    without_gst = [
+        {k: v for k, v in record.items() if k not in ("gst_paid", "gst_due")}
+        for record in full
+    ]
+    # gst_due only filed in some months, one month's revenue not reported
+    partial = [
+        {k: v for k, v in record.items() if k != "gst_due" or i % 3 == 0}
+        for i, record in enumerate(full)
+    ]
+    partial[4]["revenue"] = None
+    return {"full": full, "without-gst": without_gst, "partial": partial}
+
+
+def check(rng):
+    with TestClient(app) as client:
+        for name, monthly_data in round_trip_histories(rng).items():
+            business_id = f"round-trip-{name}"
+            client.post(f"/businesses/{business_id}/history", json={"monthly_data": monthly_data})
+            stored = client.post("/analyze", json={"business_id": business_id}).json()
+            sent = client.post("/analyze", json={"monthly_data": monthly_data}).json()
+            if stored != sent:
+                raise AssertionError(f"{name}: stored history analyzes as {stored}, sent as {sent}")
+    print("stored histories analyze the same as the histories sent")
+
+
+def main():
+    businesses = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = np.random.default_rng(0)
+    try:
+        check(rng)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tmp}/bench.sqlite3"
+        engine = get_engine(url)
+
+        template = history(months, rng)
+        ids = [f"sme-{i}" for i in range(businesses)]
+
+        start = time.perf_counter()
+        written = 0
+        for first in range(0, businesses, WRITE_BATCH_BUSINESSES):
+            batch = ids[first:first + WRITE_BATCH_BUSINESSES]
+            written += save_histories({business_id: template for business_id in batch}, engine)
+        insert_seconds = time.perf_counter() - start
+
+        sample = [ids[i] for i in rng.integers(0, businesses, READ_SAMPLE)]
+        start = time.perf_counter()
+        read = sum(len(load_history(business_id, engine)) for business_id in sample)
+        read_seconds = time.perf_counter() - start
+
+        print(
+            f"{written:,} rows ({businesses} businesses x {months} months) on "
+            f"{engine.dialect.name}: insert {written / insert_seconds:,.0f} rows/s; "
+            f"history reads {READ_SAMPLE / read_seconds:,.0f} businesses/s "
+            f"({read / read_seconds:,.0f} rows/s)"
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Monte Carlo cash-runway forecast latency, enforced against a per-request
+budget: exits non-zero when the 95th percentile of simulate_cash_runway
+over FORECAST_PATHS paths and FORECAST_HORIZON_MONTHS months is over
+BUDGET_MS.
+
+First checks that a history without volatility gives every path the
+closed-form runway, that a flat, profitable history almost never runs out
+of cash, even with one anomalous month, that a high-growth history gives
+finite paths, that the sorted-row percentiles match np.percentile, that
+seasonality is found in a seasonal history and carried into the
+forecast, and that the same input gives the same forecast.
+
+Run from backend/:
+    python -m benchmarks.bench_forecast [budget_ms]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import FORECAST_HORIZON_MONTHS, FORECAST_PATHS
+from app.services.forecasting import (
+    PERCENTILES,
+    _sorted_percentiles,
+    generate_forecast,
+    simulate_cash_runway,
+)
+from app.services.metrics import build_aggregates
+
+BUDGET_MS = 20.0
+RUNS = 300
+
+
+def history(months=36, seed=1, volatility=0.06, season=0.3, expense_ratio=0.97):
+    rng = np.random.default_rng(seed)
+    shape = 1 + season * np.sin(np.arange(months) * 2 * np.pi / 12)
+    revenue = 200_000 * shape * np.exp(np.cumsum(rng.normal(0.005, volatility, months)))
+    return pd.DataFrame({
+        "revenue": revenue,
+        "expense_amount": revenue * rng.normal(expense_ratio, 0.04 if volatility else 0, months),
+        "loan_emi": 12_000.0,
+        "accounts_receivable": 50_000.0,
+    })
+
+
+def check():
+    # No volatility, no spread: every path burns the same amount each month
+    flat = pd.DataFrame({
+        "revenue": [100_000.0] * 12, "expense_amount": [104_000.0] * 12, "loan_emi": [6_000.0] * 12,
+    })
+    forecast = simulate_cash_runway(build_aggregates(flat), 55_000.0)
+    expected = round(55_000 / 10_000, 1)
+    if set(forecast["cash_runway_months"].values()) != {expected} or forecast["cash_out_probability"] != 1:
+        raise AssertionError(f"flat history: runway {forecast['cash_runway_months']}, expected {expected}")
+
+    # Flat and profitable: one month of almost no revenue must not widen
+    # every path into a likely cash-out
+    profitable = history(months=12, volatility=0.01, season=0, expense_ratio=0.6)
+    for anomaly in (None, 5):
+        if anomaly is not None:
+            profitable.loc[anomaly, "revenue"] = 1_000.0
+        outlook = generate_forecast(profitable)["monte_carlo"]
+        if outlook["cash_out_probability"] > 0.01:
+            raise AssertionError(f"profitable history: cash-out probability {outlook['cash_out_probability']}")
+
+    # Revenue growing 30x a month stays finite
+    growth = pd.DataFrame({
+        "revenue": 1_000.0 * 30.0 ** np.arange(12), "loan_emi": 5_000.0,
+    })
+    growth["expense_amount"] = growth["revenue"] * 0.9
+    outlook = generate_forecast(growth).get("monte_carlo")
+    if outlook is None or not np.isfinite(outlook["revenue"]["p90"]).all():
+        raise AssertionError("high-growth history must give a finite forecast")
+
+    rows = np.sort(np.random.default_rng(0).normal(size=(24, 10_001)), axis=1)
+    if not np.allclose(_sorted_percentiles(rows), np.percentile(rows, PERCENTILES, axis=1).T):
+        raise AssertionError("sorted-row percentiles differ from np.percentile")
+
+    seasonal = generate_forecast(history(volatility=0.01))["monte_carlo"]
+    median = np.array(seasonal["revenue"]["p50"])
+    # History rows 0..35, so forecast month k is calendar slot (36 + k) % 12
+    # and the sine peaks at slot 3
+    if not seasonal["seasonal"] or median.argmax() % 12 != (3 - 36) % 12:
+        raise AssertionError("seasonal peak not carried into the forecast")
+
+    if generate_forecast(history()) != generate_forecast(history()):
+        raise AssertionError("the same history must give the same forecast")
+    print("forecast matches the closed form, np.percentile and the seasonal profile")
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    check()
+
+    aggregates = build_aggregates(history())
+    simulate_cash_runway(aggregates, 150_000.0)
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        simulate_cash_runway(aggregates, 150_000.0)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    print(
+        f"{FORECAST_PATHS} paths x {FORECAST_HORIZON_MONTHS} months: "
+        f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms (budget {budget:.0f} ms at p95)"
+    )
+    if p95 > budget:
+        sys.exit(f"over budget: p95 {p95:.1f} ms > {budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Incremental re-scoring: IncrementalAggregates against a full recompute.
+
+First a randomized property check: long random sequences of month
+appends, replacements and removals, with values chosen to land on score
+thresholds (decimal amounts whose float sums depend on summation order),
+missing keys, None and NaN. After every step the score, breakdown,
+risks, benchmarks for every industry and working capital computed from
+the incremental state must equal those from build_aggregates over the
+same months. Then the cost of one month update, both ways.
+
+Run from backend/:
+    python -m benchmarks.bench_incremental_scoring [sequences]
+"""
+import json
+import random
+import sys
+import time
+
+import pandas as pd
+
+from app.services.benchmarking import INDUSTRY_BENCHMARKS, compare_with_benchmark
+from app.services.metrics import IncrementalAggregates, build_aggregates
+from app.services.risk_engine import identify_risks
+from app.services.scoring import calculate_health_score
+from app.services.working_capital import compute_working_capital_metrics
+
+STEPS = 60
+COLUMNS = [
+    "revenue", "expense_amount", "loan_emi", "accounts_receivable",
+    "accounts_payable", "receivable", "payable", "gst_due", "gst_paid", "expense",
+]
+# Amounts whose ratios sit on the score thresholds (0.1, 0.2, 0.6, 0.75 ...)
+# once summed, and whose float sums are order dependent
+AMOUNTS = [0.1, 0.2, 0.3, 0.6, 0.7, 0.75, 0.8, 0.9, 1.0, 1.5, 100.1, 1e5 + 0.01, 0, 3]
+
+
+def _outcome(fn, *args):
+    # A service that fails must fail the same way on both paths
+    try:
+        return fn(*args)
+    except KeyError as e:
+        return f"KeyError: {e}"
+
+
+def analysis(aggregates):
+    result = {
+        "score": _outcome(calculate_health_score, None, aggregates),
+        "risks": _outcome(identify_risks, None, aggregates),
+        "working_capital": _outcome(compute_working_capital_metrics, None, aggregates),
+    }
+    for industry in INDUSTRY_BENCHMARKS:
+        result[industry] = _outcome(compare_with_benchmark, None, industry, aggregates)
+    # NaN-safe comparison
+    return json.dumps(result, sort_keys=True)
+
+
+def full_recompute(records):
+    return analysis(build_aggregates(pd.DataFrame(records)))
+
+
+def random_record(rng, month, columns):
+    record = {"date": str(month)}
+    for column in columns:
+        roll = rng.random()
+        if roll < 0.05:
+            continue
+        if roll < 0.08:
+            record[column] = None
+        elif roll < 0.1:
+            record[column] = float("nan")
+        else:
+            record[column] = rng.choice(AMOUNTS) * rng.choice([1, 1, 2, 10])
+    return record
+
+
+def check_sequence(rng):
+    columns = [c for c in COLUMNS if rng.random() < 0.85]
+    state = IncrementalAggregates()
+    months = list(pd.period_range("2020-01", periods=36, freq="M"))
+
+    for _ in range(STEPS):
+        present = sorted(state.rows)
+        action = rng.random()
+        if present and action < 0.3:
+            state.replace(random_record(rng, rng.choice(present), columns))
+        elif present and action < 0.4:
+            state.remove(rng.choice(present))
+        else:
+            free = [m for m in months if m not in state.rows]
+            if not free:
+                continue
+            state.append(random_record(rng, rng.choice(free), columns))
+
+        if not state.rows:
+            continue
+
+        expected = full_recompute(state.records())
+        # Shuffled row order must not matter either
+        shuffled = state.records()
+        rng.shuffle(shuffled)
+        if analysis(state) != expected or full_recompute(shuffled) != expected:
+            raise AssertionError(f"Incremental analysis differs for {state.records()}")
+
+
+def time_updates(months, repeat=200):
+    rng = random.Random(months)
+    records = [
+        {
+            "date": str(month),
+            "revenue": rng.uniform(3e5, 6e5),
+            "expense_amount": rng.uniform(1e5, 4e5),
+            "loan_emi": rng.uniform(1e4, 3e4),
+            "accounts_receivable": rng.uniform(8e4, 1.5e5),
+            "accounts_payable": rng.uniform(6e4, 1.2e5),
+            "gst_due": rng.choice([0.0, 0.0, 15000.0]),
+        }
+        for month in pd.period_range("1900-01", periods=months, freq="M")
+    ]
+    state = IncrementalAggregates.from_records(records)
+    update = dict(records[-1], revenue=123456.78)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        state.replace(update)
+        analysis(state)
+    incremental = (time.perf_counter() - start) / repeat
+
+    records[-1] = update
+    start = time.perf_counter()
+    for _ in range(repeat):
+        full_recompute(records)
+    full = (time.perf_counter() - start) / repeat
+
+    print(
+        f"{months:>6} months: replace + rescore {incremental * 1e6:,.0f} us, "
+        f"full recompute {full * 1e6:,.0f} us ({full / incremental:.0f}x)"
+    )
+
+
+def main():
+    sequences = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = random.Random(0)
+    for _ in range(sequences):
+        check_sequence(rng)
+    print(f"{sequences} random sequences x {STEPS} steps: incremental matches full recompute")
+
+    for months in (36, 120, 1200):
+        time_updates(months)
+
+
+if __name__ == "__main__":
+    main()
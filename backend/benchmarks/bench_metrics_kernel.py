@@ -0,0 +1,105 @@
+"""
+Per-request CPU time of the /analyze metric services: the baseline
+commit's services (vendored in benchmarks.baseline_services), each deriving
+its own aggregates, against the current services sharing one aggregate
+object. The Monte Carlo forecast added later is left out of both, so they
+compute the same outputs.
+
+First checks that both return the same results.
+
+Run from backend/:
+    python -m benchmarks.bench_metrics_kernel
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import baseline_services as baseline
+from app.services.scoring import calculate_health_score, health_status
+from app.services.risk_engine import identify_risks
+from app.services.benchmarking import compare_with_benchmark
+from app.services.forecasting import calculate_cash_runway, forecast_revenue
+from app.services.working_capital import compute_working_capital_metrics
+from app.services.metrics import build_aggregates
+
+HISTORY_MONTHS = [12, 120, 1200]
+
+
+def make_history(months, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.period_range("2000-01", periods=months, freq="M"),
+        "revenue": rng.uniform(300000, 600000, months),
+        "expense_amount": rng.uniform(100000, 400000, months),
+        "loan_emi": rng.uniform(10000, 30000, months),
+        "accounts_receivable": rng.uniform(80000, 150000, months),
+        "accounts_payable": rng.uniform(60000, 120000, months),
+        "receivable": rng.uniform(80000, 150000, months),
+        "payable": rng.uniform(60000, 120000, months),
+        "gst_paid": rng.uniform(0, 20000, months),
+        "gst_due": rng.choice([0.0, 0.0, 0.0, 15000.0], months),
+    })
+
+
+def run_separate(df):
+    # The baseline services: each derives its own aggregates
+    score = baseline.calculate_health_score(df)
+    return [
+        score,
+        baseline.health_status(score["total_score"]),
+        baseline.identify_risks(df),
+        baseline.compare_with_benchmark(df, "Retail"),
+        baseline.generate_forecast(df),
+        baseline.compute_working_capital_metrics(df),
+    ]
+
+
+def run_shared(df):
+    aggregates = build_aggregates(df)
+    score = calculate_health_score(df, aggregates)
+    return [
+        score,
+        health_status(score["total_score"]),
+        identify_risks(df, aggregates),
+        compare_with_benchmark(df, "Retail", aggregates),
+        {
+            "revenue_forecast_6_months": forecast_revenue(df, aggregates=aggregates),
+            "cash_runway_months": calculate_cash_runway(df, aggregates),
+        },
+        compute_working_capital_metrics(df, aggregates),
+    ]
+
+
+def check():
+    for months in HISTORY_MONTHS:
+        df = make_history(months)
+        separate, shared = run_separate(df), run_shared(df)
+        if separate != shared:
+            raise AssertionError(f"{months} months: {separate} != {shared}")
+    print("baseline and shared-aggregate services agree")
+
+
+def cpu_time_per_call(fn, df, repeat=2000):
+    fn(df)
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(df)
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    check()
+    print(f"{'months':>8} {'separate (us)':>14} {'shared (us)':>12} {'speedup':>8}")
+    for months in HISTORY_MONTHS:
+        df = make_history(months)
+        separate = cpu_time_per_call(run_separate, df)
+        shared = cpu_time_per_call(run_shared, df)
+        print(
+            f"{months:>8} {separate * 1e6:>14.1f} {shared * 1e6:>12.1f} "
+            f"{separate / shared:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
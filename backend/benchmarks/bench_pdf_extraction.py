@@ -0,0 +1,126 @@
+"""
+extract_financial_data on synthetic 500-page filings: the precompiled,
+keyword-anchored extractor against the previous re.search-per-pattern
+approach, after checking both agree on a generated fixture corpus.
+
+Run from backend/:
+    python -m benchmarks.bench_pdf_extraction [pages]
+"""
+import random
+import re
+import sys
+import time
+
+from app.services.pdf_parser import (
+    AMOUNT_PATTERN,
+    FIELD_PATTERNS,
+    extract_financial_data,
+)
+
+LINES_PER_PAGE = 45
+FIXTURES = 2000
+
+KEYWORDS = [
+    "Revenue from operations", "Sales", "Total revenue", "Sales / Services",
+    "Sales\n/ Services", "Cash paid to suppliers", "Cash paid to employees",
+    "Expenses", "Trade receivables", "Receivables", "Accounts receivable",
+    "Trade payables", "Payables", "Accounts payable", "Inventories",
+    "Inventory", "Stock", "Loan repayments", "Loan repayment", "EMI",
+    "Cash at end of period", "Cash and bank balances", "Cash balance",
+    "GST paid", "Income tax paid", "Direct taxes paid",
+    "Quarter ended March 31, 2024",
+]
+FILLER = [
+    "the company continued to invest in its distribution network",
+    "notes to the standalone financial statements",
+    "particulars as at the end of the reporting period",
+    "see accompanying notes forming part of the financial statements",
+]
+AMOUNTS = ["1,234.56", "12,345", "7", "1,23,456.00", "99.50", "0.00"]
+
+
+def legacy_extract(text):
+    # Previous behaviour: every pattern searched over the whole text in turn
+    text = text.lower()
+    result = {}
+    date_match = re.search(r'quarter ended (\w+ \d{1,2}, \d{4})', text, re.IGNORECASE)
+    if date_match:
+        result["date"] = date_match.group(1)
+    for field, patterns in FIELD_PATTERNS.items():
+        for _, pattern in patterns:
+            match = re.search(pattern + AMOUNT_PATTERN, text, re.IGNORECASE)
+            if match:
+                result[field] = float(match.group(1).replace(",", ""))
+                break
+    return result
+
+
+def anchored_extract(text):
+    data = extract_financial_data(text)
+    result = {
+        field: data[field] for field in FIELD_PATTERNS if data[field] != 0.0
+    }
+    return result
+
+
+def fixture_text(rng):
+    lines = []
+    for _ in range(rng.randint(0, 40)):
+        parts = [
+            rng.choice(KEYWORDS) if rng.random() < 0.6 else
+            rng.choice(AMOUNTS) if rng.random() < 0.7 else rng.choice(FILLER)
+            for _ in range(rng.randint(1, 5))
+        ]
+        lines.append(" ".join(parts))
+    return "\n".join(lines)
+
+
+def filing_text(pages, rng, keyword_rate=0.02):
+    lines = []
+    for _ in range(pages * LINES_PER_PAGE):
+        if rng.random() < keyword_rate:
+            lines.append(f"{rng.choice(KEYWORDS)} {rng.choice(FILLER)} {rng.choice(AMOUNTS)}")
+        else:
+            lines.append(f"{rng.choice(FILLER)} {rng.choice(FILLER)}")
+    return "\n".join(lines)
+
+
+def check_fixtures():
+    rng = random.Random(0)
+    for i in range(FIXTURES):
+        text = fixture_text(rng)
+        expected = {k: v for k, v in legacy_extract(text).items() if k != "date" and v != 0.0}
+        actual = anchored_extract(text)
+        if expected != actual:
+            raise AssertionError(f"Fixture {i} differs:\n{text!r}\n{expected}\n{actual}")
+    print(f"{FIXTURES} fixtures: anchored extractor matches the per-pattern search")
+
+
+def best_of(fn, text, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    check_fixtures()
+
+    # A filing that mentions the fields, and one that never does (every
+    # pattern then has to rule out the whole document)
+    for label, rate in (("with fields", 0.02), ("no fields", 0.0)):
+        text = filing_text(pages, random.Random(1), keyword_rate=rate)
+        legacy = best_of(legacy_extract, text)
+        anchored = best_of(anchored_extract, text)
+        print(
+            f"{pages}-page text, {label} ({len(text) / 1e6:.1f} MB): "
+            f"per-pattern {legacy * 1000:.1f} ms, anchored {anchored * 1000:.1f} ms "
+            f"({legacy / anchored:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
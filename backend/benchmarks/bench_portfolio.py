@@ -0,0 +1,99 @@
+"""
+Throughput of the batch portfolio scorer in businesses/second.
+
+Run from backend/:
+    python -m benchmarks.bench_portfolio [businesses]
+
+First checks that a business with a non-numeric value is reported as an
+error without failing the others. Exits non-zero when throughput falls
+below TARGET_BUSINESSES_PER_SECOND.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.portfolio import analyze_portfolio
+from app.services.scoring import calculate_health_score, health_status
+from app.services.risk_engine import identify_risks
+from app.services.benchmarking import compare_with_benchmark
+
+TARGET_BUSINESSES_PER_SECOND = 15000
+INDUSTRIES = ["Retail", "Manufacturing", "Services", "Agriculture", "Logistics", "E-commerce"]
+
+
+def make_portfolio(businesses, seed=0):
+    rng = np.random.default_rng(seed)
+    portfolio = []
+    for i in range(businesses):
+        months = int(rng.choice([12, 24, 36]))
+        portfolio.append({
+            "business_id": f"sme-{i}",
+            "industry": INDUSTRIES[i % len(INDUSTRIES)],
+            "monthly_data": [
+                {
+                    "revenue": float(rng.uniform(300000, 600000)),
+                    "expense_amount": float(rng.uniform(100000, 400000)),
+                    "loan_emi": float(rng.uniform(10000, 30000)),
+                    "accounts_receivable": float(rng.uniform(80000, 150000)),
+                    "accounts_payable": float(rng.uniform(60000, 120000)),
+                    "gst_due": float(rng.choice([0.0, 0.0, 15000.0])),
+                }
+                for _ in range(months)
+            ],
+        })
+    return portfolio
+
+
+def per_business_throughput(portfolio):
+    start = time.perf_counter()
+    for business in portfolio:
+        df = pd.DataFrame(business["monthly_data"])
+        score = calculate_health_score(df)
+        health_status(score["total_score"])
+        identify_risks(df)
+        compare_with_benchmark(df, business["industry"])
+    return len(portfolio) / (time.perf_counter() - start)
+
+
+def check():
+    portfolio = make_portfolio(60, seed=1)
+    clean = analyze_portfolio(portfolio)
+
+    bad = [3, 17]
+    portfolio[3]["monthly_data"][5]["revenue"] = "abc"
+    portfolio[17]["monthly_data"][0]["gst_due"] = {"amount": 1}
+    results = analyze_portfolio(portfolio)
+
+    for position, (before, after) in enumerate(zip(clean, results)):
+        if position in bad:
+            if "error" not in after:
+                raise AssertionError(f"business {position} has a non-numeric value but scored")
+        elif after != before:
+            raise AssertionError(f"business {position} changed when another was malformed")
+    print(f"non-numeric values: {results[3]['error']!r}, {results[17]['error']!r}; the rest scored")
+
+
+def main():
+    businesses = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    check()
+    portfolio = make_portfolio(businesses)
+
+    start = time.perf_counter()
+    analyze_portfolio(portfolio)
+    elapsed = time.perf_counter() - start
+
+    throughput = businesses / elapsed
+    print(f"{businesses} businesses in {elapsed:.2f}s -> {throughput:,.0f} businesses/s "
+          f"(target {TARGET_BUSINESSES_PER_SECOND:,})")
+
+    reference = per_business_throughput(portfolio[:1000])
+    print(f"per-business path: {reference:,.0f} businesses/s")
+
+    if throughput < TARGET_BUSINESSES_PER_SECOND:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+/report repeat downloads: served from the rendered-report cache, answered
+with 304 on a matching If-None-Match, and fetched by key, against
+rendering again with the insights already cached (what a repeat download
+cost before).
+
+First checks, against the fake LLM server, that a cached report is the
+same bytes and ETag as the first download and comes back without calling
+the LLM or reportlab, that reports without insights are not cached, and
+that the cache stays within its byte limit and its pointers within theirs.
+
+Run from backend/:
+    python -m benchmarks.bench_report_cache [repeats]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+FAKE_LLM_PORT = 8920
+CACHE_DIR = tempfile.mkdtemp(prefix="report-cache-")
+
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{FAKE_LLM_PORT}"
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+os.environ["REPORT_CACHE_DIR"] = CACHE_DIR
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from benchmarks import fake_llm_server  # noqa: E402
+from benchmarks.bench_report_rendering import analysis  # noqa: E402
+from app.api import report as report_api  # noqa: E402
+from app.core.cache import canonical_hash  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import report_cache  # noqa: E402
+
+calls = {"llm": 0, "render": 0}
+
+
+def counted(name, fn):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def new_analysis(seed):
+    return analysis(random.Random(seed))
+
+
+def check(client):
+    body = {"analysis": new_analysis(1)}
+    first = client.post("/report", json=body)
+    etag = first.headers["etag"]
+    before = dict(calls)
+
+    again = client.post("/report", json=body)
+    if again.content != first.content or again.headers["etag"] != etag:
+        raise AssertionError("a cached report must be the same bytes and ETag")
+    if calls != before:
+        raise AssertionError(f"a cached report called {calls} (was {before})")
+
+    not_modified = client.post("/report", json=body, headers={"If-None-Match": f'W/"x", {etag}'})
+    if not_modified.status_code != 304 or not_modified.content:
+        raise AssertionError("a matching If-None-Match must give an empty 304")
+
+    location = first.headers["content-location"]
+    if client.get(location).content != first.content:
+        raise AssertionError(f"GET {location} differs")
+    if client.get(location, headers={"If-None-Match": etag}).status_code != 304:
+        raise AssertionError(f"GET {location} ignores If-None-Match")
+    if client.get("/report/../../etc/passwd").status_code != 404:
+        raise AssertionError("keys that are not hashes must 404")
+
+    # The LLM failing: served, but not cached
+    failing = {"analysis": {k: v for k, v in new_analysis(2).items() if k != "score"}}
+    for _ in range(2):
+        response = client.post("/report", json=failing)
+        if response.status_code != 200 or "content-location" in response.headers:
+            raise AssertionError("a report without insights must not be cached")
+
+    limit = 20 * len(first.content)
+    report_cache.report_cache.max_bytes = limit
+    for seed in range(100, 160):
+        client.post("/report", json={"analysis": new_analysis(seed)})
+    stored = sum(size for _, size, _ in report_cache.report_cache._entries())
+    if stored > limit:
+        raise AssertionError(f"report cache holds {stored} bytes, over its {limit} limit")
+    report_cache.report_cache.max_bytes = None
+
+    # A pointer found leading to an evicted report is deleted...
+    for seed in range(100, 160):
+        if report_cache.get_cached_report(new_analysis(seed)) is None:
+            pointer = report_cache.report_pointers.path(canonical_hash(new_analysis(seed)))
+            if os.path.exists(pointer):
+                raise AssertionError(f"{pointer} points at an evicted report")
+    # ...and pointers are bounded on their own
+    entries = 10
+    report_cache.report_pointers.max_bytes = entries * report_cache.POINTER_BYTES
+    for seed in range(200, 230):
+        client.post("/report", json={"analysis": new_analysis(seed)})
+    pointers = len(report_cache.report_pointers._entries())
+    if pointers > entries:
+        raise AssertionError(f"{pointers} report pointers kept, over the {entries} limit")
+    report_cache.report_pointers.max_bytes = None
+
+    print("cached reports match the first download and skip the LLM and reportlab")
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def run(client, repeats):
+    body = {"analysis": new_analysis(7)}
+    start = time.perf_counter()
+    first = client.post("/report", json=body)
+    miss = (time.perf_counter() - start) * 1000
+    etag = first.headers["etag"]
+    location = first.headers["content-location"]
+
+    def rerender():
+        # Insights are still cached in memory; only the PDF is rendered again
+        for name in os.listdir(CACHE_DIR):
+            os.unlink(os.path.join(CACHE_DIR, name))
+        client.post("/report", json=body)
+
+    rendered = timed(rerender, repeats)
+    hit = timed(lambda: client.post("/report", json=body), repeats)
+    conditional = timed(lambda: client.post("/report", json=body, headers={"If-None-Match": etag}), repeats)
+    by_key = timed(lambda: client.get(location, headers={"If-None-Match": etag}), repeats)
+
+    print(f"/report, {fake_llm_server.FAKE_LLM_DELAY * 1000:.0f} ms LLM:")
+    print(f"  first download (LLM + render)        {miss:8.1f} ms")
+    print(f"  repeat, insights cached, re-render   {rendered:8.1f} ms")
+    print(f"  repeat, report cache                 {hit:8.1f} ms")
+    print(f"  repeat, If-None-Match -> 304         {conditional:8.1f} ms")
+    print(f"  GET /report/{{key}}, 304              {by_key:8.1f} ms")
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fake_llm_server.FAKE_LLM_DELAY = 0.2
+    fake_llm_server.serve_in_thread(fake_llm_server.app, FAKE_LLM_PORT)
+
+    report_api.generate_ai_insights = counted("llm", report_api.generate_ai_insights)
+    # A slow fake LLM must not hit the insights budget
+    report_api.REPORT_INSIGHTS_BUDGET = 30
+    report_api.render_report_body = counted("render", report_api.render_report_body)
+    report_api.finish_report = counted("render", report_api.finish_report)
+
+    try:
+        with TestClient(app) as client:
+            check(client)
+            run(client, repeats)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
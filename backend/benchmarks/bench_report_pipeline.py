@@ -0,0 +1,104 @@
+"""
+/report latency with the insight-independent pages rendered while the
+LLM call is in flight, against waiting for the insights and then
+rendering the whole report; and with an LLM slower than
+REPORT_INSIGHTS_BUDGET, which ships a placeholder instead of waiting.
+
+First checks, with reportlab's invariant mode and a frozen clock, that a
+report assembled from its two sections has the pages and page text of
+generate_pdf_report, and that the placeholder is marked.
+
+Run from backend/:
+    python -m benchmarks.bench_report_pipeline [requests]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+FAKE_LLM_PORT = 8921
+
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{FAKE_LLM_PORT}"
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+# Every request renders: no report cache
+os.environ["REPORT_CACHE_DIR"] = ""
+
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from reportlab import rl_config  # noqa: E402
+
+from benchmarks import fake_llm_server  # noqa: E402
+from benchmarks.bench_report_rendering import INSIGHTS, FrozenDateTime, analysis  # noqa: E402
+from benchmarks.bench_report_streaming import check_xref, page_texts  # noqa: E402
+from app.api import report as report_api  # noqa: E402
+from app.services import pdf_report  # noqa: E402
+from app.services.ai_insights import generate_ai_insights  # noqa: E402
+from app.services.pdf_report import finish_report, generate_pdf_report, render_report_body  # noqa: E402
+
+rng = random.Random(0)
+
+
+def check():
+    for seed in range(100):
+        a = analysis(random.Random(seed))
+        insights = INSIGHTS * (seed % 5)
+        assembled = finish_report(render_report_body(a), insights)
+        check_xref(assembled)
+        if page_texts(assembled) != page_texts(generate_pdf_report(a, insights).getvalue()):
+            raise AssertionError(f"analysis {seed}: assembled report differs from generate_pdf_report")
+
+    placeholder = page_texts(finish_report(render_report_body(a), None, insights_pending=True))
+    if "[Insights not included]" not in placeholder[-1]:
+        raise AssertionError("a missed budget must leave a marked placeholder")
+    print("two-section reports match generate_pdf_report page for page")
+
+
+async def sequential(a):
+    # Before: insights first, then the whole report
+    insights = await generate_ai_insights(a)
+    return await run_in_threadpool(lambda: generate_pdf_report(a, insights).getvalue())
+
+
+async def pipelined(a):
+    return (await report_api.generate_report({"analysis": a}, None)).body
+
+
+async def timed(fn, count):
+    # Fresh analyses each time, so neither insights nor reports are cached
+    samples = []
+    for _ in range(count):
+        a = analysis(rng)
+        start = time.perf_counter()
+        await fn(a)
+        samples.append((time.perf_counter() - start) * 1000)
+    return sum(samples) / len(samples)
+
+
+async def run(count):
+    print(f"/report, {fake_llm_server.FAKE_LLM_DELAY * 1000:.0f} ms LLM, mean of {count}:")
+    print(f"  insights, then render            {await timed(sequential, count):7.1f} ms")
+    print(f"  render while the LLM runs        {await timed(pipelined, count):7.1f} ms")
+
+    fake_llm_server.FAKE_LLM_DELAY = 2.0
+    report_api.REPORT_INSIGHTS_BUDGET = 0.5
+    body = await pipelined(analysis(rng))
+    if "[Insights not included]" not in page_texts(body)[-1]:
+        raise AssertionError("the slow LLM's report has no placeholder")
+    print(f"2000 ms LLM, {report_api.REPORT_INSIGHTS_BUDGET * 1000:.0f} ms budget:")
+    print(f"  insights, then render            {await timed(sequential, 1):7.1f} ms")
+    print(f"  placeholder after the budget     {await timed(pipelined, 1):7.1f} ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rl_config.invariant = 1
+    pdf_report.datetime = FrozenDateTime
+    check()
+
+    fake_llm_server.FAKE_LLM_DELAY = 0.2
+    fake_llm_server.serve_in_thread(fake_llm_server.app, FAKE_LLM_PORT)
+    asyncio.run(run(count))
+
+
+if __name__ == "__main__":
+    main()
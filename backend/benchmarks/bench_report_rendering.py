@@ -0,0 +1,155 @@
+"""
+PDF report rendering: what building the styles and table templates per
+report cost before they were cached, and bulk rendering throughput in
+reports/second and reports/second per core, serial and across process
+pools.
+
+First checks, with reportlab's invariant mode and a frozen clock, that
+bulk rendering to a directory and to a zip archive writes exactly the
+bytes generate_pdf_report gives for each analysis, and lists failures in
+failed.json.
+
+Run from backend/:
+    python -m benchmarks.bench_report_rendering [reports]
+"""
+import datetime as dt
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab import rl_config
+from reportlab.platypus import TableStyle
+
+from app.services import pdf_report
+from app.services.pdf_report import _build_styles, generate_pdf_report, render_reports
+
+INSIGHTS = "Revenue is stable.\n\n- Collect receivables sooner\n- Renegotiate supplier terms\n1. Review GST filings"
+
+
+class FrozenDateTime(dt.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 3, 31, 18, 5)
+
+
+def analysis(rng):
+    return {
+        "score": rng.randint(0, 100),
+        "status": rng.choice(["Healthy", "Watch", "Critical"]),
+        "breakdown": {f"metric_{i}": rng.randint(0, 25) for i in range(4)},
+        "risks": [
+            {"type": f"Risk {i}", "severity": rng.choice(["High", "Medium", "Low"]), "reason": "Because"}
+            for i in range(rng.randint(0, 4))
+        ],
+        "benchmarks": {
+            f"ratio_{i}": {
+                "business": round(rng.random(), 2),
+                "industry_avg": round(rng.random(), 2),
+                "status": rng.choice(["Better", "Worse", "Neutral"]),
+            }
+            for i in range(5)
+        },
+        "working_capital": {
+            "dso": rng.randint(10, 90), "dpo": rng.randint(10, 90), "cash_conversion_cycle": 20,
+            "risk_level": rng.choice(["High", "Medium", "Low"]), "actions": ["Invoice weekly"],
+        },
+        "forecast": {
+            "cash_runway_months": rng.randint(1, 24),
+            "revenue_forecast_6_months": [rng.uniform(1e5, 5e5) for _ in range(6)],
+        },
+    }
+
+
+def reports(count, seed=0):
+    rng = random.Random(seed)
+    return [(f"business-{i}", analysis(rng), INSIGHTS) for i in range(count)]
+
+
+def check():
+    batch = reports(40) + [("broken", {"score": 1, "breakdown": ["not", "a", "dict"]}, None)]
+    expected = {name: generate_pdf_report(a, ins).getvalue() for name, a, ins in batch[:-1]}
+
+    with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(2) as pool:
+        result = render_reports(batch, directory, pool=pool)
+        written = {
+            name[:-4]: open(os.path.join(directory, name), "rb").read()
+            for name in os.listdir(directory) if name.endswith(".pdf")
+        }
+        failed = json.load(open(os.path.join(directory, "failed.json")))
+
+        archive_path = os.path.join(directory, "reports.zip")
+        render_reports(batch, archive_path, pool=pool)
+        with zipfile.ZipFile(archive_path) as archive:
+            archived = {
+                name[:-4]: archive.read(name) for name in archive.namelist() if name.endswith(".pdf")
+            }
+
+    if written != expected or archived != expected:
+        raise AssertionError("bulk rendering differs from generate_pdf_report")
+    if result["rendered"] != len(expected) or [f["name"] for f in failed] != ["broken"]:
+        raise AssertionError(f"unexpected result {result}")
+    print(f"bulk output matches generate_pdf_report for {len(expected)} reports, failures listed")
+
+
+def per_report_setup():
+    # What every call used to build before styles and templates were cached
+    _build_styles()
+    for commands in (
+        pdf_report.BREAKDOWN_TABLE_STYLE, pdf_report.BENCHMARK_TABLE_STYLE,
+        pdf_report.WORKING_CAPITAL_TABLE_STYLE, pdf_report.FORECAST_TABLE_STYLE,
+    ):
+        TableStyle(commands.getCommands())
+
+
+def rate(fn, count):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rl_config.invariant = 1
+    pdf_report.datetime = FrozenDateTime
+    check()
+
+    batch = reports(count, seed=1)
+    setup = 1000 / rate(lambda: [per_report_setup() for _ in range(500)], 500)
+    render = 1000 / rate(lambda: [generate_pdf_report(a, ins) for _, a, ins in batch[:500]], 500)
+    print(
+        f"per report: styles and table templates {setup:.2f} ms (now built once), "
+        f"full render {render:.2f} ms"
+    )
+
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        serial = rate(lambda: render_reports(batch, os.path.join(directory, "serial.zip"), pool=map_pool), count)
+        print(f"{count} reports, serial: {serial:,.0f} reports/s")
+        for workers in sorted({1, 2, cores}):
+            with ProcessPoolExecutor(workers) as pool:
+                # Start the workers before timing
+                list(pool.map(int, range(workers)))
+                total = rate(lambda: render_reports(batch, os.path.join(directory, f"{workers}.zip"), pool=pool), count)
+            used = min(workers, cores)
+            print(
+                f"{count} reports, {workers} workers on {cores} cores: {total:,.0f} reports/s, "
+                f"{total / used:,.0f} reports/s/core"
+            )
+
+
+class _MapPool:
+    # In-process stand-in with the Executor.map signature
+    def map(self, fn, iterable, chunksize=1):
+        return map(fn, iterable)
+
+
+map_pool = _MapPool()
+
+
+if __name__ == "__main__":
+    main()
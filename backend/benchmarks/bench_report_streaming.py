@@ -0,0 +1,126 @@
+"""
+Portfolio PDF reports streamed section by section against building the
+whole document in one buffer: peak memory and time to the first byte as
+the portfolio grows.
+
+First checks, with reportlab's invariant mode and a frozen clock, that
+the streamed report has the pages and page text of the same sections
+built as one document, that its xref table points at every object, and
+that a failing business section is replaced by a note.
+
+Run from backend/:
+    python -m benchmarks.bench_report_streaming [businesses ...]
+"""
+import random
+import re
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import pypdfium2 as pdfium
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+from app.services import pdf_report
+from app.services.pdf_report import _add_page_numbers, _portfolio_sections, stream_portfolio_report
+from benchmarks.bench_report_rendering import FrozenDateTime, analysis
+
+
+def portfolio(count, seed=0):
+    rng = random.Random(seed)
+    results = [dict(analysis(rng), business_id=f"B{i:04d}") for i in range(count)]
+    # As analyze_portfolio reports a business it could not score
+    results[count // 2] = {"business_id": f"B{count // 2:04d}", "error": "monthly_data missing"}
+    return results
+
+
+def monolithic(results):
+    # Baseline: every section in one document, built into one buffer
+    elements = []
+    for _, build in _portfolio_sections(results):
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(build())
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    doc.build(elements, onFirstPage=_add_page_numbers, onLaterPages=_add_page_numbers)
+    return buffer.getvalue()
+
+
+def page_texts(data):
+    pdf = pdfium.PdfDocument(data)
+    return [pdf[i].get_textpage().get_text_range() for i in range(len(pdf))]
+
+
+def check_xref(data):
+    xref_at = int(data[data.rindex(b"startxref") + 9:].split()[0])
+    entries = re.findall(rb"(\d{10}) 00000 n", data[xref_at:])
+    for number, offset in enumerate(entries, 1):
+        if not data.startswith(b"%d 0 obj" % number, int(offset)):
+            raise AssertionError(f"xref entry {number} does not point at its object")
+
+
+def check():
+    results = portfolio(60)
+    streamed = b"".join(stream_portfolio_report(results))
+    check_xref(streamed)
+    expected = page_texts(monolithic(results))
+    if page_texts(streamed) != expected:
+        raise AssertionError("streamed pages differ from the single-document build")
+
+    broken = results[:3] + [{"business_id": "broken", "score": 1, "breakdown": ["not", "a", "dict"]}]
+    last_page = page_texts(b"".join(stream_portfolio_report(broken)))[-1]
+    if "Business broken" not in last_page or "could not be generated" not in last_page:
+        raise AssertionError("a failing section must be replaced by a note")
+    print(f"streamed report matches the single-document build ({len(expected)} pages)")
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first, size = fn(start)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak, size
+
+
+def streamed(results):
+    def consume(start):
+        first, size = None, 0
+        for chunk in stream_portfolio_report(results):
+            if first is None and chunk:
+                first = time.perf_counter() - start
+            # Sent on and dropped, as a response body is
+            size += len(chunk)
+        return first, size
+    return consume
+
+
+def buffered(results):
+    def build(start):
+        data = monolithic(results)
+        return time.perf_counter() - start, len(data)
+    return build
+
+
+def main():
+    counts = [int(n) for n in sys.argv[1:]] or [10, 50, 200]
+    rl_config.invariant = 1
+    pdf_report.datetime = FrozenDateTime
+    check()
+
+    for count in counts:
+        results = portfolio(count, seed=1)
+        for label, fn in (("one buffer", buffered(results)), ("streamed  ", streamed(results))):
+            first, total, peak, size = measure(fn)
+            print(
+                f"{count:4} businesses ({size / 1e6:5.1f} MB), {label}: first byte {first * 1000:7,.0f} ms, "
+                f"total {total * 1000:7,.0f} ms, peak memory {peak / 1e6:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
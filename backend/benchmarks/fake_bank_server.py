@@ -0,0 +1,104 @@
+"""
+Local stand-in for a cursor-paginated bank API, for tests and benchmarks
+of HttpBankAdapter. Every page request sleeps FAKE_BANK_DELAY seconds
+before replying.
+
+Transactions are generated deterministically from the account id: an
+account named like "acct-250" has 250 of them, any other account
+FAKE_BANK_TRANSACTIONS. POST /accounts/{id}/append?count=N adds N newer
+ones, as if they had just cleared. transactions() gives the same rows
+directly, to check what a client received.
+
+Run from backend/:
+    python -m benchmarks.fake_bank_server --port 8910 --delay 0.02
+and point the app at it with BANK_API_URL=http://127.0.0.1:8910
+"""
+import argparse
+import asyncio
+import datetime
+import zlib
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+import uvicorn
+
+FAKE_BANK_DELAY = 0.02
+FAKE_BANK_TRANSACTIONS = 100_000
+MAX_PAGE_SIZE = 5000
+START = datetime.date(2022, 1, 1)
+DAYS = 3 * 365
+
+app = FastAPI(title="Fake bank")
+
+# account_id -> transactions added through /append
+appended = {}
+
+
+def initial_count(account_id):
+    suffix = account_id.rsplit("-", 1)[-1]
+    return int(suffix) if suffix.isdigit() else FAKE_BANK_TRANSACTIONS
+
+
+def transaction_count(account_id):
+    return initial_count(account_id) + appended.get(account_id, 0)
+
+
+def transactions(account_id, start=0, stop=None):
+    count = transaction_count(account_id)
+    stop = count if stop is None else min(stop, count)
+    spread = max(initial_count(account_id), 1)
+    seed = zlib.crc32(account_id.encode())
+    rows = []
+    for i in range(start, stop):
+        credit = (i * 31 + seed) % 3 != 0
+        rows.append({
+            "id": f"{account_id}-{i}",
+            # Oldest first, the initial ones spread evenly over DAYS
+            "date": (START + datetime.timedelta(days=i * DAYS // spread)).isoformat(),
+            "amount": 100 + (i * 7919 + seed) % 200000,
+            "type": "credit" if credit else "debit",
+            "description": "Customer payment" if credit else "Supplier payment",
+        })
+    return rows
+
+
+@app.get("/accounts/{account_id}/transactions")
+async def list_transactions(account_id: str, limit: int = 1000, cursor: str | None = None):
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    await asyncio.sleep(FAKE_BANK_DELAY)
+    page = transactions(account_id, offset, offset + min(limit, MAX_PAGE_SIZE))
+    end = offset + len(page)
+    # JSONResponse directly: pages are plain dicts, no encoder pass needed
+    return JSONResponse({
+        "transactions": page,
+        "next_cursor": str(end),
+        "has_more": end < transaction_count(account_id),
+    })
+
+
+@app.post("/accounts/{account_id}/append")
+async def append_transactions(account_id: str, count: int = 1):
+    appended[account_id] = appended.get(account_id, 0) + count
+    return {"account_id": account_id, "transactions": transaction_count(account_id)}
+
+
+def main():
+    global FAKE_BANK_DELAY
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8910)
+    parser.add_argument("--delay", type=float, default=FAKE_BANK_DELAY)
+    args = parser.parse_args()
+
+    FAKE_BANK_DELAY = args.delay
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
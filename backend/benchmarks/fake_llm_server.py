@@ -0,0 +1,100 @@
+"""
+Local stand-in for the Groq chat completions API, for load tests and
+benchmarks. Every completion sleeps FAKE_LLM_DELAY seconds before replying;
+streamed completions send their first token after that delay.
+
+Run from backend/:
+    python -m benchmarks.fake_llm_server --port 8900 --delay 2
+and point the app at it with GROQ_BASE_URL=http://127.0.0.1:8900
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+FAKE_LLM_DELAY = 2.0
+
+app = FastAPI(title="Fake LLM")
+
+
+def completion_text(messages):
+    prompt = messages[-1]["content"] if messages else ""
+    return f"Fake completion for a {len(prompt)}-character prompt."
+
+
+async def stream_chunks(payload):
+    # First token after FAKE_LLM_DELAY, then one word every 10 ms
+    words = completion_text(payload.get("messages", [])).split(" ")
+    await asyncio.sleep(FAKE_LLM_DELAY)
+    for i, word in enumerate(words):
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "delta": {"content": word if i == 0 else " " + word},
+                "finish_reason": None
+            }]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(0.01)
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(payload: dict):
+    if payload.get("stream"):
+        return StreamingResponse(stream_chunks(payload), media_type="text/event-stream")
+
+    await asyncio.sleep(FAKE_LLM_DELAY)
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": completion_text(payload.get("messages", []))
+            },
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+
+def serve_in_thread(asgi_app, port):
+    """Start a uvicorn server on a daemon thread and wait until it is up."""
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    global FAKE_LLM_DELAY
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--delay", type=float, default=FAKE_LLM_DELAY)
+    args = parser.parse_args()
+
+    FAKE_LLM_DELAY = args.delay
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
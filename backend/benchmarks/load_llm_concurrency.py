@@ -0,0 +1,91 @@
+"""
+Load test: latency of an unrelated endpoint (GET /) while many /insights
+requests wait on a slow LLM.
+
+Starts the fake LLM server and the app in-process, then compares p50/p99 of
+GET / with no load against the same probe while INSIGHT_REQUESTS distinct
+/insights calls are in flight.
+
+Run from backend/:
+    python -m benchmarks.load_llm_concurrency
+"""
+import asyncio
+import os
+import statistics
+import time
+
+FAKE_LLM_PORT = 8900
+APP_PORT = 8901
+INSIGHT_REQUESTS = 50
+PROBES = 200
+
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{FAKE_LLM_PORT}"
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+
+import httpx  # noqa: E402
+
+from benchmarks import fake_llm_server  # noqa: E402
+from app.main import app  # noqa: E402
+
+APP_URL = f"http://127.0.0.1:{APP_PORT}"
+
+
+def analysis(i):
+    return {
+        "score": i,
+        "status": "Watch",
+        "breakdown": {},
+        "risks": [],
+        "benchmarks": {},
+        "forecast": {},
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe(client, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.get(f"{APP_URL}/")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+
+def report(label, samples):
+    print(
+        f"{label:<28} p50 {statistics.median(samples):7.2f} ms   "
+        f"p99 {percentile(samples, 99):7.2f} ms"
+    )
+
+
+async def run():
+    limits = httpx.Limits(max_connections=INSIGHT_REQUESTS + 10)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        report("GET / idle", await probe(client, PROBES))
+
+        insights = [
+            client.post(f"{APP_URL}/insights", json={"analysis": analysis(i)})
+            for i in range(INSIGHT_REQUESTS)
+        ]
+        start = time.perf_counter()
+        *responses, samples = await asyncio.gather(*insights, probe(client, PROBES))
+        elapsed = time.perf_counter() - start
+
+        report(f"GET / with {INSIGHT_REQUESTS} insights", samples)
+        ok = sum(r.status_code == 200 for r in responses)
+        print(f"{ok}/{INSIGHT_REQUESTS} insights completed in {elapsed:.2f}s")
+
+
+def main():
+    fake_llm_server.serve_in_thread(fake_llm_server.app, FAKE_LLM_PORT)
+    fake_llm_server.serve_in_thread(app, APP_PORT)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+IncrementalAggregates against a full recompute with build_aggregates, on
+seeded random month sequences: appends in any order, replacements,
+removals, months with missing, None and NaN values, and GST columns
+present in all, some or none of the months.
+"""
+import json
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from app.services.benchmarking import INDUSTRY_BENCHMARKS, compare_with_benchmark
+from app.services.metrics import AGGREGATE_COLUMNS, IncrementalAggregates, build_aggregates
+from app.services.risk_engine import identify_risks
+from app.services.scoring import calculate_health_score
+from app.services.working_capital import compute_working_capital_metrics
+
+SEEDS = range(40)
+MONTHS = list(pd.period_range("2020-01", periods=36, freq="M"))
+REQUIRED_COLUMNS = ["revenue", "expense_amount", "loan_emi", "accounts_receivable", "accounts_payable"]
+OPTIONAL_COLUMNS = ["receivable", "payable", "expense", "gst_paid", "gst_due"]
+# Amounts whose ratios land on the score thresholds once summed, and whose
+# float sums depend on summation order
+AMOUNTS = [0.1, 0.2, 0.3, 0.6, 0.7, 0.75, 0.8, 0.9, 1.0, 1.5, 100.1, 1e5 + 0.01, 0, 3]
+
+
+def random_value(rng, missing_rate=0.1):
+    roll = rng.random()
+    if roll < missing_rate / 2:
+        return None
+    if roll < missing_rate:
+        return float("nan")
+    return rng.choice(AMOUNTS) * rng.choice([1, 1, 2, 10])
+
+
+def random_record(rng, month, columns, missing_rate=0.1):
+    record = {"date": str(month)}
+    for column in columns:
+        if rng.random() < missing_rate / 2:
+            continue
+        record[column] = random_value(rng, missing_rate)
+    return record
+
+
+def random_columns(rng):
+    return REQUIRED_COLUMNS + [c for c in OPTIONAL_COLUMNS if rng.random() < 0.6]
+
+
+def _outcome(fn, *args):
+    # A service that fails must fail the same way on both paths
+    try:
+        return fn(*args)
+    except KeyError as e:
+        return f"KeyError: {e}"
+
+
+def analysis(aggregates):
+    result = {
+        "score": _outcome(calculate_health_score, None, aggregates),
+        "risks": _outcome(identify_risks, None, aggregates),
+        "working_capital": _outcome(compute_working_capital_metrics, None, aggregates),
+    }
+    for industry in INDUSTRY_BENCHMARKS:
+        result[industry] = _outcome(compare_with_benchmark, None, industry, aggregates)
+    # NaN-safe comparison
+    return json.dumps(result, sort_keys=True)
+
+
+def same_number(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+def assert_matches_full_recompute(state):
+    full = build_aggregates(pd.DataFrame(state.records()))
+
+    assert state.months == full.months
+    for name in AGGREGATE_COLUMNS:
+        assert state.has(name) == full.has(name), name
+        if full.has(name):
+            assert same_number(state.sum(name), full.sum(name)), name
+            assert state.count(name) == full.count(name), name
+            assert same_number(state.mean(name), full.mean(name)), name
+    assert analysis(state) == analysis(full)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_appends_in_any_order(seed):
+    rng = random.Random(seed)
+    columns = random_columns(rng)
+    months = rng.sample(MONTHS, rng.randint(1, len(MONTHS)))
+
+    state = IncrementalAggregates()
+    for month in months:
+        state.append(random_record(rng, month, columns))
+        assert_matches_full_recompute(state)
+
+    with pytest.raises(ValueError):
+        state.append(random_record(rng, months[0], columns))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_replace_and_remove(seed):
+    rng = random.Random(seed)
+    columns = random_columns(rng)
+    state = IncrementalAggregates.from_records(
+        [random_record(rng, month, columns) for month in rng.sample(MONTHS, 12)]
+    )
+
+    for _ in range(30):
+        present = sorted(state.rows)
+        if present and rng.random() < 0.7:
+            state.replace(random_record(rng, rng.choice(present), columns))
+        elif len(present) > 1:
+            state.remove(rng.choice(present))
+        else:
+            free = [m for m in MONTHS if m not in state.rows]
+            state.append(random_record(rng, rng.choice(free), columns))
+        assert_matches_full_recompute(state)
+
+    with pytest.raises(KeyError):
+        state.replace({"date": "1999-01", "revenue": 1.0})
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_replace_restores_original(seed):
+    rng = random.Random(seed)
+    columns = random_columns(rng)
+    records = [random_record(rng, month, columns) for month in MONTHS[:24]]
+    state = IncrementalAggregates.from_records(records)
+    before = analysis(state)
+
+    month = rng.randrange(len(records))
+    state.replace(random_record(rng, MONTHS[month], columns))
+    state.replace(records[month])
+
+    assert analysis(state) == before
+    assert_matches_full_recompute(state)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_nan_months(seed):
+    rng = random.Random(seed)
+    columns = random_columns(rng)
+    records = [random_record(rng, month, columns) for month in MONTHS[:12]]
+    # Whole months with nothing reported, as None, NaN or left out
+    for month in rng.sample(range(len(records)), 4):
+        blank = rng.choice([None, float("nan")])
+        records[month] = {
+            "date": records[month]["date"],
+            **{c: blank for c in columns if rng.random() < 0.7},
+        }
+
+    state = IncrementalAggregates()
+    for record in records:
+        state.put(record)
+        assert_matches_full_recompute(state)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("gst_months", ["all", "some", "none"])
+def test_gst_columns(seed, gst_months):
+    rng = random.Random(seed)
+    records = [random_record(rng, month, REQUIRED_COLUMNS, missing_rate=0) for month in MONTHS[:18]]
+    for record in records:
+        if gst_months == "all" or (gst_months == "some" and rng.random() < 0.5):
+            record["gst_due"] = rng.choice([0.0, 0.0, 1500.0, None, float("nan")])
+            record["gst_paid"] = random_value(rng)
+
+    state = IncrementalAggregates()
+    for record in rng.sample(records, len(records)):
+        state.append(record)
+    assert_matches_full_recompute(state)
+
+    # Tax score and GST risk move with each month's gst_due
+    for _ in range(10):
+        record = dict(rng.choice(records))
+        record["gst_due"] = rng.choice([0.0, 2500.0, None])
+        state.replace(record)
+        assert_matches_full_recompute(state)